@@ -10,9 +10,10 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from src import config
 from src.core.database import Base
 from src.balance import Balance
+from src.candle import Candle
 from src.instrument import Instrument
 from src.order import Order
-from src.transaction import Transaction
+from src.transaction import Trade
 from src.user import User
 
 
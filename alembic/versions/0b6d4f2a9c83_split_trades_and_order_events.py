@@ -0,0 +1,198 @@
+"""Split trades and order events out of transactions.
+
+Revision ID: 0b6d4f2a9c83
+Revises: f3a8c5d1e702
+Create Date: 2026-10-18 21:14:05.093377
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6d4f2a9c83'
+down_revision: Union[str, None] = 'f3a8c5d1e702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+log = logging.getLogger("alembic.runtime.migration")
+
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month timestamp := date_trunc('month', coalesce((SELECT min(executed_at) FROM {source}),
+                                                    now() at time zone 'utc'));
+BEGIN
+    WHILE month < date_trunc('month', now() at time zone 'utc') + interval '3 months' LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+                       '{table}_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                       month, month + interval '1 month');
+        month := month + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+# Строки transactions с направлением заявки. Отмена записывалась строкой по цене заявки (0 у рыночной)
+# на неисполненный остаток; у отменённой заявки такой считается последняя подходящая строка — это не сделка
+BACKFILL_SIDES = """
+CREATE TEMPORARY TABLE backfill_sides AS
+SELECT id, instrument_id, order_id, price, quantity, executed_at, direction, created_at,
+       coalesce(candidate AND row_number() OVER (PARTITION BY order_id, candidate
+                                                 ORDER BY executed_at DESC, id) = 1, false) AS is_cancel,
+       false AS paired
+FROM (
+    SELECT t.id, t.instrument_id, t.order_id, t.price, t.quantity, t.executed_at, o.direction, o.created_at,
+           o.status = 'canceled' AND t.price = coalesce(o.price, 0)
+           AND t.quantity = o.quantity - o.filled_quantity AS candidate
+    FROM transactions t LEFT JOIN orders o ON o.id = t.order_id
+) sides
+"""
+
+BACKFILL_PAIRS = """
+WITH pairs AS (
+    SELECT b.id AS buy_row, s.id AS sell_row, b.instrument_id, b.order_id AS buy_order_id,
+           s.order_id AS sell_order_id, {price} AS price, b.quantity, b.executed_at,
+           CASE WHEN b.created_at >= s.created_at THEN 'buy' ELSE 'sell' END AS aggressor
+    FROM ({sides}) b JOIN ({sides}) s ON {join}
+    WHERE b.direction = 'buy' AND s.direction = 'sell'
+), inserted AS (
+    INSERT INTO trades (id, instrument_id, buy_order_id, sell_order_id, price, quantity, aggressor, executed_at)
+    SELECT gen_random_uuid(), instrument_id, buy_order_id, sell_order_id, price, quantity, aggressor::direction,
+           executed_at
+    FROM pairs
+)
+UPDATE backfill_sides SET paired = true WHERE id IN (SELECT buy_row FROM pairs UNION ALL SELECT sell_row FROM pairs)
+"""
+
+# Строки этой серии: обе стороны сделки записаны с ценой, количеством и временем исполнения. Внутри группы
+# одна сторона — единственная заявка-инициатор, поэтому порядок по order_id даёт одни и те же пары
+# (id различает только одинаковые строки одной заявки)
+BACKFILL_EXACT_PAIRS = BACKFILL_PAIRS.format(
+    sides="SELECT *, row_number() OVER (PARTITION BY instrument_id, executed_at, price, quantity, direction "
+          "ORDER BY order_id, id) AS n FROM backfill_sides WHERE NOT is_cancel AND direction IS NOT NULL",
+    join="s.instrument_id = b.instrument_id AND s.executed_at = b.executed_at AND s.price = b.price "
+         "AND s.quantity = b.quantity AND s.n = b.n",
+    price="b.price",
+)
+
+# Строки старого опросного матчера: сторона покупателя и сразу за ней сторона продавца, каждая по цене своей
+# заявки и со своим utcnow(). Пара — соседние по времени строки инструмента с равным количеством;
+# цена сделки — цена более ранней заявки, как в стакане
+BACKFILL_ADJACENT_PAIRS = BACKFILL_PAIRS.format(
+    sides="SELECT *, lead(id) OVER (PARTITION BY instrument_id ORDER BY executed_at, direction, order_id, id) "
+          "AS next_id FROM backfill_sides WHERE NOT paired AND NOT is_cancel AND direction IS NOT NULL",
+    join="s.id = b.next_id AND s.quantity = b.quantity AND s.executed_at - b.executed_at < interval '1 second'",
+    price="CASE WHEN b.created_at <= s.created_at THEN b.price ELSE s.price END",
+)
+
+# Остальное — односторонние сделки: старый рыночный путь писал только строку встречной заявки из стакана,
+# так что инициатор — противоположная сторона. Заявка второй стороны неизвестна и остаётся NULL
+BACKFILL_ONE_SIDED = """
+INSERT INTO trades (id, instrument_id, buy_order_id, sell_order_id, price, quantity, aggressor, executed_at)
+SELECT gen_random_uuid(), instrument_id,
+       CASE WHEN direction = 'buy' THEN order_id END, CASE WHEN direction = 'sell' THEN order_id END,
+       price, quantity, CASE WHEN direction = 'buy' THEN 'sell' ELSE 'buy' END::direction, executed_at
+FROM backfill_sides
+WHERE NOT paired AND NOT is_cancel
+"""
+
+BACKFILL_REPORT = """
+SELECT count(*), count(*) FILTER (WHERE paired), count(*) FILTER (WHERE is_cancel),
+       count(*) FILTER (WHERE NOT paired AND NOT is_cancel)
+FROM backfill_sides
+"""
+
+BACKFILL_EVENTS = """
+INSERT INTO order_events (order_id, event, quantity, price, created_at)
+SELECT id, 'placed', quantity, price, created_at FROM orders
+UNION ALL
+SELECT id, 'canceled', quantity - filled_quantity, price, updated_at FROM orders WHERE status = 'canceled'
+ORDER BY created_at
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('trades',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('instrument_id', sa.UUID(), nullable=False),
+    sa.Column('buy_order_id', sa.UUID(), nullable=True),
+    sa.Column('sell_order_id', sa.UUID(), nullable=True),
+    sa.Column('price', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('quantity', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('aggressor', postgresql.ENUM('buy', 'sell', name='direction', create_type=False), nullable=False),
+    sa.Column('executed_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['instrument_id'], ['instruments.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['buy_order_id'], ['orders.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['sell_order_id'], ['orders.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id', 'executed_at'),
+    postgresql_partition_by='RANGE (executed_at)'
+    )
+    op.execute(CREATE_PARTITIONS.format(source='transactions', table='trades'))
+
+    op.create_table('order_events',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('event', sa.Enum('placed', 'canceled', name='ordereventtype'), nullable=False),
+    sa.Column('quantity', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('price', sa.DECIMAL(precision=20, scale=8), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute(BACKFILL_SIDES)
+    op.execute(BACKFILL_EXACT_PAIRS)
+    op.execute(BACKFILL_ADJACENT_PAIRS)
+    op.execute(BACKFILL_ONE_SIDED)
+    rows, paired, canceled, one_sided = op.get_bind().execute(sa.text(BACKFILL_REPORT)).one()
+    log.info("Backfilled trades from %d transactions: %d rows paired, %d one-sided, %d cancel rows skipped",
+             rows, paired, one_sided, canceled)
+    op.execute('DROP TABLE backfill_sides')
+    op.execute(BACKFILL_EVENTS)
+    op.drop_table('transactions')
+
+    op.create_index('ix_trades_instrument_id_executed_at', 'trades',
+                    ['instrument_id', sa.text('executed_at DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_include=['price', 'quantity'])
+    op.create_index('ix_order_events_order_id', 'order_events', ['order_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Каждая сделка снова раскладывается на две строки, отмены восстанавливаются из журнала событий
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('order_id', sa.UUID(), nullable=True),
+    sa.Column('instrument_id', sa.UUID(), nullable=False),
+    sa.Column('price', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('quantity', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('executed_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['instrument_id'], ['instruments.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id', 'executed_at'),
+    postgresql_partition_by='RANGE (executed_at)'
+    )
+    op.execute(CREATE_PARTITIONS.format(source='trades', table='transactions'))
+
+    op.execute('INSERT INTO transactions (id, order_id, instrument_id, price, quantity, executed_at) '
+               'SELECT gen_random_uuid(), side.order_id, t.instrument_id, t.price, t.quantity, t.executed_at '
+               'FROM trades t CROSS JOIN LATERAL (VALUES (t.buy_order_id), (t.sell_order_id)) AS side(order_id) '
+               'WHERE side.order_id IS NOT NULL OR (t.buy_order_id IS NULL AND t.sell_order_id IS NULL)')
+    op.execute("INSERT INTO transactions (id, order_id, instrument_id, price, quantity, executed_at) "
+               "SELECT gen_random_uuid(), e.order_id, o.instrument_id, coalesce(e.price, 0), e.quantity, e.created_at "
+               "FROM order_events e JOIN orders o ON o.id = e.order_id WHERE e.event = 'canceled'")
+
+    op.drop_index('ix_order_events_order_id', table_name='order_events')
+    op.drop_table('order_events')
+    op.execute('DROP TYPE ordereventtype')
+    op.drop_index('ix_trades_instrument_id_executed_at', table_name='trades')
+    op.drop_table('trades')
+
+    op.create_index('ix_transactions_instrument_id_executed_at', 'transactions',
+                    ['instrument_id', sa.text('executed_at DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_include=['price', 'quantity'])
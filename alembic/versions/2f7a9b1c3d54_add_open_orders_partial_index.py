@@ -0,0 +1,29 @@
+"""Add open orders partial index.
+
+Revision ID: 2f7a9b1c3d54
+Revises: 8c3d2e6f4a10
+Create Date: 2026-10-18 13:05:44.872019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7a9b1c3d54'
+down_revision: Union[str, None] = '8c3d2e6f4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_open_instrument_id_created_at', 'orders', ['instrument_id', 'created_at'],
+                    unique=False, postgresql_where=sa.text("status IN ('new', 'partially_filled')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_open_instrument_id_created_at', table_name='orders')
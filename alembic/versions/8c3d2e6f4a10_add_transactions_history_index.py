@@ -0,0 +1,30 @@
+"""Add transactions history index.
+
+Revision ID: 8c3d2e6f4a10
+Revises: 5b1f0c7a9e21
+Create Date: 2026-10-18 12:40:07.301554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3d2e6f4a10'
+down_revision: Union[str, None] = '5b1f0c7a9e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transactions_instrument_id_executed_at', 'transactions',
+                    ['instrument_id', sa.text('executed_at DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_include=['price', 'quantity'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_instrument_id_executed_at', table_name='transactions')
@@ -0,0 +1,31 @@
+"""Add orders user created_at index.
+
+Revision ID: a41e6d2b8f73
+Revises: 2f7a9b1c3d54
+Create Date: 2026-10-18 15:21:09.514382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41e6d2b8f73'
+down_revision: Union[str, None] = '2f7a9b1c3d54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_id_created_at', 'orders',
+                    ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.drop_index('ix_orders_user_id', table_name='orders')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_orders_user_id', 'orders', ['user_id'], unique=False)
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
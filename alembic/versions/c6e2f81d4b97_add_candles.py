@@ -0,0 +1,40 @@
+"""Add candles.
+
+Revision ID: c6e2f81d4b97
+Revises: a41e6d2b8f73
+Create Date: 2026-10-18 18:02:44.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e2f81d4b97'
+down_revision: Union[str, None] = 'a41e6d2b8f73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('candles',
+    sa.Column('instrument_id', sa.UUID(), nullable=False),
+    sa.Column('interval', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('open', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('high', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('low', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('close', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('volume', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('trades', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['instrument_id'], ['instruments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('instrument_id', 'interval', 'started_at')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('candles')
@@ -0,0 +1,29 @@
+"""Add candles turnover.
+
+Revision ID: e1b7d93a6c28
+Revises: c6e2f81d4b97
+Create Date: 2026-10-18 19:11:27.602913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b7d93a6c28'
+down_revision: Union[str, None] = 'c6e2f81d4b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('candles', sa.Column('turnover', sa.DECIMAL(precision=28, scale=8), server_default='0',
+                                       nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('candles', 'turnover')
@@ -0,0 +1,94 @@
+"""Partition transactions by executed_at.
+
+Revision ID: f3a8c5d1e702
+Revises: e1b7d93a6c28
+Create Date: 2026-10-18 20:02:41.518237
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c5d1e702'
+down_revision: Union[str, None] = 'e1b7d93a6c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Месячные секции от первой сделки до трёх месяцев вперёд; дальше их заводит приложение
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month timestamp := date_trunc('month', coalesce((SELECT min(executed_at) FROM transactions_unpartitioned),
+                                                    now() at time zone 'utc'));
+BEGIN
+    WHILE month < date_trunc('month', now() at time zone 'utc') + interval '3 months' LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+                       'transactions_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                       month, month + interval '1 month');
+        month := month + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_transactions_instrument_id_executed_at', table_name='transactions')
+    op.rename_table('transactions', 'transactions_unpartitioned')
+    op.execute('ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_pkey '
+               'TO transactions_unpartitioned_pkey')
+
+    # Ключ секционирования обязан входить в первичный ключ
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('order_id', sa.UUID(), nullable=True),
+    sa.Column('instrument_id', sa.UUID(), nullable=False),
+    sa.Column('price', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('quantity', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('executed_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['instrument_id'], ['instruments.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id', 'executed_at'),
+    postgresql_partition_by='RANGE (executed_at)'
+    )
+    op.execute(CREATE_PARTITIONS)
+
+    op.execute('INSERT INTO transactions (id, order_id, instrument_id, price, quantity, executed_at) '
+               'SELECT id, order_id, instrument_id, price, quantity, '
+               "coalesce(executed_at, now() at time zone 'utc') FROM transactions_unpartitioned")
+    op.drop_table('transactions_unpartitioned')
+
+    op.create_index('ix_transactions_instrument_id_executed_at', 'transactions',
+                    ['instrument_id', sa.text('executed_at DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_include=['price', 'quantity'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Секции, уже выгруженные в архив, обратно не загружаются
+    op.drop_index('ix_transactions_instrument_id_executed_at', table_name='transactions')
+    op.rename_table('transactions', 'transactions_partitioned')
+    op.execute('ALTER TABLE transactions_partitioned RENAME CONSTRAINT transactions_pkey '
+               'TO transactions_partitioned_pkey')
+
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('order_id', sa.UUID(), nullable=True),
+    sa.Column('instrument_id', sa.UUID(), nullable=False),
+    sa.Column('price', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('quantity', sa.DECIMAL(precision=20, scale=8), nullable=False),
+    sa.Column('executed_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.ForeignKeyConstraint(['instrument_id'], ['instruments.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO transactions (id, order_id, instrument_id, price, quantity, executed_at) '
+               'SELECT id, order_id, instrument_id, price, quantity, executed_at FROM transactions_partitioned')
+    op.drop_table('transactions_partitioned')
+
+    op.create_index('ix_transactions_instrument_id_executed_at', 'transactions',
+                    ['instrument_id', sa.text('executed_at DESC'), sa.text('id DESC')],
+                    unique=False, postgresql_include=['price', 'quantity'])
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PERCENTILES = (("p50", 0.5), ("p99", 0.99), ("p999", 0.999))
+
+
+def latency_summary(samples_ns: Sequence[int]) -> Dict[str, float]:
+    # Перцентили по ближайшему рангу, в миллисекундах
+    ordered = sorted(samples_ns)
+    summary: Dict[str, float] = {"count": len(ordered)}
+    for name, quantile in PERCENTILES:
+        value = ordered[max(math.ceil(quantile * len(ordered)) - 1, 0)] if ordered else 0
+        summary[f"{name}_ms"] = round(value / 1e6, 4)
+    summary["max_ms"] = round(ordered[-1] / 1e6, 4) if ordered else 0
+    return summary
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(benchmark: str, parameters: Dict[str, Any], results: List[dict], output: Optional[str]) -> None:
+    # Коммит и окружение пишутся в отчёт, чтобы файлы разных прогонов можно было сравнить benchmarks.compare
+    report = {
+        "benchmark": benchmark,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": datetime.utcnow().isoformat(),
+        "parameters": parameters,
+        "results": results,
+    }
+    rendered = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as file:
+            file.write(rendered + "\n")
+    print(rendered)
+
+
+async def asgi_request(app, method: str, path: str, body: Optional[bytes] = None,
+                       headers: Sequence[Tuple[str, str]] = ()) -> Tuple[int, bytes]:
+    # Запрос напрямую в ASGI-приложение, без сокетов и HTTP-клиента
+    path, _, query = path.partition("?")
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in headers]
+    if body is not None:
+        raw_headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+        "headers": raw_headers, "server": ("benchmark", 80), "client": ("benchmark", 1),
+    }
+    status, chunks = 0, []
+    received, finished = False, asyncio.Event()
+
+    async def receive():
+        # Тело отдаётся один раз, дальше — ожидание отключения (его слушают потоковые ответы)
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body or b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    return status, b"".join(chunks)
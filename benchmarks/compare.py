@@ -0,0 +1,60 @@
+import argparse
+import json
+from typing import Dict, Iterator, Tuple
+
+# Поля, по которым узнаётся один и тот же прогон в двух отчётах
+KEY_FIELDS = ("scenario", "operation", "group_commit_size", "rows")
+# Сравниваются только пропускная способность и задержки; объёмы прогона (commands, fills) от коммита не зависят
+METRICS = ("_ms", "_per_second", "_rps")
+# Для этих метрик рост — это ухудшение
+LOWER_IS_BETTER = ("_ms",)
+
+
+def load(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def flatten(result: dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for name, value in result.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{name}.")
+        elif isinstance(value, (int, float)) and name.endswith(METRICS):
+            yield f"{prefix}{name}", value
+
+
+def index(report: dict) -> Dict[str, dict]:
+    return {
+        "/".join(str(result[field]) for field in KEY_FIELDS if field in result) or str(i): result
+        for i, result in enumerate(report["results"])
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports written with --output.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Mark changes larger than this many percent (default 10).")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    print(f"{baseline['benchmark']}: {baseline.get('revision')} -> {candidate.get('revision')}")
+
+    before = index(baseline)
+    for key, result in index(candidate).items():
+        if key not in before:
+            continue
+        previous = dict(flatten(before[key]))
+        for metric, value in flatten(result):
+            old = previous.get(metric)
+            if not old:
+                continue
+            change = (value - old) / old * 100
+            worse = change > 0 if metric.endswith(LOWER_IS_BETTER) else change < 0
+            marker = ("REGRESSION" if worse else "improvement") if abs(change) >= args.threshold else ""
+            print(f"  {key:<16} {metric:<24} {old:>14} -> {value:<14} {change:+7.1f}% {marker}")
+
+
+if __name__ == "__main__":
+    main()
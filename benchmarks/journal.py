@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+
+from src.order.engine import BookOrder, PlaceOrder
+from src.order.enums import Direction
+from src.order.journal import Journal
+
+DEFAULT_GROUP_COMMIT_SIZES = (1, 8, 64, 512)
+
+
+def make_commands(count: int) -> list:
+    instrument_id = uuid.uuid4()
+    return [
+        PlaceOrder(order=BookOrder(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            instrument_id=instrument_id,
+            direction=Direction.buy if i % 2 else Direction.sell,
+            price=Decimal(100 + i % 50),
+            quantity=Decimal(1 + i % 10),
+        ))
+        for i in range(count)
+    ]
+
+
+def run(commands: list, group_commit_size: int, directory: str) -> dict:
+    journal = Journal(os.path.join(directory, f"bench-{group_commit_size}.journal"), group_commit_size)
+    journal.open()
+
+    started = time.perf_counter()
+    # Команды приходят пачками по group_commit_size — так же, как их сливает цикл матчинга
+    for i in range(0, len(commands), group_commit_size):
+        journal.append(commands[i:i + group_commit_size])
+    elapsed = time.perf_counter() - started
+
+    size = os.path.getsize(journal.path)
+    journal.close()
+
+    return {
+        "group_commit_size": group_commit_size,
+        "commands": len(commands),
+        "fsyncs": -(-len(commands) // group_commit_size),
+        "seconds": round(elapsed, 4),
+        "commands_per_second": round(len(commands) / elapsed),
+        "bytes_per_command": round(size / len(commands), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Journal append throughput at different group-commit sizes.")
+    parser.add_argument("--commands", type=int, default=20000)
+    parser.add_argument("--group-commit-sizes", type=int, nargs="+", default=DEFAULT_GROUP_COMMIT_SIZES)
+    parser.add_argument("--directory", default=None, help="Where to write journals (defaults to a temp dir).")
+    args = parser.parse_args()
+
+    commands = make_commands(args.commands)
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        results = [run(commands, size, directory) for size in args.group_commit_sizes]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
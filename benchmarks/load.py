@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from benchmarks.common import asgi_request, latency_summary, write_report
+from src.dependencies import session_factory
+from src.main import app
+from src.middlewares import auth_user
+from src.order.service import DEFAULT_TICKER
+from src.user.enums import UserRole
+from src.user.models import User as UserDAL
+from src.user.utils import generate_api_key
+
+API = "/api/v1"
+MID_PRICE = 1000
+DEPOSIT = 10 ** 9
+
+# Доля операций в смеси нагрузки; остаток — лимитные заявки
+MARKET_SHARE = 0.1
+CANCEL_SHARE = 0.1
+BOOK_SHARE = 0.1
+
+
+class LoadClient:
+    def __init__(self, app, samples: Dict[str, List[int]], errors: Dict[str, int]):
+        self.app = app
+        self.samples = samples
+        self.errors = errors
+
+    async def call(self, operation: str, method: str, path: str, payload=None, api_key: str = None) -> Tuple[int, bytes]:
+        headers = [("Authorization", api_key)] if api_key else []
+        body = json.dumps(payload).encode() if payload is not None else None
+
+        started = time.perf_counter_ns()
+        try:
+            status, content = await asgi_request(self.app, method, API + path, body, headers)
+        except Exception:
+            status, content = 500, b""
+        self.samples[operation].append(time.perf_counter_ns() - started)
+        if status >= 400:
+            self.errors[operation] += 1
+        return status, content
+
+
+async def create_admin() -> str:
+    # Администратор заводится напрямую в базе: через API можно зарегистрировать только обычного пользователя
+    key_id, api_key = generate_api_key()
+    async with session_factory() as db_session:
+        db_session.add(UserDAL(id=uuid.uuid4(), username=f"bench-admin-{key_id[:12]}", role=UserRole.admin,
+                               api_key=key_id))
+        await db_session.commit()
+    return api_key
+
+
+async def prepare(client: LoadClient, ticker: str, users: int) -> List[Tuple[str, str]]:
+    admin_key = await create_admin()
+    await client.call("setup", "POST", "/admin/instrument", {"name": f"Benchmark {ticker}", "ticker": ticker},
+                      admin_key)
+
+    accounts = []
+    run_id = uuid.uuid4().hex[:8]
+    for i in range(users):
+        status, content = await client.call("setup", "POST", "/public/register", {"name": f"bench-{run_id}-{i}"})
+        if status != 200:
+            raise RuntimeError(f"Failed to register a benchmark user: {status} {content[:200]!r}")
+        user = json.loads(content)
+        for deposit_ticker in (DEFAULT_TICKER, ticker):
+            await client.call("setup", "POST", "/admin/balance/deposit",
+                              {"user_id": user["id"], "ticker": deposit_ticker, "amount": DEPOSIT}, admin_key)
+        accounts.append((user["id"], user["api_key"]))
+    return accounts
+
+
+async def trade(client: LoadClient, ticker: str, accounts: List[Tuple[str, str]], remaining: List[int]) -> None:
+    placed: List[Tuple[str, str]] = []
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        user_id, api_key = random.choice(accounts)
+        direction = random.choice(("BUY", "SELL"))
+        kind = random.random()
+
+        if kind < BOOK_SHARE:
+            await client.call("orderbook", "GET", f"/public/orderbook/{ticker}?limit=10")
+        elif kind < BOOK_SHARE + CANCEL_SHARE and placed:
+            order_id, owner_key = placed.pop(random.randrange(len(placed)))
+            await client.call("cancel_order", "DELETE", f"/order/{order_id}", api_key=owner_key)
+        elif kind < BOOK_SHARE + CANCEL_SHARE + MARKET_SHARE:
+            await client.call("market_order", "POST", "/order",
+                              {"user_id": user_id, "direction": direction, "ticker": ticker,
+                               "qty": random.randint(1, 10)}, api_key)
+        else:
+            offset = abs(int(random.gauss(0, 10))) - 3
+            price = MID_PRICE - offset if direction == "BUY" else MID_PRICE + offset
+            status, content = await client.call(
+                "limit_order", "POST", "/order",
+                {"user_id": user_id, "direction": direction, "ticker": ticker, "qty": random.randint(1, 10),
+                 "price": price}, api_key)
+            if status == 200:
+                placed.append((json.loads(content)["order_id"], api_key))
+
+
+async def run(args: argparse.Namespace) -> List[dict]:
+    random.seed(args.seed)
+    # Проверка ключей в src.main.app ещё не подключена — без неё у запросов нет request.state.user
+    if not any(getattr(middleware, "kwargs", {}).get("dispatch") is auth_user for middleware in app.user_middleware):
+        app.add_middleware(BaseHTTPMiddleware, dispatch=auth_user)
+
+    samples: Dict[str, List[int]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    client = LoadClient(app, samples, errors)
+
+    async with app.router.lifespan_context(app):
+        accounts = await prepare(client, args.ticker, args.users)
+        samples.clear()
+        errors.clear()
+
+        remaining = [args.operations]
+        started = time.perf_counter()
+        await asyncio.gather(*(trade(client, args.ticker, accounts, remaining) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    orders = sum(len(samples[operation]) for operation in ("limit_order", "market_order"))
+    results = [
+        {
+            "operation": operation,
+            "requests": len(operation_samples),
+            "errors": errors[operation],
+            "requests_per_second": round(len(operation_samples) / elapsed),
+            "latency": latency_summary(operation_samples),
+        }
+        for operation, operation_samples in sorted(samples.items())
+    ]
+    results.append({
+        "operation": "total",
+        "requests": sum(len(operation_samples) for operation_samples in samples.values()),
+        "errors": sum(errors.values()),
+        "seconds": round(elapsed, 4),
+        "orders_per_second": round(orders / elapsed),
+        "latency": latency_summary([sample for operation_samples in samples.values() for sample in operation_samples]),
+    })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end load test of src.main.app in-process over ASGI against "
+                                                 "the configured database. Creates users, balances and an instrument.")
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--ticker", default="BENCH")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    write_report("load", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import random
+import time
+import uuid
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from benchmarks.common import latency_summary, write_report
+from src.order.engine import BookOrder, CancelOrder, Command, MatchingEngine, PlaceOrder
+from src.order.enums import Direction, OrderType
+from src.order.settlement import Settlement
+
+MID_PRICE = 1000
+
+
+def order(instrument_id: uuid.UUID, users: List[uuid.UUID], direction: Direction, price, quantity) -> BookOrder:
+    return BookOrder(
+        id=uuid.uuid4(),
+        user_id=random.choice(users),
+        instrument_id=instrument_id,
+        direction=direction,
+        price=Decimal(price) if price is not None else None,
+        quantity=Decimal(quantity),
+    )
+
+
+def random_flow(instrument_id: uuid.UUID, users: List[uuid.UUID], count: int) -> List[Command]:
+    # Лимитные заявки вокруг середины, отмены случайных ранее выставленных и немного рыночных
+    commands, placed = [], []
+    for _ in range(count):
+        kind = random.random()
+        if kind < 0.15 and placed:
+            commands.append(CancelOrder(instrument_id, placed.pop(random.randrange(len(placed)))))
+        elif kind < 0.25:
+            direction = random.choice((Direction.buy, Direction.sell))
+            commands.append(PlaceOrder(order(instrument_id, users, direction, None, random.randint(1, 20)),
+                                       order_type=OrderType.market,
+                                       budget=Decimal(MID_PRICE * 20) if direction == Direction.buy else Decimal(20)))
+        else:
+            direction = random.choice((Direction.buy, Direction.sell))
+            offset = int(random.gauss(0, 15))
+            price = MID_PRICE - abs(offset) if direction == Direction.buy else MID_PRICE + abs(offset)
+            # Часть заявок пересекает спред и исполняется сразу
+            if random.random() < 0.3:
+                price += 10 if direction == Direction.buy else -10
+            placed.append((new := order(instrument_id, users, direction, price, random.randint(1, 50))).id)
+            commands.append(PlaceOrder(new))
+    return commands
+
+
+def sweep_flow(instrument_id: uuid.UUID, users: List[uuid.UUID], count: int) -> List[Command]:
+    # Тонкая лестница уровней, каждую из которых целиком выбирает одна крупная заявка
+    commands = []
+    levels = 200
+    while len(commands) < count:
+        commands += [PlaceOrder(order(instrument_id, users, Direction.sell, MID_PRICE + i, 1)) for i in range(levels)]
+        commands.append(PlaceOrder(order(instrument_id, users, Direction.buy, MID_PRICE + levels, levels)))
+    return commands[:count]
+
+
+def deep_level_flow(instrument_id: uuid.UUID, users: List[uuid.UUID], count: int) -> List[Command]:
+    # Тысячи мелких заявок на одной цене: одна встречная заявка даёт столько же сделок
+    commands = []
+    queue = 1000
+    while len(commands) < count:
+        commands += [PlaceOrder(order(instrument_id, users, Direction.buy, MID_PRICE, 1)) for _ in range(queue)]
+        commands.append(PlaceOrder(order(instrument_id, users, Direction.sell, MID_PRICE, queue)))
+    return commands[:count]
+
+
+def cancel_storm_flow(instrument_id: uuid.UUID, users: List[uuid.UUID], count: int) -> List[Command]:
+    # Выставление и отмена на множестве разреженных уровней: вставки и удаления в середину списка цен
+    commands, placed = [], []
+    while len(commands) < count:
+        direction = random.choice((Direction.buy, Direction.sell))
+        price = MID_PRICE - random.randint(1, 5000) if direction == Direction.buy else MID_PRICE + random.randint(1, 5000)
+        placed.append((new := order(instrument_id, users, direction, price, 1)).id)
+        commands.append(PlaceOrder(new))
+        if len(placed) > 2000:
+            commands.append(CancelOrder(instrument_id, placed.pop(random.randrange(len(placed)))))
+    return commands[:count]
+
+
+SCENARIOS: Dict[str, Callable[[uuid.UUID, List[uuid.UUID], int], List[Command]]] = {
+    "random": random_flow,
+    "sweep": sweep_flow,
+    "deep_level": deep_level_flow,
+    "cancel_storm": cancel_storm_flow,
+}
+
+
+def run(scenario: str, count: int, users: int, seed: int) -> dict:
+    random.seed(seed)
+    instrument_id = uuid.uuid4()
+    commands = SCENARIOS[scenario](instrument_id, [uuid.uuid4() for _ in range(users)], count)
+
+    engine = MatchingEngine()
+    settlement = Settlement(uuid.uuid4())
+    samples, fills = [], 0
+
+    # Замеряется то же, что цикл матчинга делает в памяти до записи в базу: исполнение команды и расчёт
+    started = time.perf_counter()
+    for command in commands:
+        command_started = time.perf_counter_ns()
+        result = engine.execute(command)
+        settlement.add_fills(result.fills)
+        if result.released is not None:
+            settlement.add_release(result.released, result.unlock)
+        samples.append(time.perf_counter_ns() - command_started)
+        fills += len(result.fills)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": scenario,
+        "commands": len(commands),
+        "fills": fills,
+        "seconds": round(elapsed, 4),
+        "orders_per_second": round(len(commands) / elapsed),
+        "latency": latency_summary(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Matching engine microbenchmarks on random and adversarial order flow.")
+    parser.add_argument("--commands", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    results = [run(scenario, args.commands, args.users, args.seed) for scenario in args.scenarios]
+    write_report("matching", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
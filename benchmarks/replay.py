@@ -0,0 +1,259 @@
+import argparse
+import hashlib
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from benchmarks.common import latency_summary, write_report
+from src.balance.ledger import balance_ledger
+from src.instrument.models import Instrument as InstrumentDAL
+from src.instrument.registry import instrument_registry
+from src.order.engine import CancelOrder, CommandResult, MatchingEngine, PlaceOrder
+from src.order.enums import Direction, OrderType
+from src.order.schemas import LimitOrderBody, MarketOrderBody
+from src.order.service import DEFAULT_TICKER, accept_order, to_book_order
+from src.order.settlement import Settlement
+
+# Пример потока (одна команда на строку, ts — секунды, используются только при --speed > 0):
+# {"ts": 0.0, "type": "deposit", "user": "alice", "ticker": "RUB", "amount": 100000}
+# {"ts": 0.1, "type": "order", "user": "alice", "ref": "a1", "direction": "BUY", "ticker": "MEMECOIN", "qty": 5, "price": 100}
+# {"ts": 0.2, "type": "order", "user": "bob", "direction": "SELL", "ticker": "MEMECOIN", "qty": 5}
+# {"ts": 0.3, "type": "cancel", "user": "alice", "ref": "a1"}
+
+
+def stable_id(kind: str, name: str) -> uuid.UUID:
+    # Идентификаторы выводятся из имён потока, поэтому состояние и хэш не зависят от прогона
+    return uuid.UUID(bytes=hashlib.md5(f"{kind}:{name}".encode()).digest(), version=4)
+
+
+def canonical(value: Decimal) -> str:
+    return format(value.normalize(), "f") if value else "0"
+
+
+@dataclass
+class ReplayStats:
+    commands: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    canceled: int = 0
+    fills: int = 0
+    samples: List[int] = field(default_factory=list)
+
+
+class Replay:
+    def __init__(self):
+        self.engine = MatchingEngine()
+        self.stats = ReplayStats()
+        self.names: Dict[uuid.UUID, str] = {}
+        self.orders: Dict[str, PlaceOrder] = {}
+
+        # Справочник и журнал балансов — те же, что проверяют заявки в API, только без базы
+        instrument_registry.replace([])
+        balance_ledger.entries.clear()
+        balance_ledger.quote_instrument_id = self.instrument(DEFAULT_TICKER)
+
+    def instrument(self, ticker: str) -> uuid.UUID:
+        instrument = instrument_registry.get(ticker)
+        if instrument is None:
+            instrument_registry.put(InstrumentDAL(id=stable_id("instrument", ticker), ticker=ticker, name=ticker,
+                                                  delisted=False))
+            instrument = instrument_registry.get(ticker)
+            self.names[instrument.id] = ticker
+        return instrument.id
+
+    def user(self, name: str) -> uuid.UUID:
+        user_id = stable_id("user", name)
+        self.names[user_id] = name
+        return user_id
+
+    def apply(self, command: dict) -> None:
+        started = time.perf_counter_ns()
+        self.stats.commands += 1
+        handler = getattr(self, f"_{command['type']}", None)
+        if handler is None:
+            raise ValueError(f"Unknown command type {command['type']!r} in command {self.stats.commands}")
+        handler(command)
+        self.stats.samples.append(time.perf_counter_ns() - started)
+
+    def _deposit(self, command: dict) -> None:
+        balance_ledger.adjust(self.user(command["user"]), self.instrument(command["ticker"]),
+                              Decimal(command["amount"]), 0)
+
+    def _order(self, command: dict) -> None:
+        ref = command.get("ref") or f"#{self.stats.commands}"
+        self.instrument(command["ticker"])
+        fields = {"user_id": self.user(command["user"]), "direction": command["direction"],
+                  "ticker": command["ticker"], "qty": command["qty"]}
+
+        # Тот же приём заявки, что в create_order: проверка инструмента и резервирование в журнале балансов
+        try:
+            if "price" in command:
+                body = LimitOrderBody(price=command["price"], **fields)
+            else:
+                body = MarketOrderBody(price_limit=command.get("price_limit"), **fields)
+            order, reserve_instrument_id, _ = accept_order(body)
+        except (HTTPException, ValidationError):
+            self.stats.rejected += 1
+            return
+
+        order.id = stable_id("order", ref)
+        self.names[order.id] = ref
+        place = PlaceOrder(order=to_book_order(order), order_type=order.order_type)
+
+        if order.order_type == OrderType.market:
+            budget = balance_ledger.available(body.user_id, reserve_instrument_id)
+            result = self.engine.execute(replace(place, budget=budget))
+        else:
+            self.orders[ref] = place
+            result = self.engine.execute(place)
+
+        # Рыночная заявка без сделок отклоняется, как в create_order, но её расчёт всё равно применяется
+        if order.order_type == OrderType.market and not result.fills:
+            self.stats.rejected += 1
+        else:
+            self.stats.accepted += 1
+        self._settle(result)
+
+    def _cancel(self, command: dict) -> None:
+        place = self.orders.pop(command["ref"], None)
+        if place is None or place.order.user_id != self.user(command["user"]):
+            self.stats.rejected += 1
+            return
+
+        result = self.engine.execute(CancelOrder(instrument_id=place.instrument_id, order_id=place.order.id))
+        if result.released is None:
+            self.stats.rejected += 1
+            return
+        self.stats.canceled += 1
+        self._settle(result)
+
+    def _settle(self, result: CommandResult) -> None:
+        settlement = Settlement(balance_ledger.quote_instrument_id)
+        settlement.add_fills(result.fills)
+        if result.released is not None:
+            settlement.add_release(result.released, result.unlock)
+        balance_ledger.apply_settlement(settlement)
+        self.stats.fills += len(result.fills)
+
+    def state(self) -> Iterator[str]:
+        # Канонический вид: стаканы по тикерам (уровни от лучшей цены, заявки в порядке очереди), затем балансы
+        for instrument_id in sorted(self.engine.books, key=lambda instrument_id: self.names[instrument_id]):
+            book = self.engine.books[instrument_id]
+            for side in (book.bids, book.asks):
+                for level in side.depth():
+                    for order in level.orders.values():
+                        yield (f"book {self.names[instrument_id]} {side.direction.value} {canonical(level.price)} "
+                               f"{self.names[order.id]} {self.names[order.user_id]} {canonical(order.remaining)}")
+
+        balances = sorted(((self.names[user_id], self.names[instrument_id]), entry)
+                          for (user_id, instrument_id), entry in balance_ledger.entries.items())
+        for (user, ticker), entry in balances:
+            if entry.amount or entry.locked:
+                yield f"balance {user} {ticker} {canonical(entry.amount)} {canonical(entry.locked)}"
+
+    def digest(self) -> str:
+        state = hashlib.sha256()
+        for line in self.state():
+            state.update(line.encode() + b"\n")
+        return state.hexdigest()
+
+
+def read_commands(path: str) -> Iterator[dict]:
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def run(path: str, speed: float) -> dict:
+    replay = Replay()
+    first_ts: Optional[float] = None
+    started = time.perf_counter()
+
+    for command in read_commands(path):
+        # При speed > 0 команды подаются по записанным отметкам времени, ускоренным в speed раз
+        if speed > 0 and "ts" in command:
+            first_ts = command["ts"] if first_ts is None else first_ts
+            delay = (command["ts"] - first_ts) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        replay.apply(command)
+    elapsed = time.perf_counter() - started
+
+    stats = replay.stats
+    return {
+        "commands": stats.commands,
+        "accepted": stats.accepted,
+        "rejected": stats.rejected,
+        "canceled": stats.canceled,
+        "fills": stats.fills,
+        "seconds": round(elapsed, 4),
+        "commands_per_second": round(stats.commands / elapsed) if elapsed else 0,
+        "latency": latency_summary(stats.samples),
+        "state_hash": replay.digest(),
+    }
+
+
+def generate(path: str, count: int, users: int, seed: int) -> None:
+    # Синтетический поток для проверки детерминизма, когда записанного под рукой нет
+    random.seed(seed)
+    refs: List[str] = []
+    with open(path, "w") as file:
+        for i in range(users):
+            for ticker in (DEFAULT_TICKER, "MEMECOIN"):
+                file.write(json.dumps({"ts": 0.0, "type": "deposit", "user": f"user{i}", "ticker": ticker,
+                                       "amount": 10 ** 7}) + "\n")
+        for i in range(count):
+            ts, user = round(i * 0.001, 3), f"user{random.randrange(users)}"
+            kind = random.random()
+            if kind < 0.15 and refs:
+                ref = refs.pop(random.randrange(len(refs)))
+                command = {"ts": ts, "type": "cancel", "user": ref.split("-")[0], "ref": ref}
+            else:
+                direction = random.choice((Direction.buy.value, Direction.sell.value))
+                command = {"ts": ts, "type": "order", "user": user, "direction": direction, "ticker": "MEMECOIN",
+                           "qty": random.randint(1, 20)}
+                if kind >= 0.25:
+                    command["ref"] = f"{user}-{i}"
+                    command["price"] = random.randint(90, 110)
+                    refs.append(command["ref"])
+            file.write(json.dumps(command) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a JSONL stream of order, cancel and deposit commands through "
+                                                 "order acceptance, matching and settlement in memory.")
+    parser.add_argument("path", help="JSONL command stream.")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="0 replays at maximum speed, otherwise follows recorded ts sped up this many times.")
+    parser.add_argument("--runs", type=int, default=1, help="Replay several times and check the state hash matches.")
+    parser.add_argument("--expect-hash", default=None, help="Exit non-zero if the state hash differs.")
+    parser.add_argument("--generate", type=int, default=0, metavar="COUNT",
+                        help="Write a synthetic stream of COUNT commands to path before replaying it.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.path, args.generate, args.users, args.seed)
+
+    results = [run(args.path, args.speed) for _ in range(args.runs)]
+    write_report("replay", vars(args), results, args.output)
+
+    hashes = {result["state_hash"] for result in results}
+    if len(hashes) > 1:
+        raise SystemExit(f"Replay is not deterministic: {sorted(hashes)}")
+    if args.expect_hash is not None and args.expect_hash not in hashes:
+        raise SystemExit(f"State hash {hashes.pop()} does not match {args.expect_hash}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from fastapi import FastAPI
+from starlette.responses import Response
+
+from benchmarks.common import asgi_request
+from src.order.enums import Direction, OrderStatus, OrderType
+from src.order.schemas import LimitOrder, LimitOrderBody, MarketOrder
+from src.order.service import render_order
+
+OrderRow = namedtuple("OrderRow", "id instrument_id order_type direction price quantity filled_quantity status created_at")
+
+DEFAULT_ROWS = (1, 100, 1000)
+
+
+def make_rows(count: int) -> list:
+    instrument_id = uuid.uuid4()
+    return [
+        OrderRow(
+            id=uuid.uuid4(),
+            instrument_id=instrument_id,
+            order_type=OrderType.limit,
+            direction=Direction.buy if i % 2 else Direction.sell,
+            price=Decimal(100 + i % 50),
+            quantity=Decimal(1 + i % 10),
+            filled_quantity=Decimal(0),
+            status=OrderStatus.new,
+            created_at=datetime.utcnow(),
+        )
+        for i in range(count)
+    ]
+
+
+def make_app(rows: list, user_id: uuid.UUID) -> FastAPI:
+    app = FastAPI()
+
+    # Прежний путь: модели на каждую строку и повторная валидация через response_model
+    @app.get("/models", response_model=List[LimitOrder | MarketOrder])
+    async def models():
+        return [
+            LimitOrder(
+                id=row.id,
+                status=row.status,
+                user_id=user_id,
+                timestamp=row.created_at,
+                body=LimitOrderBody(user_id=user_id, direction=row.direction, ticker="MEMECOIN", qty=row.quantity,
+                                    price=row.price),
+                filled=int(row.filled_quantity),
+            )
+            for row in rows
+        ]
+
+    # Быстрый путь: JSON собирается из строк напрямую и отдаётся без response_model
+    @app.get("/fast", response_model=List[LimitOrder | MarketOrder])
+    async def fast():
+        return Response(content=b"[" + b",".join(render_order(row, str(user_id)) for row in rows) + b"]",
+                        media_type="application/json")
+
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int) -> float:
+    await asgi_request(app, "GET", path)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await asgi_request(app, "GET", path)
+    return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Requests per second of /order-style responses before and after "
+                                                 "the fast serialization path.")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    args = parser.parse_args()
+
+    results = []
+    for count in args.rows:
+        app = make_app(make_rows(count), uuid.uuid4())
+        before = asyncio.run(run(app, "/models", args.requests))
+        after = asyncio.run(run(app, "/fast", args.requests))
+        results.append({
+            "rows": count,
+            "requests": args.requests,
+            "models_rps": round(before),
+            "fast_rps": round(after),
+            "speedup": round(after / before, 2),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import config
+from src.balance.models import Balance
+from src.dependencies import session_factory
+from src.order.enums import Direction, OrderStatus, OrderType
+from src.order.models import Order
+from src.order.settlement import Settlement, apply_balance_deltas
+
+log = logging.getLogger(__name__)
+
+BalanceKey = Tuple[uuid.UUID, uuid.UUID]
+
+
+@dataclass(slots=True)
+class LedgerEntry:
+    amount: Decimal = Decimal(0)
+    locked: Decimal = Decimal(0)
+
+    @property
+    def available(self) -> Decimal:
+        return self.amount - self.locked
+
+
+@dataclass(slots=True, frozen=True)
+class LedgerMismatch:
+    user_id: uuid.UUID
+    instrument_id: uuid.UUID
+    ledger_amount: Decimal
+    ledger_locked: Decimal
+    db_amount: Decimal
+    db_locked: Decimal
+
+
+class BalanceLedger:
+    def __init__(self, flush_interval: float = 0.05):
+        self.flush_interval = flush_interval
+        self.quote_instrument_id: Optional[uuid.UUID] = None
+        self.entries: Dict[BalanceKey, LedgerEntry] = {}
+        # Изменения, которые ещё не записаны в balances (только блокировки при приёме заявок)
+        self._pending: Dict[BalanceKey, List[Decimal]] = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        # В процессе-воркере расчёты не применяются локально, а пересылаются в журнал API-процесса
+        self.forward: Optional[Callable[[Dict[BalanceKey, List[Decimal]]], None]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.quote_instrument_id is not None
+
+    def entry(self, user_id: uuid.UUID, instrument_id: uuid.UUID) -> LedgerEntry:
+        entry = self.entries.get((user_id, instrument_id))
+        if entry is None:
+            entry = self.entries[(user_id, instrument_id)] = LedgerEntry()
+        return entry
+
+    def available(self, user_id: uuid.UUID, instrument_id: uuid.UUID) -> Decimal:
+        entry = self.entries.get((user_id, instrument_id))
+        return entry.available if entry is not None else Decimal(0)
+
+    def reserve(self, user_id: uuid.UUID, instrument_id: uuid.UUID, required: Decimal, locked: Decimal) -> bool:
+        # Проверка и блокировка без await между ними — атомарны в пределах цикла событий
+        entry = self.entry(user_id, instrument_id)
+        if entry.available < required or entry.available <= 0:
+            return False
+
+        if locked:
+            self.adjust(user_id, instrument_id, 0, locked, persist=True)
+        return True
+
+    def adjust(self, user_id: uuid.UUID, instrument_id: uuid.UUID, amount, locked, persist: bool = False) -> None:
+        entry = self.entry(user_id, instrument_id)
+        entry.amount += amount
+        entry.locked += locked
+
+        if persist:
+            pending = self._pending[(user_id, instrument_id)]
+            pending[0] += amount
+            pending[1] += locked
+
+    def apply_settlement(self, settlement: Settlement) -> None:
+        # Каждый расчёт воркера (цикл, восстановление, сведение стакана при загрузке) доходит до API-процесса
+        if self.forward is not None:
+            if settlement.balance_deltas:
+                self.forward(dict(settlement.balance_deltas))
+            return
+
+        self.apply_deltas(settlement.balance_deltas)
+
+    def apply_deltas(self, deltas: Dict[BalanceKey, List[Decimal]]) -> None:
+        # Расчёты уже записаны в базу вместе со сделками — в памяти они только отражаются
+        if not self.loaded:
+            return
+
+        for (user_id, instrument_id), (amount, locked) in deltas.items():
+            self.adjust(user_id, instrument_id, amount, locked)
+
+    async def remove_instrument(self, instrument_id: uuid.UUID, quote_locks: Dict[uuid.UUID, Decimal]) -> None:
+        # Балансы инструмента удалены из базы вместе с ним; несохранённая дельта по ним не прошла бы внешний ключ
+        # и возвращалась бы в каждую следующую пачку. Блокировки под удалённые покупки снимаются с котируемого
+        async with self._flush_lock:
+            for key in [key for key in self.entries if key[1] == instrument_id]:
+                del self.entries[key]
+            for key in [key for key in self._pending if key[1] == instrument_id]:
+                del self._pending[key]
+            for user_id, locked in quote_locks.items():
+                self.adjust(user_id, self.quote_instrument_id, 0, -locked, persist=True)
+
+    async def start(self, db_session: AsyncSession, quote_instrument_id: uuid.UUID) -> None:
+        await self.load(db_session, quote_instrument_id)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+    async def load(self, db_session: AsyncSession, quote_instrument_id: uuid.UUID) -> None:
+        result = await db_session.execute(
+            select(Balance.user_id, Balance.instrument_id, Balance.amount, Balance.locked_amount)
+        )
+        entries = {
+            (user_id, instrument_id): LedgerEntry(Decimal(amount), Decimal(locked_amount))
+            for user_id, instrument_id, amount, locked_amount in result.all()
+        }
+
+        # Сверка при старте: блокировки, не дошедшие до базы до остановки, восстанавливаются по открытым заявкам
+        expected = await self._open_order_locks(db_session, quote_instrument_id)
+        corrections = {}
+        for key in entries.keys() | expected.keys():
+            entry = entries.setdefault(key, LedgerEntry())
+            locked = expected.get(key, Decimal(0))
+            if entry.locked != locked:
+                corrections[key] = [Decimal(0), locked - entry.locked]
+                entry.locked = locked
+
+        if corrections:
+            log.warning("Reconciled locked amounts of %d balances with open orders", len(corrections))
+            await apply_balance_deltas(db_session, corrections)
+            await db_session.commit()
+
+        self.entries = entries
+        self._pending.clear()
+        self.quote_instrument_id = quote_instrument_id
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, defaultdict(lambda: [Decimal(0), Decimal(0)])
+            try:
+                async with session_factory() as db_session:
+                    await apply_balance_deltas(db_session, pending)
+                    await db_session.commit()
+            except Exception:
+                # Не записанные изменения вернутся в очередь и уйдут следующей пачкой
+                for key, (amount, locked) in pending.items():
+                    retry = self._pending[key]
+                    retry[0] += amount
+                    retry[1] += locked
+                raise
+
+    async def check(self, db_session: AsyncSession) -> List[LedgerMismatch]:
+        await self.flush()
+
+        result = await db_session.execute(
+            select(Balance.user_id, Balance.instrument_id, Balance.amount, Balance.locked_amount)
+        )
+        stored = {
+            (user_id, instrument_id): (Decimal(amount), Decimal(locked_amount))
+            for user_id, instrument_id, amount, locked_amount in result.all()
+        }
+
+        mismatches = []
+        keys: Set[BalanceKey] = self.entries.keys() | stored.keys()
+        for user_id, instrument_id in sorted(keys):
+            entry = self.entries.get((user_id, instrument_id), LedgerEntry())
+            amount, locked = stored.get((user_id, instrument_id), (Decimal(0), Decimal(0)))
+            if entry.amount != amount or entry.locked != locked:
+                mismatches.append(LedgerMismatch(
+                    user_id=user_id,
+                    instrument_id=instrument_id,
+                    ledger_amount=entry.amount,
+                    ledger_locked=entry.locked,
+                    db_amount=amount,
+                    db_locked=locked,
+                ))
+        return mismatches
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.warning("Failed to persist balance ledger: %s", e)
+
+    @staticmethod
+    async def _open_order_locks(db_session: AsyncSession, quote_instrument_id: uuid.UUID) -> Dict[BalanceKey, Decimal]:
+        remaining = Order.quantity - Order.filled_quantity
+        result = await db_session.execute(
+            select(Order.user_id, Order.instrument_id, Order.direction,
+                   func.sum(case((Order.direction == Direction.buy, remaining * Order.price), else_=remaining)))
+            .where(Order.status.in_((OrderStatus.new, OrderStatus.partially_filled)),
+                   Order.order_type == OrderType.limit)
+            .group_by(Order.user_id, Order.instrument_id, Order.direction)
+        )
+
+        # Покупка блокирует котируемый инструмент, продажа — сам актив
+        locks: Dict[BalanceKey, Decimal] = defaultdict(Decimal)
+        for user_id, instrument_id, direction, locked in result.all():
+            locks[(user_id, quote_instrument_id if direction == Direction.buy else instrument_id)] += Decimal(locked)
+        return locks
+
+
+balance_ledger = BalanceLedger(config.BALANCE_FLUSH_INTERVAL)
@@ -1,18 +1,21 @@
+from typing import List
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
 from src.balance import service
-from src.balance.schemas import BalanceResponse, BalanceUpdateBody
+from src.balance.schemas import BalanceMismatch, BalanceResponse, BalanceUpdateBody
 from src.core.enums import ApiTags
+from src.core.metrics import TimedRoute
 from src.core.schemas import Ok
-from src.dependencies import get_session
+from src.dependencies import get_read_session, get_session
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/balance", tags=[ApiTags.BALANCE], response_model=BalanceResponse)
-async def get_balances(request: Request = None, db_session: AsyncSession = Depends(get_session)):
+async def get_balances(request: Request = None, db_session: AsyncSession = Depends(get_read_session)):
     return await service.get_balances(request=request, db_session=db_session)
 
 
@@ -23,4 +26,9 @@ async def process_deposit(balance_update_request: BalanceUpdateBody, request: Re
 
 @router.post("/admin/balance/withdraw", tags=[ApiTags.ADMIN, ApiTags.BALANCE], response_model=Ok)
 async def process_withdraw(balance_update_request: BalanceUpdateBody, request: Request = None, db_session: AsyncSession = Depends(get_session)):
-    return await service.create_withdraw(operation_info=balance_update_request, request=request, db_session=db_session)
\ No newline at end of file
+    return await service.create_withdraw(operation_info=balance_update_request, request=request, db_session=db_session)
+
+
+@router.get("/admin/balance/consistency", tags=[ApiTags.ADMIN, ApiTags.BALANCE], response_model=List[BalanceMismatch])
+async def check_balance_consistency(db_session: AsyncSession = Depends(get_session)):
+    return await service.check_balance_consistency(db_session=db_session)
\ No newline at end of file
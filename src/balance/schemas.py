@@ -1,3 +1,4 @@
+from decimal import Decimal
 from typing import Dict
 from uuid import UUID
 
@@ -11,4 +12,13 @@ class BalanceResponse(RootModel[Dict[str, int]]):
 class BalanceUpdateBody(BaseModel):
     user_id: UUID
     ticker: str = Field(example="MEMECOIN")
-    amount: int = Field(gt=0)
\ No newline at end of file
+    amount: int = Field(gt=0)
+
+
+class BalanceMismatch(BaseModel):
+    user_id: UUID
+    ticker: str
+    ledger_amount: Decimal
+    ledger_locked: Decimal
+    db_amount: Decimal
+    db_locked: Decimal
\ No newline at end of file
@@ -1,33 +1,33 @@
+from typing import List
+
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from starlette.requests import Request
 from sqlalchemy import select, update
-from sqlalchemy.exc import IntegrityError, NoResultFound
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
 
-from src.balance.schemas import BalanceResponse, BalanceUpdateBody
+from src.balance.schemas import BalanceMismatch, BalanceResponse, BalanceUpdateBody
 from src.core.schemas import Ok
-from src.dependencies import get_session
-from src.instrument.models import Instrument
+from src.dependencies import get_read_session, get_session
+from src.balance.ledger import balance_ledger
+from src.instrument.registry import instrument_registry
 from src.balance.models import Balance
 
 
-async def get_balances(*, request: Request, db_session: AsyncSession = Depends(get_session)) -> BalanceResponse:
+async def get_balances(*, request: Request, db_session: AsyncSession = Depends(get_read_session)) -> BalanceResponse:
     pass
 
 async def create_deposit(*, operation_info: BalanceUpdateBody, request: Request, db_session: AsyncSession = Depends(get_session)) -> Ok:
-    try:
-        instrument = await db_session.execute(
-            select(Instrument.id).where(Instrument.ticker == operation_info.ticker)
-        )
-        instrument_id = instrument.scalar_one()
-    except NoResultFound:
+    instrument = instrument_registry.get(operation_info.ticker)
+    if instrument is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Instrument with ticker {operation_info.ticker} not found"
         )
+    instrument_id = instrument.id
 
     balance = await db_session.execute(
         select(Balance).where(
@@ -63,50 +63,59 @@ async def create_deposit(*, operation_info: BalanceUpdateBody, request: Request,
             detail="Failed to update balance"
         )
 
+    balance_ledger.adjust(operation_info.user_id, instrument_id, operation_info.amount, 0)
+
     return Ok(success=True)
 
 async def create_withdraw(*, operation_info: BalanceUpdateBody, request: Request, db_session: AsyncSession = Depends(get_session)) -> Ok:
-    try:
-        instrument = await db_session.execute(
-            select(Instrument.id).where(Instrument.ticker == operation_info.ticker)
-        )
-        instrument_id = instrument.scalar_one()
-    except NoResultFound:
+    instrument = instrument_registry.get(operation_info.ticker)
+    if instrument is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Instrument with ticker {operation_info.ticker} not found"
         )
+    instrument_id = instrument.id
 
-    balance = await db_session.execute(
-        select(Balance).where(
-            Balance.user_id == operation_info.user_id,
-            Balance.instrument_id == instrument_id
-        )
-    )
-    balance = balance.scalar_one_or_none()
-
-    if balance is None or balance.amount < operation_info.amount:
+    # Списание сразу уменьшает остаток в журнале балансов: заблокированное под заявки вывести нельзя,
+    # а параллельные заявки уже не увидят выводимую сумму
+    if balance_ledger.available(operation_info.user_id, instrument_id) < operation_info.amount:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Insufficient funds"
         )
-
-    await db_session.execute(
-        update(Balance)
-        .where(
-            Balance.user_id == operation_info.user_id,
-            Balance.instrument_id == instrument_id
-        )
-        .values(amount=Balance.amount - operation_info.amount)
-    )
+    balance_ledger.adjust(operation_info.user_id, instrument_id, -operation_info.amount, 0)
 
     try:
+        await db_session.execute(
+            update(Balance)
+            .where(
+                Balance.user_id == operation_info.user_id,
+                Balance.instrument_id == instrument_id
+            )
+            .values(amount=Balance.amount - operation_info.amount)
+        )
         await db_session.commit()
-    except IntegrityError:
+    except Exception as e:
         await db_session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Failed to update balance"
-        )
+        balance_ledger.adjust(operation_info.user_id, instrument_id, operation_info.amount, 0)
+        if isinstance(e, IntegrityError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to update balance"
+            )
+        raise
+
+    return Ok(success=True)
 
-    return Ok(success=True)
\ No newline at end of file
+async def check_balance_consistency(*, db_session: AsyncSession = Depends(get_session)) -> List[BalanceMismatch]:
+    return [
+        BalanceMismatch(
+            user_id=mismatch.user_id,
+            ticker=instrument_registry.ticker(mismatch.instrument_id) or str(mismatch.instrument_id),
+            ledger_amount=mismatch.ledger_amount,
+            ledger_locked=mismatch.ledger_locked,
+            db_amount=mismatch.db_amount,
+            db_locked=mismatch.db_locked,
+        )
+        for mismatch in await balance_ledger.check(db_session)
+    ]
\ No newline at end of file
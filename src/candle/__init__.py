@@ -0,0 +1 @@
+from .models import Candle
\ No newline at end of file
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import config
+from src.candle.enums import CandleInterval
+from src.candle.models import Candle
+from src.dependencies import session_factory
+from src.order.market_data import BookUpdate, MarketData, market_data
+
+log = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+FLUSH_BATCH_SIZE = 1000
+
+BarKey = Tuple[uuid.UUID, CandleInterval, datetime]
+
+
+def bar_start(timestamp: datetime, interval: CandleInterval) -> datetime:
+    seconds = int((timestamp - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=seconds - seconds % interval.seconds)
+
+
+@dataclass(slots=True)
+class Bar:
+    started_at: datetime
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    volume: Decimal
+    turnover: Decimal
+    trades: int = 1
+
+    def add(self, price: Decimal, quantity: Decimal) -> None:
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += quantity
+        self.turnover += price * quantity
+        self.trades += 1
+
+
+class CandleSeries:
+    def __init__(self, interval: CandleInterval, max_bars: int, covered_since: datetime):
+        self.interval = interval
+        self.bars: Deque[Bar] = deque(maxlen=max_bars)
+        # Все бары, начинающиеся не раньше covered_since, есть в памяти; более ранние читаются из таблицы
+        self.covered_since = covered_since
+
+    def add(self, started_at: datetime, price: Decimal, quantity: Decimal) -> Optional[Bar]:
+        if self.bars and self.bars[-1].started_at == started_at:
+            self.bars[-1].add(price, quantity)
+            return self.bars[-1]
+
+        if self.bars and started_at < self.bars[-1].started_at:
+            # Запоздавшая сделка попадает в свой бар, если он ещё в памяти
+            for bar in reversed(self.bars):
+                if bar.started_at == started_at:
+                    bar.add(price, quantity)
+                    return bar
+            return None
+
+        if len(self.bars) == self.bars.maxlen:
+            self.covered_since = self.bars[0].started_at + timedelta(seconds=self.interval.seconds)
+        bar = Bar(started_at=started_at, open=price, high=price, low=price, close=price, volume=quantity,
+                  turnover=price * quantity)
+        self.bars.append(bar)
+        return bar
+
+    def range(self, since: Optional[datetime], until: Optional[datetime]) -> List[Bar]:
+        return [bar for bar in self.bars
+                if (since is None or bar.started_at >= since) and (until is None or bar.started_at <= until)]
+
+
+class CandleBuilder:
+    def __init__(self, source: MarketData, max_bars: int = 1440, flush_interval: float = 1.0):
+        self.max_bars = max_bars
+        self.flush_interval = flush_interval
+        self.started_at = datetime.utcnow()
+        self.series: Dict[Tuple[uuid.UUID, CandleInterval], CandleSeries] = {}
+        # Бары, изменившиеся с последней записи в таблицу, включая ещё не закрытые
+        self._dirty: Dict[BarKey, Bar] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        source.subscribe(self.on_update)
+
+    def on_update(self, update: BookUpdate) -> None:
+        for fill in update.fills:
+            for interval in CandleInterval:
+                started_at = bar_start(fill.executed_at, interval)
+                bar = self._series(update.instrument_id, interval).add(started_at, fill.price, fill.quantity)
+                if bar is not None:
+                    self._dirty[(update.instrument_id, interval, started_at)] = bar
+
+    def bars(self, instrument_id: uuid.UUID, interval: CandleInterval, since: Optional[datetime] = None,
+             until: Optional[datetime] = None) -> List[Bar]:
+        series = self.series.get((instrument_id, interval))
+        return series.range(since, until) if series is not None else []
+
+    def covered_since(self, instrument_id: uuid.UUID, interval: CandleInterval) -> datetime:
+        series = self.series.get((instrument_id, interval))
+        return series.covered_since if series is not None else bar_start(self.started_at, interval)
+
+    async def remove(self, instrument_id: uuid.UUID) -> None:
+        # Под блокировкой записи: бар удалённого инструмента, вернувшийся после неудачной записи, ломал бы
+        # каждую следующую пачку на внешнем ключе
+        async with self._flush_lock:
+            for interval in CandleInterval:
+                self.series.pop((instrument_id, interval), None)
+            for key in [key for key in self._dirty if key[0] == instrument_id]:
+                del self._dirty[key]
+
+    async def start(self, db_session: AsyncSession) -> None:
+        await self.load(db_session)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+    async def load(self, db_session: AsyncSession) -> None:
+        # Незакрытые бары, записанные до остановки, продолжаются с сохранённого состояния
+        self.started_at = now = datetime.utcnow()
+        result = await db_session.execute(
+            select(Candle).where(Candle.started_at >= bar_start(now, CandleInterval.day))
+        )
+        for candle in result.scalars():
+            interval = next((interval for interval in CandleInterval if interval.seconds == candle.interval), None)
+            if interval is None or candle.started_at != bar_start(now, interval):
+                continue
+            series = self._series(candle.instrument_id, interval)
+            if not series.bars:
+                series.bars.append(Bar(
+                    started_at=candle.started_at, open=Decimal(candle.open), high=Decimal(candle.high),
+                    low=Decimal(candle.low), close=Decimal(candle.close), volume=Decimal(candle.volume),
+                    turnover=Decimal(candle.turnover), trades=candle.trades,
+                ))
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            # Строки собираются сразу: бар, изменившийся во время записи, снова попадёт в _dirty
+            pending, self._dirty = self._dirty, {}
+            rows = [
+                {"instrument_id": instrument_id, "interval": interval.seconds, "started_at": started_at,
+                 "open": bar.open, "high": bar.high, "low": bar.low, "close": bar.close, "volume": bar.volume,
+                 "turnover": bar.turnover, "trades": bar.trades}
+                for (instrument_id, interval, started_at), bar in pending.items()
+            ]
+            try:
+                async with session_factory() as db_session:
+                    for i in range(0, len(rows), FLUSH_BATCH_SIZE):
+                        statement = insert(Candle).values(rows[i:i + FLUSH_BATCH_SIZE])
+                        await db_session.execute(statement.on_conflict_do_update(
+                            index_elements=[Candle.instrument_id, Candle.interval, Candle.started_at],
+                            set_={column: statement.excluded[column]
+                                  for column in ("open", "high", "low", "close", "volume", "turnover", "trades")},
+                        ))
+                    await db_session.commit()
+            except Exception:
+                for key, bar in pending.items():
+                    self._dirty.setdefault(key, bar)
+                raise
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.warning("Failed to persist candles: %s", e)
+
+    def _series(self, instrument_id: uuid.UUID, interval: CandleInterval) -> CandleSeries:
+        series = self.series.get((instrument_id, interval))
+        if series is None:
+            series = self.series[(instrument_id, interval)] = CandleSeries(
+                interval, self.max_bars, bar_start(self.started_at, interval)
+            )
+        return series
+
+
+candle_builder = CandleBuilder(market_data, config.CANDLES_MEMORY_BARS, config.CANDLES_FLUSH_INTERVAL)
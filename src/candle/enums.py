@@ -0,0 +1,22 @@
+from enum import Enum
+
+
+class CandleInterval(str, Enum):
+    second = "1s"
+    minute = "1m"
+    five_minutes = "5m"
+    hour = "1h"
+    day = "1d"
+
+    @property
+    def seconds(self) -> int:
+        return INTERVAL_SECONDS[self]
+
+
+INTERVAL_SECONDS = {
+    CandleInterval.second: 1,
+    CandleInterval.minute: 60,
+    CandleInterval.five_minutes: 300,
+    CandleInterval.hour: 3600,
+    CandleInterval.day: 86400,
+}
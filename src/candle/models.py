@@ -0,0 +1,23 @@
+import uuid
+
+from sqlalchemy import ForeignKey, DECIMAL, DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.core.database import Base
+
+
+class Candle(Base):
+    __tablename__ = "candles"
+
+    instrument_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("instruments.id", ondelete="CASCADE"), primary_key=True)
+    # Длительность бара в секундах; первичный ключ служит и индексом для выборки диапазона
+    interval: Mapped[int] = mapped_column(Integer, primary_key=True)
+    started_at: Mapped[DateTime] = mapped_column(DateTime, primary_key=True)
+    open: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
+    high: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
+    low: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
+    close: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
+    volume: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
+    # Сумма цена × количество — для VWAP
+    turnover: Mapped[float] = mapped_column(DECIMAL(28, 8), nullable=False, server_default="0")
+    trades: Mapped[int] = mapped_column(Integer, nullable=False)
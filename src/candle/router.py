@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.candle import service
+from src.candle.enums import CandleInterval
+from src.candle.schemas import Candle, TickerStatistics
+from src.core.enums import ApiTags
+from src.core.metrics import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/public/candles/{ticker}", tags=[ApiTags.PUBLIC], response_model=List[Candle])
+async def get_candles(ticker: str, interval: CandleInterval = CandleInterval.minute, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 0,
+                      request: Request = None, response: Response = None):
+    return await service.get_candles(ticker=ticker, interval=interval, request=request, response=response, since=since,
+                                     until=until, cursor=cursor, limit=limit)
+
+
+@router.get("/public/ticker", tags=[ApiTags.PUBLIC], response_model=List[TickerStatistics])
+async def get_ticker_statistics():
+    return await service.get_ticker_statistics()
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Candle(BaseModel):
+    timestamp: datetime
+    open: int
+    high: int
+    low: int
+    close: int
+    volume: int
+    trades: int
+
+
+class TickerStatistics(BaseModel):
+    ticker: str
+    last: Optional[int]
+    bid: Optional[int]
+    ask: Optional[int]
+    volume: int
+    high: Optional[int]
+    low: Optional[int]
+    vwap: Optional[float]
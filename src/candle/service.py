@@ -0,0 +1,137 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src import config
+from src.candle.builder import EPOCH, Bar, candle_builder
+from src.candle.enums import CandleInterval
+from src.candle.models import Candle as CandleModel
+from src.candle.statistics import market_statistics
+from src.core.pagination import NEXT_CURSOR_HEADER, decode_time_cursor, encode_time_cursor
+from src.core.serialization import dump_json
+from src.dependencies import read_session_factory
+from src.instrument.registry import instrument_registry
+
+
+async def get_candles(*, ticker: str, interval: CandleInterval, request: Request, response: Response,
+                      since: Optional[datetime] = None, until: Optional[datetime] = None, cursor: Optional[str] = None,
+                      limit: int = 0) -> List[dict] | Response:
+    instrument = instrument_registry.get(ticker)
+    if instrument is None:
+        raise HTTPException(status_code=404, detail="Ticker not found")
+
+    limit = min(limit if limit > 0 else config.CANDLES_PAGE_SIZE, config.CANDLES_MAX_PAGE_SIZE)
+    since = decode_time_cursor(cursor) if cursor else _utc(since)
+    until = _utc(until)
+
+    if since is not None:
+        bars = await _bars_since(instrument.id, interval, request, since, until, limit + 1)
+        # С заданным началом отдаются первые limit баров, а продолжение — по курсору со следующего
+        headers = {}
+        if len(bars) > limit:
+            headers[NEXT_CURSOR_HEADER] = encode_time_cursor(bars[limit].started_at)
+            bars = bars[:limit]
+        return _respond([render_candle(bar) for bar in bars], response, headers)
+
+    # Без начала отдаются последние limit баров. Свежие берутся из памяти, из таблицы по первичному ключу
+    # дочитываются только более ранние
+    bars = candle_builder.bars(instrument.id, interval, None, until)[-limit:]
+    covered_since = candle_builder.covered_since(instrument.id, interval)
+    if len(bars) < limit:
+        query = (
+            select(CandleModel)
+            .where(CandleModel.instrument_id == instrument.id, CandleModel.interval == interval.seconds,
+                   CandleModel.started_at < covered_since)
+            .order_by(CandleModel.started_at.desc())
+            .limit(limit - len(bars))
+        )
+        if until is not None:
+            query = query.where(CandleModel.started_at <= until)
+        # Сессия открывается только здесь: запросы, закрытые памятью, базу не трогают
+        async with read_session_factory(request)() as db_session:
+            bars = list(reversed((await db_session.execute(query)).scalars().all())) + bars
+
+    return _respond([render_candle(bar) for bar in bars])
+
+
+async def _bars_since(instrument_id: uuid.UUID, interval: CandleInterval, request: Request, since: datetime,
+                      until: Optional[datetime], count: int) -> List[Bar | CandleModel]:
+    # Первые count баров начиная с since: сначала более ранние из таблицы, затем из памяти
+    bars = []
+    covered_since = candle_builder.covered_since(instrument_id, interval)
+    if since < covered_since:
+        query = (
+            select(CandleModel)
+            .where(CandleModel.instrument_id == instrument_id, CandleModel.interval == interval.seconds,
+                   CandleModel.started_at >= since, CandleModel.started_at < covered_since)
+            .order_by(CandleModel.started_at)
+            .limit(count)
+        )
+        if until is not None:
+            query = query.where(CandleModel.started_at <= until)
+        async with read_session_factory(request)() as db_session:
+            bars = list((await db_session.execute(query)).scalars().all())
+
+    if len(bars) < count:
+        bars += candle_builder.bars(instrument_id, interval, since, until)[:count - len(bars)]
+    return bars
+
+
+async def get_ticker_statistics() -> List[dict] | Response:
+    # Все инструменты одним ответом из статистики, которая обновляется на каждую сделку и изменение стакана
+    now = int((datetime.utcnow() - EPOCH).total_seconds())
+    return _respond([
+        render_statistics(instrument.ticker, market_statistics.snapshot(instrument.id, now))
+        for instrument in instrument_registry.by_ticker.values() if not instrument.delisted
+    ])
+
+
+def _respond(items: List[dict], response: Optional[Response] = None,
+             headers: Optional[Dict[str, str]] = None) -> List[dict] | Response:
+    # Без быстрого пути ответ проверяет и сериализует response_model роута, заголовки добавляются к response
+    if not config.FAST_SERIALIZATION:
+        if headers:
+            response.headers.update(headers)
+        return items
+    return Response(content=dump_json(items), media_type="application/json", headers=headers)
+
+
+def render_statistics(ticker: str, statistics: dict) -> dict:
+    return {
+        "ticker": ticker,
+        "last": _int(statistics["last"]),
+        "bid": _int(statistics["bid"]),
+        "ask": _int(statistics["ask"]),
+        "volume": int(statistics["volume"]),
+        "high": _int(statistics["high"]),
+        "low": _int(statistics["low"]),
+        "vwap": float(statistics["vwap"]) if statistics["vwap"] is not None else None,
+    }
+
+
+def render_candle(bar: Bar | CandleModel) -> dict:
+    return {
+        "timestamp": bar.started_at,
+        "open": int(bar.open),
+        "high": int(bar.high),
+        "low": int(bar.low),
+        "close": int(bar.close),
+        "volume": int(bar.volume),
+        "trades": bar.trades,
+    }
+
+
+def _int(value) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Время сделок хранится в UTC без часового пояса
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,155 @@
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Deque, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.candle.builder import EPOCH
+from src.candle.enums import CandleInterval
+from src.candle.models import Candle
+from src.order.enums import Direction
+from src.order.market_data import BookUpdate, MarketData, market_data
+
+WINDOW_SECONDS = 86400
+BUCKET_SECONDS = CandleInterval.minute.seconds
+
+
+@dataclass(slots=True, eq=False)
+class WindowBucket:
+    started: int
+    volume: Decimal
+    turnover: Decimal
+    high: Decimal
+    low: Decimal
+
+
+class SlidingWindow:
+    def __init__(self, window: int = WINDOW_SECONDS, bucket: int = BUCKET_SECONDS):
+        self.window = window
+        self.bucket = bucket
+        self.buckets: Deque[WindowBucket] = deque()
+        self.volume = Decimal(0)
+        self.turnover = Decimal(0)
+        # Монотонные очереди корзин: максимум и минимум окна всегда в голове, без пересчёта по всем корзинам
+        self._highs: Deque[WindowBucket] = deque()
+        self._lows: Deque[WindowBucket] = deque()
+
+    @property
+    def high(self) -> Optional[Decimal]:
+        return self._highs[0].high if self._highs else None
+
+    @property
+    def low(self) -> Optional[Decimal]:
+        return self._lows[0].low if self._lows else None
+
+    @property
+    def vwap(self) -> Optional[Decimal]:
+        return self.turnover / self.volume if self.volume else None
+
+    def add(self, at: int, volume: Decimal, turnover: Decimal, high: Decimal, low: Decimal) -> None:
+        self.expire(at)
+        started = at - at % self.bucket
+
+        # Запоздавшие сделки учитываются в последней корзине
+        if self.buckets and started <= self.buckets[-1].started:
+            bucket = self.buckets[-1]
+            bucket.volume += volume
+            bucket.turnover += turnover
+            bucket.high, bucket.low = max(bucket.high, high), min(bucket.low, low)
+        else:
+            bucket = WindowBucket(started, volume, turnover, high, low)
+            self.buckets.append(bucket)
+
+        self.volume += volume
+        self.turnover += turnover
+        while self._highs and self._highs[-1].high <= bucket.high:
+            self._highs.pop()
+        self._highs.append(bucket)
+        while self._lows and self._lows[-1].low >= bucket.low:
+            self._lows.pop()
+        self._lows.append(bucket)
+
+    def expire(self, now: int) -> None:
+        while self.buckets and self.buckets[0].started <= now - self.window:
+            bucket = self.buckets.popleft()
+            self.volume -= bucket.volume
+            self.turnover -= bucket.turnover
+            if self._highs and self._highs[0] is bucket:
+                self._highs.popleft()
+            if self._lows and self._lows[0] is bucket:
+                self._lows.popleft()
+
+
+class TickerStatistics:
+    def __init__(self):
+        self.last: Optional[Decimal] = None
+        self.window = SlidingWindow()
+
+
+class MarketStatistics:
+    def __init__(self, source: MarketData):
+        self.source = source
+        self.tickers: Dict[uuid.UUID, TickerStatistics] = {}
+
+        source.subscribe(self.on_update)
+
+    def on_update(self, update: BookUpdate) -> None:
+        if not update.fills:
+            return
+
+        statistics = self._statistics(update.instrument_id)
+        for fill in update.fills:
+            turnover = fill.price * fill.quantity
+            statistics.window.add(_seconds(fill.executed_at), fill.quantity, turnover, fill.price, fill.price)
+        statistics.last = update.fills[-1].price
+
+    def snapshot(self, instrument_id: uuid.UUID, now: int) -> dict:
+        # Лучшие цены берутся из L2-агрегатов, которые уже обновляются на каждое изменение стакана
+        book = self.source.book(instrument_id)
+        bid, ask = book.best(Direction.buy), book.best(Direction.sell)
+
+        statistics = self.tickers.get(instrument_id)
+        if statistics is None:
+            return {"last": None, "bid": bid and bid[0], "ask": ask and ask[0], "volume": 0, "high": None,
+                    "low": None, "vwap": None}
+
+        window = statistics.window
+        window.expire(now)
+        return {"last": statistics.last, "bid": bid and bid[0], "ask": ask and ask[0], "volume": window.volume,
+                "high": window.high, "low": window.low, "vwap": window.vwap}
+
+    def remove(self, instrument_id: uuid.UUID) -> None:
+        self.tickers.pop(instrument_id, None)
+
+    async def load(self, db_session: AsyncSession) -> None:
+        # Окно за последние сутки восстанавливается из минутных свечей, а не агрегатом по trades
+        since = datetime.utcnow() - timedelta(seconds=WINDOW_SECONDS)
+        result = await db_session.execute(
+            select(Candle)
+            .where(Candle.interval == BUCKET_SECONDS, Candle.started_at > since)
+            .order_by(Candle.instrument_id, Candle.started_at)
+        )
+
+        self.tickers.clear()
+        for candle in result.scalars():
+            statistics = self._statistics(candle.instrument_id)
+            statistics.window.add(_seconds(candle.started_at), Decimal(candle.volume), Decimal(candle.turnover),
+                                  Decimal(candle.high), Decimal(candle.low))
+            statistics.last = Decimal(candle.close)
+
+    def _statistics(self, instrument_id: uuid.UUID) -> TickerStatistics:
+        statistics = self.tickers.get(instrument_id)
+        if statistics is None:
+            statistics = self.tickers[instrument_id] = TickerStatistics()
+        return statistics
+
+
+def _seconds(timestamp: datetime) -> int:
+    return int((timestamp - EPOCH).total_seconds())
+
+
+market_statistics = MarketStatistics(market_data)
@@ -31,10 +31,49 @@ DATABASE_PORT = config("DATABASE_PORT", default="5432")
 
 SQLALCHEMY_DATABASE_URI = f"postgresql+asyncpg://{_DATABASE_CREDENTIAL_USER}:{_QUOTED_DATABASE_PASSWORD}@{DATABASE_HOSTNAME}:{DATABASE_PORT}/{DATABASE_NAME}"
 
+# Реплика необязательна: без DATABASE_REPLICA_HOSTNAME чтения идут в основную базу
+DATABASE_REPLICA_HOSTNAME = config("DATABASE_REPLICA_HOSTNAME", default=None)
+DATABASE_REPLICA_PORT = config("DATABASE_REPLICA_PORT", default=DATABASE_PORT)
+DATABASE_REPLICA_STICKY_SECONDS = config("DATABASE_REPLICA_STICKY_SECONDS", cast=float, default=5.0)
+
+SQLALCHEMY_REPLICA_DATABASE_URI = f"postgresql+asyncpg://{_DATABASE_CREDENTIAL_USER}:{_QUOTED_DATABASE_PASSWORD}@{DATABASE_REPLICA_HOSTNAME}:{DATABASE_REPLICA_PORT}/{DATABASE_NAME}" if DATABASE_REPLICA_HOSTNAME else None
+
 DATABASE_ENGINE_MAX_OVERFLOW = config("DATABASE_ENGINE_MAX_OVERFLOW", cast=int, default=10)
 DATABASE_ENGINE_POOL_PING = config("DATABASE_ENGINE_POOL_PING", default=False)
 DATABASE_ENGINE_POOL_RECYCLE = config("DATABASE_ENGINE_POOL_RECYCLE", cast=int, default=3600)
 DATABASE_ENGINE_POOL_SIZE = config("DATABASE_ENGINE_POOL_SIZE", cast=int, default=20)
 DATABASE_ENGINE_POOL_TIMEOUT = config("DATABASE_ENGINE_POOL_TIMEOUT", cast=int, default=30)
 
-SECRET_KEY = config("SECRET_KEY", cast=Secret)
\ No newline at end of file
+SECRET_KEY = config("SECRET_KEY", cast=Secret)
+
+AUTH_CACHE_SIZE = config("AUTH_CACHE_SIZE", cast=int, default=10000)
+AUTH_CACHE_TTL = config("AUTH_CACHE_TTL", cast=float, default=60.0)
+
+BALANCE_FLUSH_INTERVAL = config("BALANCE_FLUSH_INTERVAL", cast=float, default=0.05)
+
+MATCHING_WORKERS = config("MATCHING_WORKERS", cast=int, default=0)
+MATCHING_WORKER_START_TIMEOUT = config("MATCHING_WORKER_START_TIMEOUT", cast=float, default=300.0)
+JOURNAL_DIR = config("JOURNAL_DIR", default=None)
+JOURNAL_GROUP_COMMIT_SIZE = config("JOURNAL_GROUP_COMMIT_SIZE", cast=int, default=64)
+SNAPSHOT_INTERVAL = config("SNAPSHOT_INTERVAL", cast=int, default=10000)
+
+ORDERBOOK_DEPTH = config("ORDERBOOK_DEPTH", cast=int, default=10)
+ORDERBOOK_MAX_DEPTH = config("ORDERBOOK_MAX_DEPTH", cast=int, default=100)
+ORDERS_PAGE_SIZE = config("ORDERS_PAGE_SIZE", cast=int, default=100)
+ORDERS_MAX_PAGE_SIZE = config("ORDERS_MAX_PAGE_SIZE", cast=int, default=1000)
+BULK_ORDER_MAX_SIZE = config("BULK_ORDER_MAX_SIZE", cast=int, default=100)
+MARKET_DATA_MAX_PENDING = config("MARKET_DATA_MAX_PENDING", cast=int, default=1000)
+INSTRUMENTS_RECONNECT_INTERVAL = config("INSTRUMENTS_RECONNECT_INTERVAL", cast=float, default=1.0)
+FAST_SERIALIZATION = config("FAST_SERIALIZATION", cast=bool, default=False)
+
+TRANSACTIONS_PAGE_SIZE = config("TRANSACTIONS_PAGE_SIZE", cast=int, default=100)
+TRANSACTIONS_MAX_PAGE_SIZE = config("TRANSACTIONS_MAX_PAGE_SIZE", cast=int, default=1000)
+TRANSACTIONS_PARTITIONS_AHEAD = config("TRANSACTIONS_PARTITIONS_AHEAD", cast=int, default=3)
+TRANSACTIONS_HOT_MONTHS = config("TRANSACTIONS_HOT_MONTHS", cast=int, default=6)
+TRANSACTIONS_ARCHIVE_DIR = config("TRANSACTIONS_ARCHIVE_DIR", default=None)
+TRANSACTIONS_MAINTENANCE_INTERVAL = config("TRANSACTIONS_MAINTENANCE_INTERVAL", cast=float, default=3600.0)
+
+CANDLES_MEMORY_BARS = config("CANDLES_MEMORY_BARS", cast=int, default=1440)
+CANDLES_FLUSH_INTERVAL = config("CANDLES_FLUSH_INTERVAL", cast=float, default=1.0)
+CANDLES_PAGE_SIZE = config("CANDLES_PAGE_SIZE", cast=int, default=500)
+CANDLES_MAX_PAGE_SIZE = config("CANDLES_MAX_PAGE_SIZE", cast=int, default=1000)
\ No newline at end of file
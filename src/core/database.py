@@ -1,16 +1,63 @@
 import logging
+import time
 
-from sqlalchemy import make_url
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src import config
+from src.core.metrics import metrics, request_timings
 
 log = logging.getLogger(__name__)
 
 Base = declarative_base()
 DbSession = Session
 
+DB_QUERY_SECONDS = metrics.histogram("db_query_duration_seconds", "Database statement round trip time.")
+DB_POOL_WAIT_SECONDS = metrics.histogram("db_pool_checkout_wait_seconds",
+                                         "Time spent waiting for a pooled database connection.")
+
+
+class TimedPool(AsyncAdaptedQueuePool):
+    def connect(self):
+        # Ожидание свободного соединения (или открытия нового) входит в фазу db запроса
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_POOL_WAIT_SECONDS.observe(elapsed)
+            timings = request_timings.get()
+            if timings is not None:
+                timings.db += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    _observe_query(time.perf_counter() - conn.info["query_started"].pop())
+
+
+def _handle_error(context) -> None:
+    # Упавший запрос не доходит до after_cursor_execute — его отметка снимается здесь, время тоже учитывается.
+    # Ошибки подключения и чтения результата приходят без открытой отметки
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        _observe_query(time.perf_counter() - started.pop())
+
+
+def _observe_query(elapsed: float) -> None:
+    DB_QUERY_SECONDS.observe(elapsed)
+
+    timings = request_timings.get()
+    if timings is not None:
+        timings.db += elapsed
+        timings.db_queries += 1
+
+
 def create_db_engine(connection_string: str):
     timeout_kwargs = {
         "pool_timeout": config.DATABASE_ENGINE_POOL_TIMEOUT,
@@ -20,7 +67,22 @@ def create_db_engine(connection_string: str):
         "pool_pre_ping": config.DATABASE_ENGINE_POOL_PING,
     }
 
-    return create_async_engine(make_url(connection_string), **timeout_kwargs)
+    engine = create_async_engine(make_url(connection_string), poolclass=TimedPool, **timeout_kwargs)
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+    return engine
+
+
+db_engine = create_db_engine(config.SQLALCHEMY_DATABASE_URI)
+replica_engine = create_db_engine(
+    config.SQLALCHEMY_REPLICA_DATABASE_URI
+) if config.SQLALCHEMY_REPLICA_DATABASE_URI else None
 
+metrics.gauge("db_pool_connections", "Pooled database connections by state.", labels=("state",),
+              function=lambda: {("checked_out",): db_engine.pool.checkedout(), ("idle",): db_engine.pool.checkedin()})
 
-db_engine = create_db_engine(config.SQLALCHEMY_DATABASE_URI)
\ No newline at end of file
+if replica_engine is not None:
+    metrics.gauge("db_replica_pool_connections", "Pooled read replica connections by state.", labels=("state",),
+                  function=lambda: {("checked_out",): replica_engine.pool.checkedout(),
+                                    ("idle",): replica_engine.pool.checkedin()})
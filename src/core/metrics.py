@@ -0,0 +1,248 @@
+import asyncio
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LabelValues = Tuple[str, ...]
+Forward = Callable[[str, LabelValues, float], None]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        # В процессе-воркере значения не копятся локально, а пересылаются в API-процесс
+        if self.registry.forward is not None:
+            self.registry.forward(self.name, values, amount)
+            return
+        self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labels, values)} {value}" for values, value in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, function: Callable[[], Dict[LabelValues, float]], **kwargs):
+        super().__init__(*args, **kwargs)
+        # Значение снимается в момент выдачи /metrics, на горячем пути ничего не происходит
+        self.function = function
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labels, values)} {value}" for values, value in self.function().items()
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # На ряд: счётчики по корзинам (не накопленные, последняя — +Inf) и сумма значений
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *values: str) -> None:
+        if self.registry.forward is not None:
+            self.registry.forward(self.name, values, value)
+            return
+
+        series = self._series.get(values)
+        if series is None:
+            series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, (counts, total) in self._series.items():
+            cumulative = 0
+            for bucket, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), values + (bucket,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.forward: Optional[Forward] = None
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, function: Callable[[], Dict[LabelValues, float]],
+              labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, documentation, labels, function=function))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labels, buckets=buckets))
+
+    def apply(self, name: str, values: LabelValues, amount: float) -> None:
+        # Значение, пересланное воркером
+        metric = self.metrics[name]
+        if isinstance(metric, Counter):
+            metric.inc(*values, amount=amount)
+        elif isinstance(metric, Histogram):
+            metric.observe(amount, *values)
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        return ("\n".join(lines) + "\n").encode()
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route and status.",
+                                ("method", "route", "status"))
+HTTP_REQUEST_SECONDS = metrics.histogram("http_request_duration_seconds", "HTTP request latency.",
+                                         ("method", "route"))
+HTTP_REQUEST_PHASE_SECONDS = metrics.histogram("http_request_phase_seconds",
+                                               "HTTP request latency by phase: auth, validation, db, serialization.",
+                                               ("route", "phase"))
+HTTP_REQUEST_DB_QUERIES = metrics.histogram("http_request_db_queries", "Database round trips per HTTP request.",
+                                            ("route",), buckets=COUNT_BUCKETS)
+
+
+@dataclass(slots=True)
+class RequestTimings:
+    auth: float = 0.0
+    validation: float = 0.0
+    db: float = 0.0
+    db_queries: int = 0
+    serialization: float = 0.0
+    handler_started: float = 0.0
+    endpoint_finished: float = 0.0
+
+
+# Фазы копятся в объекте текущего запроса; задачи, порождённые внутри запроса, видят тот же объект
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_timings.reset(token)
+
+            # Шаблон пути, а не сам путь: идентификаторы в URL не плодят ряды
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], path, str(status))
+            HTTP_REQUEST_SECONDS.observe(elapsed, scope["method"], path)
+            if route is not None:
+                HTTP_REQUEST_PHASE_SECONDS.observe(timings.auth, path, "auth")
+                HTTP_REQUEST_PHASE_SECONDS.observe(timings.validation, path, "validation")
+                HTTP_REQUEST_PHASE_SECONDS.observe(timings.db, path, "db")
+                HTTP_REQUEST_PHASE_SECONDS.observe(timings.serialization, path, "serialization")
+                HTTP_REQUEST_DB_QUERIES.observe(timings.db_queries, path)
+
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        # До вызова эндпоинта — разбор тела, валидация и зависимости; после — response_model и JSON
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            async def timed_call(**values):
+                timings = request_timings.get()
+                if timings is None:
+                    return await call(**values)
+
+                timings.validation += time.perf_counter() - timings.handler_started
+                try:
+                    return await call(**values)
+                finally:
+                    timings.endpoint_finished = time.perf_counter()
+
+            self.dependant.call = timed_call
+
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            timings = request_timings.get()
+            if timings is None:
+                return await handler(request)
+
+            timings.handler_started = time.perf_counter()
+            response = await handler(request)
+            if timings.endpoint_finished:
+                timings.serialization += time.perf_counter() - timings.endpoint_finished
+            return response
+
+        return timed_handler
@@ -0,0 +1,80 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.responses import StreamingResponse
+
+from src.dependencies import session_factory
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(timestamp: datetime, row_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), uuid.UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_time_cursor(timestamp: datetime) -> str:
+    return base64.urlsafe_b64encode(timestamp.isoformat().encode()).decode()
+
+
+def decode_time_cursor(cursor: str) -> datetime:
+    try:
+        return datetime.fromisoformat(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def keyset_page(db_session: AsyncSession, query: Select, timestamp_column, id_column, limit: int,
+                      cursor: Optional[str] = None) -> Tuple[Select, Dict[str, str]]:
+    # Keyset-пагинация от новых к старым по (timestamp, id): граница страницы ищется по индексу,
+    # поэтому стоимость не зависит от глубины
+    key = tuple_(timestamp_column, id_column)
+    if cursor:
+        query = query.where(key < decode_cursor(cursor))
+
+    boundary = (await db_session.execute(
+        query.with_only_columns(timestamp_column, id_column).offset(limit - 1).limit(2)
+    )).all()
+
+    headers = {}
+    if not boundary:
+        return query.limit(limit), headers
+
+    # Страница ограничивается найденной границей, а не LIMIT: новые строки в голове
+    # не сдвигают её и не приводят к пропускам на следующей странице
+    if len(boundary) > 1:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(*boundary[0])
+    return query.where(key >= tuple(boundary[0])), headers
+
+
+def stream_json_array(query: Select, render: Callable[[Row], bytes], headers: Optional[Dict[str, str]] = None,
+                      factory: async_sessionmaker = session_factory) -> StreamingResponse:
+    return StreamingResponse(_stream_rows(query, render, factory), media_type="application/json", headers=headers)
+
+
+async def _stream_rows(query: Select, render: Callable[[Row], bytes],
+                       factory: async_sessionmaker) -> AsyncIterator[bytes]:
+    # Отдельная сессия: ответ отдаётся уже после выхода из зависимости get_session
+    async with factory() as db_session:
+        rows = await db_session.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+
+        separator = b"["
+        async for row in rows:
+            yield separator + render(row)
+            separator = b","
+
+        yield b"]" if separator == b"," else b"[]"
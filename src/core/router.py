@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from src.core.metrics import CONTENT_TYPE, TimedRoute, metrics
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,11 @@
+from typing import Any
+
+from pydantic import TypeAdapter
+
+# Сериализация целиком в pydantic-core: UUID, datetime, enum и вложенные dict без промежуточных моделей
+# и без повторной валидации через response_model
+_json = TypeAdapter(Any)
+
+
+def dump_json(value: Any) -> bytes:
+    return _json.dump_json(value)
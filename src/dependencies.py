@@ -1,10 +1,72 @@
-from typing import AsyncGenerator
+import time
+import uuid
+from typing import AsyncGenerator, Dict
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.requests import Request
+
+from src import config
+from src.core.database import db_engine, replica_engine
+from src.core.metrics import metrics
+
+READ_PRIMARY_HEADER = "X-Read-Your-Writes"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+RECENT_WRITES_LIMIT = 10000
 
-from src.core.database import db_engine
+DB_READ_SESSIONS = metrics.counter("db_read_sessions_total", "Sessions of read-only routes by target database.",
+                                   ("target",))
 
 session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+# Без реплики фабрики совпадают, и маршрутизация ничего не меняет
+replica_session_factory = async_sessionmaker(
+    replica_engine, class_=AsyncSession, expire_on_commit=False
+) if replica_engine is not None else session_factory
+
+# Пользователь -> момент (time.monotonic), до которого его чтения идут в основную базу
+_recent_writes: Dict[uuid.UUID, float] = {}
+
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with session_factory() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+    if replica_engine is not None and request.method not in SAFE_METHODS:
+        _remember_write(request)
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with read_session_factory(request)() as session:
+        yield session
+
+
+def read_session_factory(request: Request) -> async_sessionmaker:
+    # Чтения уходят на реплику, кроме явного запроса X-Read-Your-Writes и недавних записей того же пользователя
+    primary = replica_engine is None or _reads_from_primary(request)
+    DB_READ_SESSIONS.inc("primary" if primary else "replica")
+    return session_factory if primary else replica_session_factory
+
+
+def session_factory_for(db_session: AsyncSession) -> async_sessionmaker:
+    # Потоковый ответ дочитывает страницу с того же сервера, на котором искалась её граница
+    return replica_session_factory if replica_engine is not None and db_session.bind is replica_engine \
+        else session_factory
+
+
+def _reads_from_primary(request: Request) -> bool:
+    if request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true"):
+        return True
+
+    user = getattr(request.state, "user", None)
+    return user is not None and _recent_writes.get(user.id, 0.0) > time.monotonic()
+
+
+def _remember_write(request: Request) -> None:
+    user = getattr(request.state, "user", None)
+    if user is None:
+        return
+
+    now = time.monotonic()
+    if len(_recent_writes) >= RECENT_WRITES_LIMIT:
+        for user_id in [user_id for user_id, until in _recent_writes.items() if until <= now]:
+            del _recent_writes[user_id]
+    _recent_writes[user.id] = now + config.DATABASE_REPLICA_STICKY_SECONDS
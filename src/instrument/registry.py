@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src import config
+from src.core.database import db_engine
+from src.core.serialization import dump_json
+from src.dependencies import session_factory
+from src.instrument.models import Instrument as InstrumentDAL
+
+log = logging.getLogger(__name__)
+
+INSTRUMENTS_CHANNEL = "instruments_changed"
+
+
+@dataclass(slots=True, frozen=True)
+class InstrumentInfo:
+    id: uuid.UUID
+    ticker: str
+    name: str
+    delisted: bool
+
+
+class InstrumentRegistry:
+    def __init__(self):
+        self.by_ticker: Dict[str, InstrumentInfo] = {}
+        self.by_id: Dict[uuid.UUID, InstrumentInfo] = {}
+        self._connection: Optional[AsyncConnection] = None
+        self._refreshes: Set[asyncio.Task] = set()
+        self._reconnect: Optional[asyncio.Task] = None
+        self._listening = False
+        self._rendered: Optional[bytes] = None
+
+    def get(self, ticker: str) -> Optional[InstrumentInfo]:
+        return self.by_ticker.get(ticker)
+
+    def active(self, ticker: str) -> Optional[InstrumentInfo]:
+        instrument = self.by_ticker.get(ticker)
+        return instrument if instrument is not None and not instrument.delisted else None
+
+    def ticker(self, instrument_id: uuid.UUID) -> Optional[str]:
+        instrument = self.by_id.get(instrument_id)
+        return instrument.ticker if instrument is not None else None
+
+    def ids(self) -> List[uuid.UUID]:
+        return [self.by_ticker[ticker].id for ticker in sorted(self.by_ticker)]
+
+    def listing(self) -> List[dict]:
+        return [{"name": instrument.name, "ticker": instrument.ticker} for instrument in self.by_ticker.values()]
+
+    def render(self) -> bytes:
+        # Список инструментов меняется редко — готовый JSON кэшируется до следующего изменения
+        if self._rendered is None:
+            self._rendered = dump_json(self.listing())
+        return self._rendered
+
+    def put(self, instrument: InstrumentDAL) -> None:
+        self.remove(instrument.ticker)
+        self._rendered = None
+        info = InstrumentInfo(id=instrument.id, ticker=instrument.ticker, name=instrument.name,
+                              delisted=instrument.delisted)
+        self.by_ticker[info.ticker] = info
+        self.by_id[info.id] = info
+
+    def remove(self, ticker: str) -> None:
+        instrument = self.by_ticker.pop(ticker, None)
+        if instrument is not None:
+            self.by_id.pop(instrument.id, None)
+            self._rendered = None
+
+    def replace(self, instruments: Iterable[InstrumentDAL]) -> None:
+        self.by_ticker, self.by_id = {}, {}
+        self._rendered = None
+        for instrument in instruments:
+            self.put(instrument)
+
+    async def load(self, db_session: AsyncSession) -> None:
+        self.replace((await db_session.scalars(select(InstrumentDAL))).all())
+
+    @staticmethod
+    async def notify(db_session: AsyncSession) -> None:
+        # Уведомление уходит при фиксации транзакции — остальные процессы перечитают справочник
+        await db_session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": INSTRUMENTS_CHANNEL})
+
+    async def listen(self) -> None:
+        self._listening = True
+        await self._subscribe()
+
+    async def stop(self) -> None:
+        self._listening = False
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        for task in list(self._refreshes):
+            task.cancel()
+        await self._close()
+
+    async def _subscribe(self) -> None:
+        self._connection = await db_engine.connect()
+        raw_connection = await self._connection.get_raw_connection()
+        await raw_connection.driver_connection.add_listener(INSTRUMENTS_CHANNEL, self._on_notify)
+        raw_connection.driver_connection.add_termination_listener(self._on_terminate)
+
+    async def _subscribed(self) -> bool:
+        if self._connection is None:
+            return False
+        raw_connection = await self._connection.get_raw_connection()
+        return not raw_connection.driver_connection.is_closed()
+
+    async def _close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            await connection.close()
+        except Exception as e:
+            log.debug("Failed to close instrument listener connection: %s", e)
+
+    def _on_terminate(self, connection) -> None:
+        # Закрытие в stop() тоже вызывает слушателя — переподключение только при обрыве
+        if not self._listening or self._reconnect is not None:
+            return
+        log.warning("Instrument listener connection lost, reconnecting")
+        self._reconnect = asyncio.create_task(self._resubscribe())
+
+    async def _resubscribe(self) -> None:
+        # Пока соединения не было, уведомления терялись: после подписки справочник перечитывается целиком
+        try:
+            await self._close()
+            while self._listening:
+                await asyncio.sleep(config.INSTRUMENTS_RECONNECT_INTERVAL)
+                try:
+                    await self._subscribe()
+                    async with session_factory() as db_session:
+                        await self.load(db_session)
+                    # Обрыв во время перечитывания не запускает второго переподключения — проверяется здесь
+                    if await self._subscribed():
+                        log.info("Instrument listener reconnected")
+                        return
+                except Exception as e:
+                    log.warning("Failed to reconnect instrument listener: %s", e)
+                await self._close()
+        finally:
+            self._reconnect = None
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        task = asyncio.create_task(self._refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def _refresh(self) -> None:
+        try:
+            async with session_factory() as db_session:
+                await self.load(db_session)
+        except Exception as e:
+            log.warning("Failed to refresh instrument registry: %s", e)
+
+
+instrument_registry = InstrumentRegistry()
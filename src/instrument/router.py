@@ -5,12 +5,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
 from src.core.enums import ApiTags
+from src.core.metrics import TimedRoute
 from src.core.schemas import Ok
 from src.dependencies import get_session
 from src.instrument import service
 from src.instrument.schemas import Instrument
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/admin/instrument", tags=[ApiTags.ADMIN], response_model=Ok)
@@ -19,8 +20,8 @@ async def add_instrument(add_instrument_request: Instrument, db_session: AsyncSe
 
 
 @router.get("/public/instrument", tags=[ApiTags.PUBLIC], response_model=List[Instrument])
-async def get_instruments(db_session: AsyncSession = Depends(get_session)):
-    return await service.get_instruments(db_session=db_session)
+async def get_instruments():
+    return await service.get_instruments()
 
 
 @router.delete("/admin/instrument/{ticker}", tags=[ApiTags.ADMIN], response_model=Ok)
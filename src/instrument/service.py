@@ -2,19 +2,30 @@ from typing import List
 import re
 import uuid
 
+from decimal import Decimal
+
 from fastapi import Depends, HTTPException
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.status import HTTP_409_CONFLICT, HTTP_422_UNPROCESSABLE_ENTITY
 
+from src import config
+from src.balance.ledger import balance_ledger
+from src.candle.builder import candle_builder
+from src.candle.statistics import market_statistics
 from src.core.schemas import Ok
 from src.dependencies import get_session
 from src.instrument.schemas import Instrument
 from src.instrument.models import Instrument as InstrumentDAL
+from src.instrument.registry import instrument_registry
+from src.order.enums import Direction, OrderStatus, OrderType
+from src.order.market_data import market_data
 from src.order.models import Order as OrderDAL
+from src.order.service import dispatch_drop
 from src.balance.models import Balance as BalanceDAL
-from src.transaction.models import Transaction as TransactionDAL
+from src.transaction.models import Trade as TradeDAL
 
 
 async def add_instrument(*, add_instrument_request: Instrument, db_session: AsyncSession = Depends(get_session)) -> Ok:
@@ -52,21 +63,16 @@ async def add_instrument(*, add_instrument_request: Instrument, db_session: Asyn
     )
 
     db_session.add(new_instrument)
+    await instrument_registry.notify(db_session)
     await db_session.commit()
+    instrument_registry.put(new_instrument)
 
     return Ok(success=True)
 
-async def get_instruments(db_session: AsyncSession = Depends(get_session)) -> List[Instrument]:
-    result = await db_session.execute(select(InstrumentDAL))
-    instruments = result.scalars().all()
-
-    return [
-        Instrument(
-            name=instrument.name,
-            ticker=instrument.ticker
-        )
-        for instrument in instruments
-    ]
+async def get_instruments() -> List[dict] | Response:
+    if not config.FAST_SERIALIZATION:
+        return instrument_registry.listing()
+    return Response(content=instrument_registry.render(), media_type="application/json")
 
 
 async def delete_instrument(*, ticker: str, request: Request, db_session: AsyncSession = Depends(get_session)) -> Ok:
@@ -85,19 +91,47 @@ async def delete_instrument(*, ticker: str, request: Request, db_session: AsyncS
                     "message": f"Instrument with ticker '{ticker}' does not exist."
                 }
             )
+        instrument_id = existing_instrument.id
+
+    # Стакан снимается до удаления строк: новые заявки уже не принимаются, а цикл матчинга в работе
+    # успевает зафиксировать свои сделки и больше не пишет по инструменту
+    instrument_registry.remove(ticker)
+    await dispatch_drop(instrument_id)
+
+    async with db_session.begin():
+        # Котируемый инструмент, заблокированный под удаляемые заявки на покупку, освобождается в журнале балансов
+        quote_locks = (
+            await db_session.execute(
+                select(OrderDAL.user_id, func.sum((OrderDAL.quantity - OrderDAL.filled_quantity) * OrderDAL.price))
+                .where(OrderDAL.instrument_id == instrument_id,
+                       OrderDAL.direction == Direction.buy,
+                       OrderDAL.order_type == OrderType.limit,
+                       OrderDAL.status.in_((OrderStatus.new, OrderStatus.partially_filled)))
+                .group_by(OrderDAL.user_id)
+            )
+        ).all()
+
+        await db_session.execute(
+            delete(OrderDAL).where(OrderDAL.instrument_id == instrument_id)
+        )
 
         await db_session.execute(
-            delete(OrderDAL).where(OrderDAL.instrument_id == existing_instrument.id)
+            delete(BalanceDAL).where(BalanceDAL.instrument_id == instrument_id)
         )
 
         await db_session.execute(
-            delete(BalanceDAL).where(BalanceDAL.instrument_id == existing_instrument.id)
+            delete(TradeDAL).where(TradeDAL.instrument_id == instrument_id)
         )
 
         await db_session.execute(
-            delete(TransactionDAL).where(TransactionDAL.instrument_id == existing_instrument.id)
+            delete(InstrumentDAL).where(InstrumentDAL.id == instrument_id)
         )
+        await instrument_registry.notify(db_session)
 
-        await db_session.delete(existing_instrument)
+    # Остальное состояние инструмента в памяти переживает удаление строк и снимается после него
+    market_data.remove(instrument_id)
+    market_statistics.remove(instrument_id)
+    await candle_builder.remove(instrument_id)
+    await balance_ledger.remove_instrument(instrument_id, {user_id: Decimal(locked) for user_id, locked in quote_locks})
 
     return Ok(success=True)
\ No newline at end of file
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 
 from fastapi import FastAPI, APIRouter
@@ -5,24 +7,55 @@ from fastapi.middleware.cors import CORSMiddleware
 
 
 from src.balance.router import router as balance_router
+from src.candle.builder import candle_builder
+from src.candle.router import router as candle_router
+from src.candle.statistics import market_statistics
+from src.core.metrics import MetricsMiddleware
+from src.core.router import router as metrics_router
+from src.dependencies import session_factory
+from src.instrument.registry import instrument_registry
 from src.instrument.router import router as instrument_router
 from src.order.router import router as order_router
+from src.order.service import start_matching, stop_matching
+from src.transaction.partitions import transaction_partitions
 from src.transaction.router import router as transaction_router
 from src.user.router import router as user_router
 
-app = FastAPI(debug=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with session_factory() as db_session:
+        await instrument_registry.load(db_session)
+        await transaction_partitions.start(db_session)
+        await candle_builder.start(db_session)
+        await market_statistics.load(db_session)
+        await start_matching(db_session)
+    await instrument_registry.listen()
+
+    yield
+
+    await instrument_registry.stop()
+    await stop_matching()
+    await candle_builder.stop()
+    await transaction_partitions.stop()
+
+
+app = FastAPI(debug=True, lifespan=lifespan)
 
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"],)
+app.add_middleware(MetricsMiddleware)
 
 v1_router = APIRouter(prefix="/api/v1")
 
 v1_router.include_router(balance_router)
+v1_router.include_router(candle_router)
 v1_router.include_router(instrument_router)
 v1_router.include_router(order_router)
 v1_router.include_router(transaction_router)
 v1_router.include_router(user_router)
 
 app.include_router(v1_router)
+app.include_router(metrics_router)
 
 
 
@@ -1,4 +1,5 @@
 import logging
+import time
 
 from fastapi import Request, status, HTTPException
 from pydantic import ValidationError
@@ -6,17 +7,38 @@ from starlette.middleware.base import RequestResponseEndpoint
 from starlette.responses import JSONResponse
 from starlette.status import HTTP_401_UNAUTHORIZED
 
+from src.core.metrics import metrics, request_timings
 from src.core.utils import AUTHORIZATION_HEADER_NAME
 from src.dependencies import session_factory
 from src.user.utils import get_user
 
 log = logging.getLogger(__name__)
 
+AUTH_SECONDS = metrics.histogram("auth_duration_seconds", "API key verification time.")
+AUTH_FAILURES = metrics.counter("auth_failures_total", "Rejected API keys.")
+
 
 async def auth_user(request: Request, call_next: RequestResponseEndpoint):
-    if request.url.path.startswith("/api/v1/public") or request.url.path in ["/docs", "/openapi.json", "/favicon.ico", "/"]:
+    if request.url.path.startswith("/api/v1/public") or request.url.path in ["/docs", "/openapi.json", "/favicon.ico", "/", "/metrics"]:
         return await call_next(request)
 
+    started = time.perf_counter()
+    try:
+        await authenticate(request)
+    except HTTPException:
+        AUTH_FAILURES.inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        AUTH_SECONDS.observe(elapsed)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.auth += elapsed
+
+    return await call_next(request)
+
+
+async def authenticate(request: Request) -> None:
     api_key = request.headers.get(AUTHORIZATION_HEADER_NAME)
 
     if not api_key:
@@ -34,8 +56,6 @@ async def auth_user(request: Request, call_next: RequestResponseEndpoint):
         request.state.user = user
         request.state.api_key = api_key
 
-    return await call_next(request)
-
 
 async def catch_exception(request: Request, call_next: RequestResponseEndpoint) -> JSONResponse:
     try:
@@ -0,0 +1,295 @@
+import bisect
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, ROUND_FLOOR
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.order.enums import Direction, OrderType
+
+
+@dataclass(slots=True)
+class BookOrder:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    instrument_id: uuid.UUID
+    direction: Direction
+    price: Optional[Decimal]
+    quantity: Decimal
+    filled_quantity: Decimal = Decimal(0)
+
+    @property
+    def remaining(self) -> Decimal:
+        return self.quantity - self.filled_quantity
+
+
+@dataclass(slots=True, frozen=True)
+class Fill:
+    instrument_id: uuid.UUID
+    buy_order_id: uuid.UUID
+    sell_order_id: uuid.UUID
+    buy_user_id: uuid.UUID
+    sell_user_id: uuid.UUID
+    buy_unlock: Decimal
+    sell_unlock: Decimal
+    price: Decimal
+    quantity: Decimal
+    aggressor: Direction
+    executed_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class PlaceOrder:
+    order: BookOrder
+    order_type: OrderType = OrderType.limit
+    budget: Optional[Decimal] = None
+
+    @property
+    def instrument_id(self) -> uuid.UUID:
+        return self.order.instrument_id
+
+
+@dataclass(slots=True, frozen=True)
+class CancelOrder:
+    instrument_id: uuid.UUID
+    order_id: uuid.UUID
+
+
+Command = PlaceOrder | CancelOrder
+
+
+@dataclass(slots=True)
+class CommandResult:
+    fills: List[Fill] = field(default_factory=list)
+    released: Optional[BookOrder] = None
+    unlock: Decimal = Decimal(0)
+
+
+@dataclass(slots=True, frozen=True)
+class LevelUpdate:
+    direction: Direction
+    price: Decimal
+    quantity: Decimal
+
+
+class PriceLevel:
+    __slots__ = ("price", "orders", "quantity")
+
+    def __init__(self, price: Decimal):
+        self.price = price
+        self.orders: OrderedDict[uuid.UUID, BookOrder] = OrderedDict()
+        self.quantity = Decimal(0)
+
+    def head(self) -> BookOrder:
+        return next(iter(self.orders.values()))
+
+    def append(self, order: BookOrder) -> None:
+        self.orders[order.id] = order
+        self.quantity += order.remaining
+
+    def remove(self, order_id: uuid.UUID) -> BookOrder:
+        order = self.orders.pop(order_id)
+        self.quantity -= order.remaining
+        return order
+
+
+class BookSide:
+    def __init__(self, direction: Direction):
+        self.direction = direction
+        self.levels: Dict[Decimal, PriceLevel] = {}
+        self._prices: List[Decimal] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._prices)
+
+    def best(self) -> Optional[PriceLevel]:
+        if not self._prices:
+            return None
+        return self.levels[self._prices[-1] if self.direction == Direction.buy else self._prices[0]]
+
+    def depth(self) -> Iterator[PriceLevel]:
+        prices = reversed(self._prices) if self.direction == Direction.buy else iter(self._prices)
+        return (self.levels[price] for price in prices)
+
+    def add(self, order: BookOrder) -> PriceLevel:
+        level = self.levels.get(order.price)
+        if level is None:
+            level = self.levels[order.price] = PriceLevel(order.price)
+            bisect.insort(self._prices, order.price)
+        level.append(order)
+        return level
+
+    def remove(self, order: BookOrder) -> PriceLevel:
+        level = self.levels[order.price]
+        level.remove(order.id)
+        if not level.orders:
+            self.discard(level.price)
+        return level
+
+    def discard(self, price: Decimal) -> None:
+        del self.levels[price]
+        del self._prices[bisect.bisect_left(self._prices, price)]
+
+
+class OrderBook:
+    def __init__(self, instrument_id: uuid.UUID):
+        self.instrument_id = instrument_id
+        self.bids = BookSide(Direction.buy)
+        self.asks = BookSide(Direction.sell)
+        self.orders: Dict[uuid.UUID, BookOrder] = {}
+        self.version = 0
+        self._touched: Set[Tuple[Direction, Decimal]] = set()
+
+    def side(self, direction: Direction) -> BookSide:
+        return self.bids if direction == Direction.buy else self.asks
+
+    def opposite(self, direction: Direction) -> BookSide:
+        return self.asks if direction == Direction.buy else self.bids
+
+    def add(self, order: BookOrder) -> None:
+        self.side(order.direction).add(order)
+        self.orders[order.id] = order
+        self._touched.add((order.direction, order.price))
+
+    def resting(self) -> Iterator[BookOrder]:
+        for side in (self.bids, self.asks):
+            for level in side.depth():
+                yield from level.orders.values()
+
+    def cancel(self, order_id: uuid.UUID) -> Optional[BookOrder]:
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self.side(order.direction).remove(order)
+            self._touched.add((order.direction, order.price))
+        return order
+
+    def levels(self) -> List[LevelUpdate]:
+        return [
+            LevelUpdate(direction=side.direction, price=level.price, quantity=level.quantity)
+            for side in (self.bids, self.asks)
+            for level in side.depth()
+        ]
+
+    def flush_changes(self) -> List[LevelUpdate]:
+        # Итоговые объёмы затронутых с прошлого вызова уровней; 0 — уровень исчез
+        changes = []
+        for direction, price in self._touched:
+            level = self.side(direction).levels.get(price)
+            changes.append(LevelUpdate(direction=direction, price=price,
+                                       quantity=level.quantity if level is not None else Decimal(0)))
+
+        self._touched.clear()
+        if changes:
+            self.version += 1
+        return changes
+
+    def match(self, order: BookOrder, limit_price: Optional[Decimal] = None, budget: Optional[Decimal] = None,
+              locked: bool = True) -> List[Fill]:
+        # budget ограничивает рыночную заявку: деньги для покупки, количество актива для продажи
+        fills = []
+        opposite = self.opposite(order.direction)
+        executed_at = datetime.utcnow()
+
+        while order.remaining > 0:
+            level = opposite.best()
+            if level is None:
+                break
+            if limit_price is not None and (
+                    level.price > limit_price if order.direction == Direction.buy else level.price < limit_price):
+                break
+
+            maker = level.head()
+            trade_qty = min(order.remaining, maker.remaining)
+            if budget is not None:
+                affordable = budget if order.direction == Direction.sell else \
+                    (budget / level.price).to_integral_value(rounding=ROUND_FLOOR)
+                trade_qty = min(trade_qty, affordable)
+                if trade_qty <= 0:
+                    break
+                budget -= trade_qty if order.direction == Direction.sell else trade_qty * level.price
+
+            order.filled_quantity += trade_qty
+            maker.filled_quantity += trade_qty
+            level.quantity -= trade_qty
+            self._touched.add((maker.direction, level.price))
+
+            buy, sell = (order, maker) if order.direction == Direction.buy else (maker, order)
+            fills.append(Fill(
+                instrument_id=self.instrument_id,
+                buy_order_id=buy.id,
+                sell_order_id=sell.id,
+                buy_user_id=buy.user_id,
+                sell_user_id=sell.user_id,
+                buy_unlock=trade_qty * buy.price if buy is maker or locked else Decimal(0),
+                sell_unlock=trade_qty if sell is maker or locked else Decimal(0),
+                price=maker.price,
+                quantity=trade_qty,
+                aggressor=order.direction,
+                executed_at=executed_at,
+            ))
+
+            if maker.remaining == 0:
+                level.orders.popitem(last=False)
+                del self.orders[maker.id]
+                if not level.orders:
+                    opposite.discard(level.price)
+
+        return fills
+
+    def submit(self, order: BookOrder) -> List[Fill]:
+        fills = self.match(order, limit_price=order.price)
+        if order.remaining > 0:
+            self.add(order)
+        return fills
+
+
+class MatchingEngine:
+    def __init__(self):
+        self.books: Dict[uuid.UUID, OrderBook] = {}
+
+    def book(self, instrument_id: uuid.UUID) -> OrderBook:
+        book = self.books.get(instrument_id)
+        if book is None:
+            book = self.books[instrument_id] = OrderBook(instrument_id)
+        return book
+
+    def submit(self, order: BookOrder) -> List[Fill]:
+        return self.book(order.instrument_id).submit(order)
+
+    def cancel(self, instrument_id: uuid.UUID, order_id: uuid.UUID) -> Optional[BookOrder]:
+        book = self.books.get(instrument_id)
+        return book.cancel(order_id) if book is not None else None
+
+    def execute(self, command: Command) -> CommandResult:
+        if isinstance(command, CancelOrder):
+            order = self.cancel(command.instrument_id, command.order_id)
+            if order is None:
+                return CommandResult()
+            return CommandResult(released=order, unlock=order.remaining * order.price
+                                 if order.direction == Direction.buy else order.remaining)
+
+        order = command.order
+        book = self.book(order.instrument_id)
+        if command.order_type == OrderType.limit:
+            return CommandResult(fills=book.submit(order))
+
+        # Рыночная заявка проходит по всем уровням за один раз, ничего не блокирует и не остаётся в стакане
+        fills = book.match(order, limit_price=order.price, budget=command.budget, locked=False)
+        return CommandResult(fills=fills, released=order if order.remaining > 0 else None)
+
+    def load(self, orders: Iterable[BookOrder], instrument_id: Optional[uuid.UUID] = None) -> List[Fill]:
+        if instrument_id is None:
+            self.books.clear()
+        else:
+            self.books.pop(instrument_id, None)
+
+        # Заявки проходят через submit в порядке создания: пересечённые в базе заявки исполняются друг против друга,
+        # и стакан после загрузки не бывает пересечён
+        fills = []
+        for order in orders:
+            fills.extend(self.submit(order))
+        return fills
+
+
+matching_engine = MatchingEngine()
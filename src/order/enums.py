@@ -16,3 +16,8 @@ class OrderStatus(str, Enum):
 class OrderType(str, Enum):
     market = "MARKET"
     limit = "LIMIT"
+
+
+class OrderEventType(str, Enum):
+    placed = "PLACED"
+    canceled = "CANCELED"
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from decimal import Decimal
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from src import config
+from src.order.enums import Direction
+from src.order.market_data import BookUpdate, MarketData, market_data
+
+log = logging.getLogger(__name__)
+
+TickerResolver = Callable[[str], Awaitable[Optional[uuid.UUID]]]
+
+
+def _dumps(payload: dict) -> str:
+    return json.dumps(payload, separators=(",", ":"), default=lambda value: float(value) if isinstance(value, Decimal)
+                      else str(value))
+
+
+class Subscriber:
+    def __init__(self, websocket: WebSocket, max_pending: int):
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.instruments: Set[uuid.UUID] = set()
+        self.pending: Deque[str] = deque()
+        self.resync: Set[uuid.UUID] = set()
+        self.wakeup = asyncio.Event()
+
+    def push(self, instrument_id: uuid.UUID, message: str) -> None:
+        if instrument_id in self.resync:
+            return
+
+        if len(self.pending) >= self.max_pending:
+            # Медленный клиент: вместо бесконечного буфера дельт он получит свежие снимки
+            self.pending.clear()
+            self.resync |= self.instruments
+        else:
+            self.pending.append(message)
+        self.wakeup.set()
+
+    def request_snapshot(self, instrument_id: uuid.UUID) -> None:
+        self.resync.add(instrument_id)
+        self.wakeup.set()
+
+
+class MarketDataFeed:
+    def __init__(self, source: MarketData, max_pending: int = 1000):
+        self.source = source
+        self.max_pending = max_pending
+        self.subscribers: Dict[uuid.UUID, Set[Subscriber]] = {}
+        self.tickers: Dict[uuid.UUID, str] = {}
+
+        source.subscribe(self.on_update)
+
+    def on_update(self, update: BookUpdate) -> None:
+        subscribers = self.subscribers.get(update.instrument_id)
+        if not subscribers:
+            return
+
+        # Сообщение сериализуется один раз и раздаётся всем подписчикам инструмента
+        if update.reset:
+            message = self.snapshot(update.instrument_id)
+        else:
+            message = _dumps({
+                "type": "update",
+                "ticker": self.tickers[update.instrument_id],
+                "seq": self.source.book(update.instrument_id).version,
+                "bids": [[level.price, level.quantity] for level in update.levels if level.direction == Direction.buy],
+                "asks": [[level.price, level.quantity] for level in update.levels if level.direction == Direction.sell],
+                "trades": [
+                    {"price": fill.price, "qty": fill.quantity, "side": fill.aggressor.value,
+                     "timestamp": fill.executed_at.isoformat()}
+                    for fill in update.fills
+                ],
+            })
+
+        for subscriber in subscribers:
+            subscriber.push(update.instrument_id, message)
+
+    def snapshot(self, instrument_id: uuid.UUID) -> str:
+        book = self.source.book(instrument_id)
+        return _dumps({
+            "type": "snapshot",
+            "ticker": self.tickers[instrument_id],
+            "seq": book.version,
+            "bids": book.depth(Direction.buy),
+            "asks": book.depth(Direction.sell),
+        })
+
+    async def serve(self, websocket: WebSocket, resolve_ticker: TickerResolver) -> None:
+        await websocket.accept()
+        subscriber = Subscriber(websocket, self.max_pending)
+        writer = asyncio.create_task(self._write(subscriber))
+
+        try:
+            while True:
+                try:
+                    message = await websocket.receive_json()
+                    op, ticker = message.get("op"), message.get("ticker")
+                except (ValueError, AttributeError):
+                    # Неразборчивое сообщение не обрывает соединение: клиент получает ошибку и может продолжать
+                    await websocket.send_text(_dumps({
+                        "type": "error", "ticker": None, "detail": "Message must be a JSON object"
+                    }))
+                    continue
+
+                instrument_id = await resolve_ticker(ticker) if isinstance(ticker, str) else None
+                if instrument_id is None:
+                    await websocket.send_text(_dumps({
+                        "type": "error", "ticker": ticker, "detail": "Ticker not found or delisted"
+                    }))
+                    continue
+
+                if op in ("subscribe", "resync"):
+                    self.tickers[instrument_id] = ticker
+                    self.subscribers.setdefault(instrument_id, set()).add(subscriber)
+                    subscriber.instruments.add(instrument_id)
+                    subscriber.request_snapshot(instrument_id)
+                elif op == "unsubscribe":
+                    self._unsubscribe(subscriber, instrument_id)
+                else:
+                    await websocket.send_text(_dumps({
+                        "type": "error", "ticker": ticker, "detail": f"Unknown op {op!r}"
+                    }))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for instrument_id in list(subscriber.instruments):
+                self._unsubscribe(subscriber, instrument_id)
+            writer.cancel()
+
+    def _unsubscribe(self, subscriber: Subscriber, instrument_id: uuid.UUID) -> None:
+        subscriber.instruments.discard(instrument_id)
+        subscriber.resync.discard(instrument_id)
+
+        subscribers = self.subscribers.get(instrument_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[instrument_id]
+
+    async def _write(self, subscriber: Subscriber) -> None:
+        try:
+            while True:
+                await subscriber.wakeup.wait()
+                subscriber.wakeup.clear()
+
+                # Снимки сериализуются сразу, чтобы последующие дельты гарантированно имели больший seq
+                snapshots = [self.snapshot(instrument_id) for instrument_id in subscriber.resync
+                             if instrument_id in subscriber.instruments]
+                subscriber.resync.clear()
+
+                for message in snapshots:
+                    await subscriber.websocket.send_text(message)
+                while subscriber.pending:
+                    await subscriber.websocket.send_text(subscriber.pending.popleft())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.debug("Market data subscriber dropped: %s", e)
+
+
+market_data_feed = MarketDataFeed(market_data, config.MARKET_DATA_MAX_PENDING)
@@ -0,0 +1,207 @@
+import os
+import pickle
+import struct
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.order.engine import BookOrder, Command, OrderBook
+
+RECORD_HEADER = struct.Struct(">QII")  # sequence, payload length, crc32
+SNAPSHOT_HEADER = struct.Struct(">QdII")  # sequence, taken at (unix time), payload length, crc32
+
+
+@dataclass(slots=True)
+class BookSnapshot:
+    sequence: int
+    taken_at: datetime
+    orders: List[BookOrder]
+
+
+class Journal:
+    def __init__(self, path: str, group_commit_size: int = 64):
+        self.path = path
+        self.group_commit_size = max(1, group_commit_size)
+        self.sequence = 0
+        self.records = 0
+        self._file: Optional[BinaryIO] = None
+
+    def open(self, sequence: int = 0) -> None:
+        self.sequence = sequence
+        valid_length = 0
+
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as file:
+                for record_sequence, _, end in self._scan(file):
+                    self.sequence = max(self.sequence, record_sequence)
+                    self.records += 1
+                    valid_length = end
+
+        self._file = open(self.path, "ab")
+        # Обрезаем недописанную при сбое запись
+        self._file.truncate(valid_length)
+
+    def read(self, after: int = 0) -> Iterator[Tuple[int, Command]]:
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as file:
+            for sequence, payload, _ in self._scan(file):
+                if sequence > after:
+                    yield sequence, pickle.loads(payload)
+
+    def append(self, commands: Iterable[Command]) -> int:
+        pending = 0
+
+        for command in commands:
+            self.sequence += 1
+            payload = pickle.dumps(command, protocol=pickle.HIGHEST_PROTOCOL)
+            self._file.write(RECORD_HEADER.pack(self.sequence, len(payload), zlib.crc32(payload)))
+            self._file.write(payload)
+            self.records += 1
+
+            pending += 1
+            if pending >= self.group_commit_size:
+                self.sync()
+                pending = 0
+
+        if pending:
+            self.sync()
+
+        return self.sequence
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def reset(self) -> None:
+        self._file.truncate(0)
+        self.sync()
+        self.records = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _scan(file: BinaryIO) -> Iterator[Tuple[int, bytes, int]]:
+        while True:
+            header = file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+
+            sequence, length, crc = RECORD_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+
+            yield sequence, payload, file.tell()
+
+
+class JournalStore:
+    def __init__(self, directory: str, group_commit_size: int = 64, snapshot_interval: int = 10000):
+        self.directory = directory
+        self.group_commit_size = group_commit_size
+        self.snapshot_interval = snapshot_interval
+        self._journals: Dict[uuid.UUID, Journal] = {}
+
+        os.makedirs(directory, exist_ok=True)
+
+    def journal(self, instrument_id: uuid.UUID, sequence: int = 0) -> Journal:
+        journal = self._journals.get(instrument_id)
+        if journal is None:
+            journal = self._journals[instrument_id] = Journal(
+                os.path.join(self.directory, f"{instrument_id}.journal"), self.group_commit_size
+            )
+            journal.open(sequence)
+        return journal
+
+    def needs_snapshot(self, instrument_id: uuid.UUID) -> bool:
+        journal = self._journals.get(instrument_id)
+        return journal is not None and journal.records >= self.snapshot_interval
+
+    def load_snapshot(self, instrument_id: uuid.UUID) -> Optional[BookSnapshot]:
+        path = self._snapshot_path(instrument_id)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as file:
+            header = file.read(SNAPSHOT_HEADER.size)
+            if len(header) < SNAPSHOT_HEADER.size:
+                return None
+
+            sequence, taken_at, length, crc = SNAPSHOT_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return None
+
+        return BookSnapshot(
+            sequence=sequence,
+            taken_at=datetime.utcfromtimestamp(taken_at),
+            orders=[
+                BookOrder(
+                    id=uuid.UUID(bytes=order_id),
+                    user_id=uuid.UUID(bytes=user_id),
+                    instrument_id=instrument_id,
+                    direction=direction,
+                    price=price,
+                    quantity=quantity,
+                    filled_quantity=filled_quantity,
+                )
+                for order_id, user_id, direction, price, quantity, filled_quantity in pickle.loads(payload)
+            ],
+        )
+
+    @staticmethod
+    def dump(book: OrderBook) -> bytes:
+        return pickle.dumps(
+            [
+                (order.id.bytes, order.user_id.bytes, order.direction, order.price, order.quantity,
+                 order.filled_quantity)
+                for order in book.resting()
+            ],
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+    def write_snapshot(self, instrument_id: uuid.UUID, sequence: int, payload: bytes) -> None:
+        path = self._snapshot_path(instrument_id)
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, "wb") as file:
+            file.write(SNAPSHOT_HEADER.pack(sequence, time.time(), len(payload), zlib.crc32(payload)))
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(tmp_path, path)
+        self._sync_directory()
+
+        # Всё, что попало в журнал до снимка, больше не нужно для восстановления
+        self.journal(instrument_id, sequence).reset()
+
+    def remove(self, instrument_id: uuid.UUID) -> None:
+        journal = self._journals.pop(instrument_id, None)
+        if journal is not None:
+            journal.close()
+        for path in (os.path.join(self.directory, f"{instrument_id}.journal"), self._snapshot_path(instrument_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self) -> None:
+        for journal in self._journals.values():
+            journal.close()
+        self._journals.clear()
+
+    def _snapshot_path(self, instrument_id: uuid.UUID) -> str:
+        return os.path.join(self.directory, f"{instrument_id}.snapshot")
+
+    def _sync_directory(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
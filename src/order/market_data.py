@@ -0,0 +1,107 @@
+import bisect
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.order.engine import Fill, LevelUpdate
+from src.order.enums import Direction
+from src.order.schemas import L2OrderBook, Level
+
+
+@dataclass(slots=True, frozen=True)
+class BookUpdate:
+    instrument_id: uuid.UUID
+    version: int
+    levels: List[LevelUpdate]
+    fills: List[Fill] = field(default_factory=list)
+    reset: bool = False
+
+
+class L2Book:
+    def __init__(self):
+        self.version = 0
+        self.source_version = 0
+        self._levels: Dict[Direction, Dict[Decimal, Decimal]] = {Direction.buy: {}, Direction.sell: {}}
+        self._prices: Dict[Direction, List[Decimal]] = {Direction.buy: [], Direction.sell: []}
+        self._rendered: Dict[int, bytes] = {}
+
+    def apply(self, update: BookUpdate) -> bool:
+        if update.reset:
+            for direction in (Direction.buy, Direction.sell):
+                self._levels[direction].clear()
+                self._prices[direction].clear()
+        elif update.version <= self.source_version:
+            return False
+
+        for level in update.levels:
+            levels, prices = self._levels[level.direction], self._prices[level.direction]
+            if level.quantity > 0:
+                if level.price not in levels:
+                    bisect.insort(prices, level.price)
+                levels[level.price] = level.quantity
+            elif level.price in levels:
+                del levels[level.price]
+                del prices[bisect.bisect_left(prices, level.price)]
+
+        self.source_version = update.version
+        self.version += 1
+        self._rendered.clear()
+        return True
+
+    def best(self, direction: Direction) -> Optional[Tuple[Decimal, Decimal]]:
+        prices = self._prices[direction]
+        if not prices:
+            return None
+        price = prices[-1] if direction == Direction.buy else prices[0]
+        return price, self._levels[direction][price]
+
+    def depth(self, direction: Direction, depth: Optional[int] = None) -> List[Tuple[Decimal, Decimal]]:
+        prices = self._prices[direction]
+        if depth is None:
+            depth = len(prices)
+        best_first = prices[:-depth - 1:-1] if direction == Direction.buy else prices[:depth]
+        return [(price, self._levels[direction][price]) for price in best_first]
+
+    def render(self, depth: int) -> bytes:
+        rendered = self._rendered.get(depth)
+        if rendered is None:
+            rendered = self._rendered[depth] = L2OrderBook(
+                bid_levels=[Level(price=int(price), qty=int(qty)) for price, qty in self.depth(Direction.buy, depth)],
+                ask_levels=[Level(price=int(price), qty=int(qty)) for price, qty in self.depth(Direction.sell, depth)],
+            ).model_dump_json().encode()
+        return rendered
+
+
+class MarketData:
+    def __init__(self):
+        self.books: Dict[uuid.UUID, L2Book] = {}
+        # В процессе-воркере обновления не применяются локально, а пересылаются в API-процесс
+        self.forward: Optional[Callable[[BookUpdate], None]] = None
+        self._listeners: List[Callable[[BookUpdate], None]] = []
+
+    def book(self, instrument_id: uuid.UUID) -> L2Book:
+        book = self.books.get(instrument_id)
+        if book is None:
+            book = self.books[instrument_id] = L2Book()
+        return book
+
+    def remove(self, instrument_id: uuid.UUID) -> None:
+        self.books.pop(instrument_id, None)
+
+    def subscribe(self, listener: Callable[[BookUpdate], None]) -> None:
+        self._listeners.append(listener)
+
+    def publish(self, update: BookUpdate) -> None:
+        if self.forward is not None:
+            self.forward(update)
+            return
+
+        if not self.book(update.instrument_id).apply(update):
+            return
+
+        for listener in self._listeners:
+            listener(update)
+
+
+market_data = MarketData()
@@ -1,11 +1,11 @@
 import uuid
 
-from sqlalchemy import ForeignKey, Enum, Index, DECIMAL, DateTime, func
+from sqlalchemy import ForeignKey, Enum, Index, DECIMAL, DateTime, BigInteger, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core.database import Base
-from src.order.enums import Direction, OrderStatus, OrderType
+from src.order.enums import Direction, OrderEventType, OrderStatus, OrderType
 
 
 class Order(Base):
@@ -24,5 +24,34 @@ class Order(Base):
     updated_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
     __table_args__ = (
-        Index("ix_orders_user_id", "user_id"),
-    )
\ No newline at end of file
+        Index("ix_orders_user_id_created_at", user_id, created_at.desc(), id.desc()),
+        Index(
+            "ix_orders_open_instrument_id_created_at",
+            "instrument_id", "created_at",
+            postgresql_where=text("status IN ('new', 'partially_filled')"),
+        ),
+    )
+
+
+class OrderEvent(Base):
+    __tablename__ = "order_events"
+
+    # Журнал только дописывается; сделки по заявке лежат в trades
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    order_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    event: Mapped[OrderEventType] = mapped_column(Enum(OrderEventType), nullable=False)
+    quantity: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
+    price: Mapped[float | None] = mapped_column(DECIMAL(20, 8), nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index("ix_order_events_order_id", order_id, id),
+    )
+
+
+class MatchingCheckpoint(Base):
+    __tablename__ = "matching_checkpoints"
+
+    instrument_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("instruments.id", ondelete="CASCADE"), primary_key=True)
+    sequence: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
\ No newline at end of file
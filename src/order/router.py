@@ -1,17 +1,21 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, WebSocket
 from pydantic import UUID4
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
 from src.core.enums import ApiTags
+from src.core.metrics import TimedRoute
 from src.core.schemas import Ok
-from src.dependencies import get_session
+from src.dependencies import get_read_session, get_session
 from src.order import service
-from src.order.schemas import CreateOrderResponse, LimitOrderBody, LimitOrder, MarketOrder, L2OrderBook, MarketOrderBody
+from src.order.enums import OrderStatus
+from src.order.schemas import (BulkCancelBody, BulkLimitOrderBody, BulkOrderResult, CreateOrderResponse, LimitOrderBody,
+                               LimitOrder, MarketOrder, L2OrderBook, MarketOrderBody)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/order", tags=[ApiTags.ORDER], response_model=CreateOrderResponse)
@@ -19,18 +23,42 @@ async def create_order(body: LimitOrderBody | MarketOrderBody, request: Request
     return await service.create_order(body=body, request=request, db_session=db_session)
 
 
+@router.post("/order/bulk", tags=[ApiTags.ORDER], response_model=List[BulkOrderResult])
+async def create_orders(body: BulkLimitOrderBody, request: Request = None, db_session: AsyncSession = Depends(get_session)):
+    return await service.create_orders(body=body, request=request, db_session=db_session)
+
+
+@router.post("/order/bulk/cancel", tags=[ApiTags.ORDER], response_model=List[BulkOrderResult])
+async def cancel_orders(body: BulkCancelBody, request: Request = None, db_session: AsyncSession = Depends(get_session)):
+    return await service.cancel_orders(body=body, request=request, db_session=db_session)
+
+
+@router.delete("/order", tags=[ApiTags.ORDER], response_model=List[BulkOrderResult])
+async def cancel_all_orders(ticker: Optional[str] = None, request: Request = None,
+                            db_session: AsyncSession = Depends(get_session)):
+    return await service.cancel_all_orders(ticker=ticker, request=request, db_session=db_session)
+
+
 @router.get("/order", tags=[ApiTags.ORDER], response_model=List[LimitOrder | MarketOrder])
-async def list_orders(request: Request = None, db_session: AsyncSession = Depends(get_session)):
-    return await service.get_orders(request=request, db_session=db_session)
+async def list_orders(status: Optional[OrderStatus] = None, ticker: Optional[str] = None, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 0,
+                      request: Request = None, db_session: AsyncSession = Depends(get_read_session)):
+    return await service.get_orders(request=request, status=status, ticker=ticker, since=since, until=until,
+                                    cursor=cursor, limit=limit, db_session=db_session)
 
 
 @router.get("/public/orderbook/{ticker}", tags=[ApiTags.PUBLIC], response_model=L2OrderBook)
-async def get_orderbook(ticker: str, limit: int = 0, db_session: AsyncSession = Depends(get_session)):
-    return await service.get_orderbook(ticker=ticker, limit=limit, db_session=db_session)
+async def get_orderbook(ticker: str, limit: int = 0):
+    return await service.get_orderbook(ticker=ticker, limit=limit)
+
+
+@router.websocket("/public/market-data")
+async def stream_market_data(websocket: WebSocket):
+    await service.stream_market_data(websocket=websocket)
 
 
 @router.get("/order/{order_id}", tags=[ApiTags.ORDER], response_model=LimitOrder | MarketOrder)
-async def get_order(order_id: UUID4, request: Request = None, db_session: AsyncSession = Depends(get_session)):
+async def get_order(order_id: UUID4, request: Request = None, db_session: AsyncSession = Depends(get_read_session)):
     return await service.get_order(order_id=order_id, request=request, db_session=db_session)
 
 
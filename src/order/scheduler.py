@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Tuple
+
+from src.order.engine import Command, CommandResult
+
+log = logging.getLogger(__name__)
+
+MatchingHandler = Callable[[uuid.UUID, List[Command]], Awaitable[List[CommandResult]]]
+
+
+class MatchingScheduler:
+    def __init__(self, handler: MatchingHandler):
+        self._handler = handler
+        self._pending: Dict[uuid.UUID, Deque[Tuple[Command, asyncio.Future]]] = {}
+        self._wakeups: Dict[uuid.UUID, asyncio.Event] = {}
+        self._workers: Dict[uuid.UUID, asyncio.Task] = {}
+
+    async def submit(self, command: Command) -> CommandResult:
+        instrument_id = command.instrument_id
+        future = asyncio.get_running_loop().create_future()
+
+        self._pending.setdefault(instrument_id, deque()).append((command, future))
+        self._wakeup(instrument_id).set()
+
+        return await future
+
+    def _wakeup(self, instrument_id: uuid.UUID) -> asyncio.Event:
+        wakeup = self._wakeups.get(instrument_id)
+        if wakeup is None:
+            wakeup = self._wakeups[instrument_id] = asyncio.Event()
+            self._workers[instrument_id] = asyncio.create_task(self._run(instrument_id, wakeup))
+        return wakeup
+
+    async def _run(self, instrument_id: uuid.UUID, wakeup: asyncio.Event) -> None:
+        pending = self._pending[instrument_id]
+
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            if self._wakeups.get(instrument_id) is not wakeup:
+                return
+
+            batch = [pending.popleft() for _ in range(len(pending))]
+            commands = [command for command, _ in batch]
+
+            try:
+                results = await self._handler(instrument_id, commands)
+            except Exception as e:
+                log.exception(e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def remove(self, instrument_id: uuid.UUID) -> None:
+        # Начатый цикл доводится до конца, команды в очереди отклоняются
+        worker = self._workers.pop(instrument_id, None)
+        wakeup = self._wakeups.pop(instrument_id, None)
+        for _, future in self._pending.pop(instrument_id, ()):
+            if not future.done():
+                future.set_exception(LookupError(f"Instrument {instrument_id} was removed"))
+
+        if worker is not None:
+            wakeup.set()
+            await asyncio.gather(worker, return_exceptions=True)
+
+    async def stop(self) -> None:
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+        self._workers.clear()
+        self._wakeups.clear()
@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, UUID4, Field
 
+from src import config
 from src.order.enums import Direction, OrderStatus
 
 
@@ -38,6 +39,7 @@ class MarketOrderBody(BaseModel):
     direction: Direction
     ticker: str
     qty: int = Field(ge=1)
+    price_limit: Optional[float] = Field(default=None, gt=0)
 
 
 class MarketOrder(BaseModel):
@@ -50,4 +52,18 @@ class MarketOrder(BaseModel):
 
 class CreateOrderResponse(BaseModel):
     success: bool = True
-    order_id: UUID4
\ No newline at end of file
+    order_id: UUID4
+
+
+class BulkLimitOrderBody(BaseModel):
+    orders: List[LimitOrderBody] = Field(min_length=1, max_length=config.BULK_ORDER_MAX_SIZE)
+
+
+class BulkCancelBody(BaseModel):
+    order_ids: List[UUID4] = Field(min_length=1, max_length=config.BULK_ORDER_MAX_SIZE)
+
+
+class BulkOrderResult(BaseModel):
+    success: bool
+    order_id: Optional[UUID4] = None
+    detail: Optional[str] = None
\ No newline at end of file
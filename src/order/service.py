@@ -1,251 +1,301 @@
 import asyncio
-from collections import defaultdict, deque
+import time
+import uuid
 from datetime import datetime
-from typing import List
-from sqlalchemy import select, func
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Select, select, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from fastapi import Depends, HTTPException
 from pydantic import UUID4
 from src.order.enums import Direction, OrderType
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
-from src.instrument.models import Instrument
+from starlette.responses import Response, StreamingResponse
+from starlette.websockets import WebSocket
+from src import config
+from src.instrument.registry import instrument_registry
+from src.balance.ledger import balance_ledger
 from src.balance.models import Balance
+from src.core.metrics import COUNT_BUCKETS, metrics
+from src.core.pagination import keyset_page, stream_json_array
 from src.core.schemas import Ok
-from src.dependencies import get_session
-from src.order.schemas import LimitOrderBody, MarketOrderBody, CreateOrderResponse, LimitOrder, MarketOrder, \
-    L2OrderBook, Level
-from src.order.models import Order
-from src.transaction.models import Transaction
-from src.order.enums import OrderStatus
+from src.core.serialization import dump_json
+from src.dependencies import get_read_session, get_session, session_factory, session_factory_for
+from src.order.feed import market_data_feed
+from src.order.engine import BookOrder, CancelOrder, Command, CommandResult, Fill, PlaceOrder, matching_engine
+from src.order.journal import JournalStore
+from src.order.market_data import BookUpdate, market_data
+from src.order.scheduler import MatchingScheduler
+from src.order.settlement import Settlement
+from src.order.workers import MatchingPool
+from src.order.schemas import (BulkCancelBody, BulkLimitOrderBody, BulkOrderResult, LimitOrderBody, MarketOrderBody,
+                               CreateOrderResponse, LimitOrder, MarketOrder)
+from src.order.models import Order, OrderEvent, MatchingCheckpoint
+from src.order.enums import OrderEventType, OrderStatus
 from decimal import Decimal
 
 
 DEFAULT_TICKER = "RUB"
+OPEN_ORDER_STATUSES = (OrderStatus.new, OrderStatus.partially_filled)
+ORDER_COLUMNS = (
+    Order.id, Order.instrument_id, Order.order_type, Order.direction, Order.price, Order.quantity,
+    Order.filled_quantity, Order.status, Order.created_at,
+)
+
+ORDERS = metrics.counter("orders_total", "Order requests by type and outcome.", ("order_type", "outcome"))
+ORDER_CANCELS = metrics.counter("order_cancels_total", "Cancel requests by outcome.", ("outcome",))
+FILLS = metrics.counter("fills_total", "Executed trades.", ("ticker",))
+MATCHING_CYCLE_SECONDS = metrics.histogram("matching_cycle_duration_seconds",
+                                           "Matching cycle time from execution to commit.", ("ticker",))
+MATCHING_CYCLE_COMMANDS = metrics.histogram("matching_cycle_commands", "Commands matched per cycle.", ("ticker",),
+                                            buckets=COUNT_BUCKETS)
+MATCHING_CYCLE_FAILURES = metrics.counter("matching_cycle_failures_total", "Rolled back matching cycles.",
+                                          ("ticker",))
 
 
 async def create_order(*, body: LimitOrderBody | MarketOrderBody, request: Request,
                        db_session: AsyncSession = Depends(get_session)) -> CreateOrderResponse:
     # user = request.state.user
 
-    # Шаг 1: Получаем инструмент
-    instrument = await db_session.scalar(
-        select(Instrument).where(Instrument.ticker == body.ticker)
-    )
-    if instrument is None or instrument.delisted:
+    # Шаги 1-4: Проверка инструмента и резервирование
+    order_type = OrderType.limit if isinstance(body, LimitOrderBody) else OrderType.market
+    try:
+        order, reserve_instrument_id, locked = accept_order(body)
+    except HTTPException:
+        ORDERS.inc(order_type.value, "rejected")
+        raise
+
+    # Шаг 5: Создание заявки; сама заявка вставляется автосбросом сессии перед событием о ней
+    db_session.add(order)
+    try:
+        await db_session.execute(insert(OrderEvent).values(placed_events([order])))
+        await db_session.commit()
+    except Exception:
+        balance_ledger.adjust(body.user_id, reserve_instrument_id, 0, -locked, persist=True)
+        raise
+
+    # Шаг 6: Сведение со стаканом — заявка уже принята, в базу попадут только результаты сделок.
+    # Рыночная заявка исполняется в пределах остатка, удерживаемого за ней до конца цикла
+    command = PlaceOrder(order=to_book_order(order), order_type=order.order_type)
+    if order.order_type == OrderType.market:
+        budget = balance_ledger.available(body.user_id, reserve_instrument_id)
+        balance_ledger.adjust(body.user_id, reserve_instrument_id, 0, budget)
+        try:
+            result = await dispatch(replace(command, budget=budget))
+        finally:
+            balance_ledger.adjust(body.user_id, reserve_instrument_id, 0, -budget)
+        if not result.fills:
+            ORDERS.inc(order_type.value, "rejected")
+            raise HTTPException(status_code=400, detail="No matching order available")
+    else:
+        await dispatch(command)
+
+    ORDERS.inc(order_type.value, "accepted")
+    return CreateOrderResponse(order_id=order.id, status=True)
+
+
+def accept_order(body: LimitOrderBody | MarketOrderBody) -> Tuple[Order, UUID4, Decimal]:
+    # Шаг 1: Получаем инструмент из справочника в памяти
+    instrument = instrument_registry.active(body.ticker)
+    if instrument is None:
         raise HTTPException(status_code=404, detail="Ticker not found or delisted")
 
     # # Шаг 2: Проверяем доступ
     # if instrument.access_level == "qualified_only" and user.role != "qualified":
     #     raise HTTPException(status_code=403, detail="User not authorized")
 
-    # Шаг 3: Получаем балансы
-    quote_instrument = await db_session.scalar(
-        select(Instrument).where(Instrument.ticker == DEFAULT_TICKER)
-    )
+    # Шаг 3: Определяем резервируемую сумму. Рыночная заявка ничего не блокирует при приёме —
+    # она исполняется в пределах остатка, доступного на момент отправки в стакан
+    quote_instrument = instrument_registry.get(DEFAULT_TICKER)
     if quote_instrument is None:
         raise HTTPException(status_code=500, detail="RUB instrument not found")
 
-    balances = {
-        "instrument": await db_session.scalar(
-            select(Balance).where(Balance.user_id == body.user_id, Balance.instrument_id == instrument.id)
-        ),
-        "quote": await db_session.scalar(
-            select(Balance).where(Balance.user_id == body.user_id, Balance.instrument_id == quote_instrument.id)
-        )
-    }
-    for balance_type, balance in balances.items():
-        if balance is None:
-            balance = Balance(
-                user_id=body.user_id,
-                instrument_id=instrument.id if balance_type == "instrument" else quote_instrument.id,
-                amount=0,
-                locked_amount=0
-            )
-            balances[balance_type] = balance
-            db_session.add(balance)
-
-    # Шаг 4: Проверяем и резервируем средства/актив
-    qty = body.qty
-    # Определяем цену: для market будет взята из стакана, для limit — из body
-    price = body.price if isinstance(body, LimitOrderBody) else 0
-
-    required = qty * price if body.direction == Direction.buy and isinstance(body, LimitOrderBody) else qty
-    available = balances["quote"].amount - balances["quote"].locked_amount if body.direction == Direction.buy else \
-        balances["instrument"].amount - balances["instrument"].locked_amount
-    if available < required:
+    qty = Decimal(body.qty)
+    if isinstance(body, LimitOrderBody):
+        price = Decimal(str(body.price))
+        locked = required = qty * price if body.direction == Direction.buy else qty
+    else:
+        price = Decimal(str(body.price_limit)) if body.price_limit is not None else Decimal(0)
+        locked, required = Decimal(0), qty if body.direction == Direction.sell else Decimal(0)
+
+    # Шаг 4: Проверяем и резервируем средства/актив в журнале балансов в памяти;
+    # блокировка уходит в базу фоновой пачкой
+    reserve_instrument_id = quote_instrument.id if body.direction == Direction.buy else instrument.id
+    if not balance_ledger.reserve(body.user_id, reserve_instrument_id, required, locked):
         raise HTTPException(status_code=400,
                             detail=f"Insufficient {'funds' if body.direction == Direction.buy else 'stock'}")
 
-    if body.direction == Direction.buy and isinstance(body, LimitOrderBody):
-        balances["quote"].locked_amount += Decimal(str(required))
-    else:
-        balances["instrument"].locked_amount += qty
-
-    # Шаг 5: Создание заявки
-    if isinstance(body, MarketOrderBody):
-        # Логика market
-        matching_order = await db_session.scalar(
-            select(Order)
-            .where(
-                Order.instrument_id == instrument.id,
-                Order.direction == (Direction.sell if body.direction == Direction.buy else Direction.buy),
-                Order.status == OrderStatus.new
-            )
-            .order_by(Order.price.asc() if body.direction == Direction.buy else Order.price.desc(),
-                      Order.created_at.asc()).limit(1)
-        )
-        if matching_order is None:
-            raise HTTPException(status_code=400, detail="No matching order available")
+    order = Order(
+        id=uuid.uuid4(),
+        user_id=body.user_id,
+        instrument_id=instrument.id,
+        order_type=OrderType.limit if isinstance(body, LimitOrderBody) else OrderType.market,
+        direction=body.direction,
+        price=price,
+        quantity=qty,
+        filled_quantity=0,
+        status=OrderStatus.new,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow(),
+    )
+    return order, reserve_instrument_id, locked
+
+
+def placed_events(orders: Iterable[Order]) -> List[dict]:
+    return [
+        {"order_id": order.id, "event": OrderEventType.placed, "quantity": order.quantity, "price": order.price,
+         "created_at": order.created_at}
+        for order in orders
+    ]
+
+
+async def create_orders(*, body: BulkLimitOrderBody, request: Request,
+                        db_session: AsyncSession = Depends(get_session)) -> List[BulkOrderResult]:
+    # Шаг 1: Проверяем и резервируем балансы всех заявок за один проход по журналу балансов
+    results: List[BulkOrderResult] = []
+    accepted = []
+    for order_body in body.orders:
+        try:
+            order, reserve_instrument_id, locked = accept_order(order_body)
+        except HTTPException as e:
+            results.append(BulkOrderResult(success=False, detail=e.detail))
+            continue
+        accepted.append((order, reserve_instrument_id, locked))
+        results.append(BulkOrderResult(success=True, order_id=order.id))
+
+    if not accepted:
+        return results
+
+    # Шаг 2: Все принятые заявки вставляются одним многострочным INSERT
+    try:
+        await db_session.execute(insert(Order).values([
+            {column.key: getattr(order, column.key) for column in Order.__table__.columns}
+            for order, _, _ in accepted
+        ]))
+        await db_session.execute(insert(OrderEvent).values(placed_events(order for order, _, _ in accepted)))
+        await db_session.commit()
+    except Exception:
+        for order, reserve_instrument_id, locked in accepted:
+            balance_ledger.adjust(order.user_id, reserve_instrument_id, 0, -locked, persist=True)
+        raise
+
+    # Шаг 3: Заявки отправляются в стакан вместе и сводятся одним циклом на инструмент
+    outcomes = await asyncio.gather(
+        *(dispatch(PlaceOrder(order=to_book_order(order), order_type=order.order_type)) for order, _, _ in accepted),
+        return_exceptions=True,
+    )
+    accepted_results = (result for result in results if result.success)
+    for result, outcome in zip(accepted_results, outcomes):
+        if isinstance(outcome, Exception):
+            result.success, result.detail = False, f"Matching failed: {outcome}"
 
-        trade_price = matching_order.price
-        trade_qty = min(qty, matching_order.quantity - matching_order.filled_quantity)
-        matching_order.filled_quantity += trade_qty
-        matching_order.status = OrderStatus.executed if matching_order.filled_quantity == matching_order.quantity else \
-            OrderStatus.partially_filled
+    accepted_count = sum(result.success for result in results)
+    ORDERS.inc(OrderType.limit.value, "accepted", amount=accepted_count)
+    ORDERS.inc(OrderType.limit.value, "rejected", amount=len(results) - accepted_count)
+    return results
 
-        if body.direction == Direction.buy:
-            balances["quote"].locked_amount -= trade_qty * trade_price
-            balances["instrument"].amount += trade_qty
-        else:
-            balances["instrument"].locked_amount -= trade_qty
-            balances["quote"].amount += trade_qty * trade_price
-
-        transaction = Transaction(
-            order_id=matching_order.id,
-            instrument_id=instrument.id,
-            price=trade_price,
-            quantity=trade_qty,
-            executed_at=datetime.utcnow()
-        )
-        db_session.add(transaction)
-        order = matching_order
-    else:  # LimitOrderBody
-        order = Order(
-            user_id=body.user_id,
-            instrument_id=instrument.id,
-            order_type=OrderType.limit,
-            direction=body.direction,
-            price=body.price,
-            quantity=qty,
-            filled_quantity=0,
-            status=OrderStatus.new,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-        )
-        db_session.add(order)
-
-    # Шаг 6: Фиксация
-    await db_session.commit()
 
-    return CreateOrderResponse(order_id=order.id, status=True)
+async def get_orders(*, request: Request, status: Optional[OrderStatus] = None, ticker: Optional[str] = None,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None, cursor: Optional[str] = None,
+                     limit: int = 0, db_session: AsyncSession = Depends(get_read_session)) -> StreamingResponse:
+    user = request.state.user
+    if not user:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+
+    query = select(*ORDER_COLUMNS).where(Order.user_id == user.id)
+    if status is not None:
+        query = query.where(Order.status == status)
+    if ticker is not None:
+        instrument = instrument_registry.get(ticker)
+        if instrument is None:
+            raise HTTPException(status_code=404, detail="Ticker not found")
+        query = query.where(Order.instrument_id == instrument.id)
+    if since is not None:
+        query = query.where(Order.created_at >= since)
+    if until is not None:
+        query = query.where(Order.created_at < until)
+
+    # Страница читается по индексу (user_id, created_at DESC, id DESC) и отдаётся потоком
+    limit = min(limit if limit > 0 else config.ORDERS_PAGE_SIZE, config.ORDERS_MAX_PAGE_SIZE)
+    query, headers = await keyset_page(
+        db_session, query.order_by(Order.created_at.desc(), Order.id.desc()), Order.created_at, Order.id, limit, cursor
+    )
 
+    user_id = str(user.id)
+    render = render_order if config.FAST_SERIALIZATION else render_order_model
+    return stream_json_array(query, lambda row: render(row, user_id), headers, session_factory_for(db_session))
 
-async def get_orders(*, request: Request, db_session: AsyncSession = Depends(get_session)) -> List[
-    LimitOrder | MarketOrder]:
-    # user = request.state.user
-    # if not user:
-    #     raise HTTPException(status_code=401, detail="User not authenticated")
 
-    # Один запрос с join для всех ордеров пользователя
-    result = await db_session.execute(
-        select(Order, Instrument.ticker)
-        .join(Instrument, Order.instrument_id == Instrument.id)
-        # .where(Order.user_id == user.id)
-    )
-    orders_db = result.all()
-
-    # Преобразование в Pydantic-модели
-    orders = []
-    for order, ticker in orders_db:
-        body = LimitOrderBody(direction=Direction(order.direction), ticker=ticker, qty=order.quantity,
-                              price=order.price) if order.order_type == OrderType.limit else MarketOrderBody(
-            direction=Direction(order.direction), ticker=ticker, qty=int(order.quantity))
-        order_model = LimitOrder(
-            id=order.id,
-            status=OrderStatus(order.status),
-            user_id=order.user_id,
-            timestamp=order.created_at,
-            body=body,
-            filled=int(order.filled_quantity) if order.order_type == OrderType.limit else 0
-        ) if order.order_type == OrderType.limit else MarketOrder(
-            id=order.id,
-            status=OrderStatus(order.status),
-            user_id=order.user_id,
-            timestamp=order.created_at,
-            body=body
-        )
-        orders.append(order_model)
-
-    return orders
+def render_order(row: Row, user_id: str) -> bytes:
+    # JSON собирается напрямую, без LimitOrderBody/MarketOrderBody на каждую строку; формат совпадает с LimitOrder | MarketOrder
+    return dump_json(order_fields(row, user_id))
+
+
+def render_order_model(row: Row, user_id: str) -> bytes:
+    # Без быстрого пути строка проходит через схему ответа, как при response_model
+    schema = LimitOrder if row.order_type == OrderType.limit else MarketOrder
+    return schema.model_validate(order_fields(row, user_id)).model_dump_json().encode()
+
+
+def order_fields(row: Row, user_id: str) -> dict:
+    body = {
+        "user_id": user_id,
+        "direction": row.direction,
+        "ticker": instrument_registry.ticker(row.instrument_id),
+        "qty": int(row.quantity),
+    }
+    order = {
+        "id": row.id,
+        "status": row.status,
+        "user_id": user_id,
+        "timestamp": row.created_at,
+        "body": body,
+    }
+    if row.order_type == OrderType.limit:
+        body["price"] = float(row.price)
+        order["filled"] = int(row.filled_quantity)
+    else:
+        body["price_limit"] = float(row.price) if row.price else None
+    return order
 
 
 async def get_order(*, order_id: UUID4, request: Request,
-                    db_session: AsyncSession = Depends(get_session)) -> LimitOrder | MarketOrder:
+                    db_session: AsyncSession = Depends(get_read_session)) -> dict | Response:
     user = request.state.user
     if not user:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
-    # Один запрос с join для конкретного ордера
-    result = await db_session.execute(
-        select(Order, Instrument.ticker)
-        .join(Instrument, Order.instrument_id == Instrument.id)
-        .where(Order.id == order_id, Order.user_id == user.id)
-    )
-    order_db = result.first()
+    row = (await db_session.execute(
+        select(*ORDER_COLUMNS).where(Order.id == order_id, Order.user_id == user.id)
+    )).first()
 
-    if not order_db:
+    if not row:
         raise HTTPException(status_code=404, detail="Order not found or does not belong to user")
 
-    order, ticker = order_db
-    # Преобразование в Pydantic-модель
-    body = LimitOrderBody(direction=Direction(order.direction), ticker=ticker, qty=order.quantity,
-                          price=order.price) if order.order_type == OrderType.limit else MarketOrderBody(
-        direction=Direction(order.direction), ticker=ticker, qty=int(order.quantity))
-    order_model = LimitOrder(
-        id=order.id,
-        status=OrderStatus(order.status),
-        user_id=order.user_id,
-        timestamp=order.created_at,
-        body=body,
-        filled=int(order.filled_quantity) if order.order_type == OrderType.limit else 0
-    ) if order.order_type == OrderType.limit else MarketOrder(
-        id=order.id,
-        status=OrderStatus(order.status),
-        user_id=order.user_id,
-        timestamp=order.created_at,
-        body=body
-    )
+    if not config.FAST_SERIALIZATION:
+        return order_fields(row, str(user.id))
+    return Response(content=render_order(row, str(user.id)), media_type="application/json")
 
-    return order_model
 
-
-async def get_orderbook(*, ticker: str, limit: int, db_session: AsyncSession = Depends(get_session)) -> L2OrderBook:
-    instrument = await db_session.scalar(select(Instrument).where(Instrument.ticker == ticker))
-    if not instrument or instrument.delisted:
+async def get_orderbook(*, ticker: str, limit: int) -> Response:
+    instrument = instrument_registry.active(ticker)
+    if instrument is None:
         raise HTTPException(status_code=404, detail="Ticker not found or delisted")
 
-    result = await db_session.execute(
-        select(Order.price, func.sum(Order.quantity - Order.filled_quantity).label("qty"))
-        .where(Order.instrument_id == instrument.id, Order.status == OrderStatus.new)
-        .group_by(Order.price, Order.direction)
-        .order_by(
-            Order.price.desc() if Order.direction == Direction.buy else Order.price.asc()
-        )
-        .limit(limit)
-    )
-    order_levels = result.all()
+    # Стакан берётся из агрегатов в памяти; готовый JSON кэшируется до следующего изменения стакана
+    depth = min(limit if limit > 0 else config.ORDERBOOK_DEPTH, config.ORDERBOOK_MAX_DEPTH)
+    return Response(content=market_data.book(instrument.id).render(depth), media_type="application/json")
 
-    # Разделение на bid и ask уровни
-    bid_levels = [
-                     Level(price=int(price), qty=int(qty))
-                     for price, qty in order_levels if order_levels[0][1] == Direction.buy
-                 ][:limit]
-    ask_levels = [
-                     Level(price=int(price), qty=int(qty))
-                     for price, qty in order_levels if order_levels[0][1] == Direction.sell
-                 ][:limit]
 
-    return L2OrderBook(bid_levels=bid_levels, ask_levels=ask_levels)
+async def resolve_ticker(ticker: str) -> Optional[UUID4]:
+    instrument = instrument_registry.active(ticker)
+    return instrument.id if instrument is not None else None
+
+
+async def stream_market_data(*, websocket: WebSocket) -> None:
+    await market_data_feed.serve(websocket, resolve_ticker)
 
 
 async def cancel_order(*, order_id: UUID4, request: Request, db_session: AsyncSession = Depends(get_session)) -> Ok:
@@ -258,132 +308,359 @@ async def cancel_order(*, order_id: UUID4, request: Request, db_session: AsyncSe
     order = await db_session.scalar(
         select(Order).where(Order.id == order_id, Order.user_id == user.id)
     )
-    if not order or order.status not in [OrderStatus.new, OrderStatus.partially_filled]:
+    if not order or order.status not in OPEN_ORDER_STATUSES:
+        ORDER_CANCELS.inc("rejected")
         raise HTTPException(status_code=404 if not order else 400,
                             detail="Order not found, does not belong to user, or cannot be canceled")
 
-    # Шаг 3: Подготовка балансов
-    quote_instrument = await db_session.scalar(select(Instrument).where(Instrument.ticker == DEFAULT_TICKER))
-    balances = {
-        "instrument": await db_session.scalar(
-            select(Balance).where(Balance.user_id == user.id, Balance.instrument_id == order.instrument_id)
-        ) or Balance(user_id=user.id, instrument_id=order.instrument_id, amount=0, locked_amount=0),
-        "quote": await db_session.scalar(
-            select(Balance).where(Balance.user_id == user.id, Balance.instrument_id == quote_instrument.id)
-        ) or Balance(user_id=user.id, instrument_id=quote_instrument.id, amount=0, locked_amount=0)
-    }
-    for balance in balances.values():
-        db_session.add(balance)
-
-    # Шаг 4: Разблокировать средства
-    remaining_qty = order.quantity - order.filled_quantity
-    locked_to_release = remaining_qty * order.price if order.direction == Direction.buy else remaining_qty
-    target_balance = balances["quote"] if order.direction == Direction.buy else balances["instrument"]
-    target_balance.locked_amount = max(0, target_balance.locked_amount - locked_to_release)
-
-    # Шаг 5: Отменить ордер
-    order.status = OrderStatus.canceled
-    order.updated_at = datetime.utcnow()
-    db_session.add(order)
+    # Шаг 3: Снять ордер со стакана, разблокировать средства и зафиксировать отмену
+    result = await dispatch(CancelOrder(instrument_id=order.instrument_id, order_id=order.id))
+    if result.released is None:
+        ORDER_CANCELS.inc("rejected")
+        raise HTTPException(status_code=400, detail="Order not found, does not belong to user, or cannot be canceled")
+
+    ORDER_CANCELS.inc("canceled")
+    return Ok(success=True)
 
-    # Шаг 6: Добавить запись в transactions
-    transaction = Transaction(
-        order_id=order.id,
+
+async def cancel_orders(*, body: BulkCancelBody, request: Request,
+                        db_session: AsyncSession = Depends(get_session)) -> List[BulkOrderResult]:
+    user = request.state.user
+    if not user:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+
+    # Шаг 1: Все ордера читаются одним запросом
+    result = await db_session.execute(
+        select(Order.id, Order.instrument_id, Order.status)
+        .where(Order.id.in_(body.order_ids), Order.user_id == user.id)
+    )
+    orders = {order_id: (instrument_id, status) for order_id, instrument_id, status in result.all()}
+
+    results, commands = [], []
+    for order_id in body.order_ids:
+        instrument_id, status = orders.get(order_id, (None, None))
+        if status not in OPEN_ORDER_STATUSES:
+            results.append(BulkOrderResult(success=False, order_id=order_id, detail=(
+                "Order not found or does not belong to user" if status is None else "Order cannot be canceled"
+            )))
+            continue
+        results.append(BulkOrderResult(success=True, order_id=order_id))
+        commands.append(CancelOrder(instrument_id=instrument_id, order_id=order_id))
+
+    await _dispatch_cancels(commands, [result for result in results if result.success])
+    _count_cancels(results)
+    return results
+
+
+async def cancel_all_orders(*, ticker: Optional[str], request: Request,
+                            db_session: AsyncSession = Depends(get_session)) -> List[BulkOrderResult]:
+    user = request.state.user
+    if not user:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+
+    query = select(Order.id, Order.instrument_id).where(
+        Order.user_id == user.id, Order.status.in_(OPEN_ORDER_STATUSES)
+    )
+    if ticker is not None:
+        instrument = instrument_registry.get(ticker)
+        if instrument is None:
+            raise HTTPException(status_code=404, detail="Ticker not found")
+        query = query.where(Order.instrument_id == instrument.id)
+
+    orders = (await db_session.execute(query)).all()
+    results = [BulkOrderResult(success=True, order_id=order_id) for order_id, _ in orders]
+    await _dispatch_cancels(
+        [CancelOrder(instrument_id=instrument_id, order_id=order_id) for order_id, instrument_id in orders], results
+    )
+    _count_cancels(results)
+    return results
+
+
+async def _dispatch_cancels(commands: List[CancelOrder], results: List[BulkOrderResult]) -> None:
+    # Отмены одного инструмента попадают в один цикл: статусы заявок меняются одним UPDATE ... FROM VALUES,
+    # а блокировки снимаются одной пачкой дельт по балансам
+    outcomes = await asyncio.gather(*(dispatch(command) for command in commands), return_exceptions=True)
+    for result, outcome in zip(results, outcomes):
+        if isinstance(outcome, Exception):
+            result.success, result.detail = False, f"Matching failed: {outcome}"
+        elif outcome.released is None:
+            result.success, result.detail = False, "Order cannot be canceled"
+
+
+def _count_cancels(results: List[BulkOrderResult]) -> None:
+    canceled = sum(result.success for result in results)
+    ORDER_CANCELS.inc("canceled", amount=canceled)
+    ORDER_CANCELS.inc("rejected", amount=len(results) - canceled)
+
+
+def to_book_order(order: Order) -> BookOrder:
+    return BookOrder(
+        id=order.id,
+        user_id=order.user_id,
         instrument_id=order.instrument_id,
-        price=order.price,
-        quantity=remaining_qty,
-        executed_at=datetime.utcnow(),
+        direction=Direction(order.direction),
+        # У рыночной заявки цена — необязательный предел проскальзывания
+        price=Decimal(order.price) if order.order_type == OrderType.limit or order.price else None,
+        quantity=Decimal(order.quantity),
+        filled_quantity=Decimal(order.filled_quantity),
     )
-    db_session.add(transaction)
 
-    # Шаг 7: Фиксация изменений
-    await db_session.commit()
 
-    return Ok(success=True)
+def publish_book_update(instrument_id: UUID4, fills: Optional[List[Fill]] = None, reset: bool = False) -> None:
+    book = matching_engine.book(instrument_id)
+    changes = book.flush_changes()
+    market_data.publish(BookUpdate(
+        instrument_id=instrument_id,
+        version=book.version,
+        levels=book.levels() if reset else changes,
+        fills=fills or [],
+        reset=reset,
+    ))
+
+
+def open_orders_query(instrument_id: Optional[UUID4] = None) -> Select:
+    # Условие по статусу совпадает с предикатом частичного индекса ix_orders_open_instrument_id_created_at
+    query = (
+        select(Order)
+        .where(Order.status.in_(OPEN_ORDER_STATUSES), Order.order_type == OrderType.limit)
+        .order_by(Order.created_at)  # FIFO по времени создания
+    )
+    if instrument_id is not None:
+        query = query.where(Order.instrument_id == instrument_id)
+    return query
+
+
+def orphan_orders_query(instrument_id: UUID4) -> Select:
+    # Все открытые заявки инструмента, включая рыночные: время приёма не совпадает с моментом записи в журнал,
+    # поэтому отсечка по времени снимка теряет заявки, принятые до него, но записанные после
+    return (
+        select(Order)
+        .where(Order.instrument_id == instrument_id, Order.status.in_(OPEN_ORDER_STATUSES))
+        .order_by(Order.created_at)
+    )
 
-async def match_orders(db_session: AsyncSession):
-    while True:
-        # Получаем все pending лимитные ордеры
-        result = await db_session.execute(
-            select(Order)
-            .where(Order.status == OrderStatus.new, Order.order_type == OrderType.limit)
-            .order_by(Order.created_at)  # FIFO по времени создания
-        )
-        limit_orders = result.scalars().all()
-
-        # Группировка по instrument_id с использованием defaultdict и deque
-        orders_by_instrument = defaultdict(lambda: {"buy": deque(), "sell": deque()})
-        for order in limit_orders:
-            queue = orders_by_instrument[order.instrument_id][order.direction]
-            queue.append(order)
-
-        # Матчинг для каждого инструмента
-        for instrument_id, queues in orders_by_instrument.items():
-            buy_orders = queues["buy"]
-            sell_orders = queues["sell"]
-
-            # Сортировка: buy по убыванию цены, sell по возрастанию цены
-            buy_orders = deque(sorted(buy_orders, key=lambda o: (-o.price, o.created_at)))
-            sell_orders = deque(sorted(sell_orders, key=lambda o: (o.price, o.created_at)))
-
-            while buy_orders and sell_orders:
-                buy = buy_orders[0]
-                sell = sell_orders[0]
-
-                if buy.price >= sell.price:  # Совпадение цен
-                    trade_qty = min(buy.quantity - buy.filled_quantity, sell.quantity - sell.filled_quantity)
-                    if trade_qty > 0:
-                        # Исполнение сделки
-                        buy.filled_quantity += trade_qty
-                        sell.filled_quantity += trade_qty
-                        buy.status = OrderStatus.executed if buy.filled_quantity == buy.quantity else OrderStatus.partially_filled
-                        sell.status = OrderStatus.executed if sell.filled_quantity == sell.quantity else OrderStatus.partially_filled
-                        buy.updated_at = sell.updated_at = datetime.utcnow()  # 09:51 PM CEST = 07:51 PM UTC
-
-                        # Обновление балансов
-                        instrument = await db_session.scalar(select(Instrument).where(Instrument.id == instrument_id))
-                        buy_balance = await db_session.scalar(select(Balance).where(Balance.user_id == buy.user_id, Balance.instrument_id == instrument_id))
-                        sell_balance = await db_session.scalar(select(Balance).where(Balance.user_id == sell.user_id, Balance.instrument_id == instrument_id))
-                        quote_instrument = await db_session.scalar(select(Instrument).where(Instrument.ticker == DEFAULT_TICKER))
-                        quote_balance_buy = await db_session.scalar(select(Balance).where(Balance.user_id == buy.user_id, Balance.instrument_id == quote_instrument.id))
-                        quote_balance_sell = await db_session.scalar(select(Balance).where(Balance.user_id == sell.user_id, Balance.instrument_id == quote_instrument.id))
-
-                        if buy_balance and quote_balance_sell and quote_balance_buy and sell_balance:
-                            quote_balance_buy.locked_amount -= trade_qty * buy.price
-                            buy_balance.amount += trade_qty
-                            quote_balance_sell.locked_amount -= trade_qty * sell.price
-                            sell_balance.amount -= trade_qty
-
-                        # Создание транзакции после изменения статуса
-                        for order in [buy, sell]:
-                            if order.status in [OrderStatus.executed, OrderStatus.partially_filled]:
-                                transaction = Transaction(
-                                    order_id=order.id,
-                                    instrument_id=instrument_id,
-                                    price=order.price,
-                                    quantity=trade_qty,
-                                    executed_at=datetime.utcnow()
-                                )
-                                db_session.add(transaction)
-
-                        # Удаляем полностью исполненные ордеры из очереди
-                        if buy.filled_quantity == buy.quantity:
-                            buy_orders.popleft()
-                        if sell.filled_quantity == sell.quantity:
-                            sell_orders.popleft()
-                    else:
-                        if buy.filled_quantity == buy.quantity:
-                            buy_orders.popleft()
-                        if sell.filled_quantity == sell.quantity:
-                            sell_orders.popleft()
-                else:
-                    break  # Если цены не совпадают, дальнейший матчинг невозможен
-
-            # Обновление статусов в базе
-            for direction in ["buy", "sell"]:
-                for order in orders_by_instrument[instrument_id][direction]:
-                    if order.status in [OrderStatus.partially_filled, OrderStatus.executed]:
-                        db_session.add(order)
 
+async def load_order_books(db_session: AsyncSession, instrument_id: Optional[UUID4] = None) -> None:
+    result = await db_session.execute(open_orders_query(instrument_id))
+    fills = matching_engine.load((to_book_order(order) for order in result.scalars()), instrument_id=instrument_id)
+
+    # Сделки, сведённые при загрузке, рассчитываются до того, как стакан начнёт обслуживать запросы
+    if fills:
+        settlement = Settlement(instrument_registry.get(DEFAULT_TICKER).id)
+        settlement.add_fills(fills)
+        await settlement.apply(db_session)
         await db_session.commit()
-        await asyncio.sleep(1)  # Обновление каждую секунду
+        balance_ledger.apply_settlement(settlement)
+
+    for loaded_id in (list(matching_engine.books) if instrument_id is None else [instrument_id]):
+        publish_book_update(loaded_id, fills=[fill for fill in fills if fill.instrument_id == loaded_id], reset=True)
+
+
+async def reset_order_book(instrument_id: UUID4, db_session: AsyncSession) -> None:
+    await load_order_books(db_session, instrument_id=instrument_id)
+
+    # Стакан перечитан из базы — журнал начинается заново от свежего снимка
+    if journal_store is not None:
+        journal = journal_store.journal(instrument_id)
+        payload = journal_store.dump(matching_engine.book(instrument_id))
+        await asyncio.to_thread(journal_store.write_snapshot, instrument_id, journal.sequence, payload)
+
+
+async def recover_order_book(instrument_id: UUID4, db_session: AsyncSession) -> None:
+    snapshot = journal_store.load_snapshot(instrument_id)
+    if snapshot is None:
+        await reset_order_book(instrument_id, db_session)
+        return
+
+    checkpoint = await db_session.scalar(
+        select(MatchingCheckpoint.sequence).where(MatchingCheckpoint.instrument_id == instrument_id)
+    ) or 0
+    journal = journal_store.journal(instrument_id, max(snapshot.sequence, checkpoint))
+    matching_engine.load(snapshot.orders, instrument_id=instrument_id)
+
+    # Хвост журнала: уже рассчитанные команды только восстанавливают стакан, остальные рассчитываются заново
+    journaled_ids = set()
+    unsettled, unsettled_sequence = [], 0
+    for sequence, command in journal.read(after=snapshot.sequence):
+        if isinstance(command, PlaceOrder):
+            journaled_ids.add(command.order.id)
+        if sequence <= checkpoint:
+            matching_engine.execute(command)
+        else:
+            unsettled.append(command)
+            unsettled_sequence = sequence
+
+    if unsettled:
+        await match_orders(instrument_id, unsettled, db_session, sequence=unsettled_sequence)
+
+    # Принятые заявки, не успевшие попасть в журнал до сбоя: открытые в базе, но нет ни в стакане, ни в хвосте журнала
+    book = matching_engine.book(instrument_id)
+    result = await db_session.execute(orphan_orders_query(instrument_id))
+    orphans = [
+        PlaceOrder(order=to_book_order(order), order_type=order.order_type)
+        for order in result.scalars()
+        if order.id not in journaled_ids and order.id not in book.orders
+    ]
+    if orphans:
+        await match_orders(instrument_id, orphans, db_session)
+
+    publish_book_update(instrument_id, reset=True)
+
+
+async def restore_order_books(db_session: AsyncSession, instrument_ids: Optional[List[UUID4]] = None) -> None:
+    if journal_store is None:
+        if instrument_ids is None:
+            await load_order_books(db_session)
+        for instrument_id in instrument_ids or []:
+            await load_order_books(db_session, instrument_id=instrument_id)
+        return
+
+    if instrument_ids is None:
+        instrument_ids = instrument_registry.ids()
+    for instrument_id in instrument_ids:
+        await recover_order_book(instrument_id, db_session)
+
+
+async def load_market_budgets(commands: List[Command], quote_instrument_id: UUID4,
+                              db_session: AsyncSession) -> Dict[Tuple[UUID4, UUID4], Decimal]:
+    keys = sorted({
+        (command.order.user_id, quote_instrument_id if command.order.direction == Direction.buy else
+         command.order.instrument_id)
+        for command in commands
+        if isinstance(command, PlaceOrder) and command.order_type == OrderType.market and command.budget is None
+    })
+    if not keys:
+        return {}
+
+    result = await db_session.execute(
+        select(Balance.user_id, Balance.instrument_id, Balance.amount - Balance.locked_amount)
+        .where(tuple_(Balance.user_id, Balance.instrument_id).in_(keys))
+        .order_by(Balance.user_id, Balance.instrument_id)
+        .with_for_update()
+    )
+    return {(user_id, instrument_id): Decimal(available) for user_id, instrument_id, available in result.all()}
+
+
+async def match_orders(instrument_id: UUID4, commands: List[Command], db_session: AsyncSession,
+                       sequence: Optional[int] = None) -> List[CommandResult]:
+    quote_instrument = instrument_registry.get(DEFAULT_TICKER)
+    ticker = instrument_registry.ticker(instrument_id) or str(instrument_id)
+    started = time.perf_counter()
+
+    try:
+        # Рыночные заявки исполняются в пределах остатка, заблокированного в этой же транзакции
+        budgets = await load_market_budgets(commands, quote_instrument.id, db_session)
+        journaled, results = [], []
+        for command in commands:
+            budget_key = None
+            if isinstance(command, PlaceOrder):
+                if command.order_type == OrderType.market:
+                    budget_key = (command.order.user_id, quote_instrument.id
+                                  if command.order.direction == Direction.buy else command.order.instrument_id)
+                    if budget_key in budgets:
+                        command = replace(command, budget=max(budgets[budget_key], Decimal(0)))
+                journaled.append(replace(command, order=replace(command.order)))
+            else:
+                journaled.append(command)
+
+            result = matching_engine.execute(command)
+            results.append(result)
+            if budget_key in budgets:
+                budgets[budget_key] -= sum(
+                    fill.quantity * fill.price if command.order.direction == Direction.buy else fill.quantity
+                    for fill in result.fills
+                )
+
+        # Команды попадают в журнал (один fsync на цикл) до фиксации расчётов и ответа клиентам
+        if journal_store is not None and sequence is None:
+            sequence = await asyncio.to_thread(journal_store.journal(instrument_id).append, journaled)
+
+        # Все сделки и отмены цикла сворачиваются в дельты по (user_id, instrument_id) и пишутся одной транзакцией
+        settlement = Settlement(quote_instrument.id)
+        for result in results:
+            settlement.add_fills(result.fills)
+            if result.released is not None:
+                settlement.add_release(result.released, result.unlock)
+
+        await settlement.apply(db_session)
+        if sequence is not None:
+            await db_session.execute(
+                insert(MatchingCheckpoint)
+                .values(instrument_id=instrument_id, sequence=sequence)
+                .on_conflict_do_update(
+                    index_elements=[MatchingCheckpoint.instrument_id],
+                    set_={"sequence": sequence, "updated_at": func.current_timestamp()},
+                )
+            )
+        await db_session.commit()
+    except Exception:
+        MATCHING_CYCLE_FAILURES.inc(ticker)
+        await db_session.rollback()
+        await reset_order_book(instrument_id, db_session)
+        raise
+
+    MATCHING_CYCLE_SECONDS.observe(time.perf_counter() - started, ticker)
+    MATCHING_CYCLE_COMMANDS.observe(len(commands), ticker)
+    FILLS.inc(ticker, amount=sum(len(result.fills) for result in results))
+
+    balance_ledger.apply_settlement(settlement)
+
+    publish_book_update(instrument_id, fills=[fill for result in results for fill in result.fills])
+
+    if journal_store is not None and journal_store.needs_snapshot(instrument_id):
+        payload = journal_store.dump(matching_engine.book(instrument_id))
+        await asyncio.to_thread(journal_store.write_snapshot, instrument_id, sequence, payload)
+
+    return results
+
+
+async def run_matching_cycle(instrument_id: UUID4, commands: List[Command]) -> List[CommandResult]:
+    async with session_factory() as db_session:
+        return await match_orders(instrument_id, commands, db_session)
+
+
+journal_store = JournalStore(
+    config.JOURNAL_DIR, config.JOURNAL_GROUP_COMMIT_SIZE, config.SNAPSHOT_INTERVAL
+) if config.JOURNAL_DIR else None
+matching_scheduler = MatchingScheduler(run_matching_cycle)
+matching_pool = MatchingPool(config.MATCHING_WORKERS) if config.MATCHING_WORKERS > 0 else None
+
+
+async def dispatch(command: Command) -> CommandResult:
+    if matching_pool is not None:
+        return await matching_pool.submit(command)
+    return await matching_scheduler.submit(command)
+
+
+async def drop_order_book(instrument_id: UUID4) -> None:
+    await matching_scheduler.remove(instrument_id)
+    matching_engine.books.pop(instrument_id, None)
+    if journal_store is not None:
+        journal_store.remove(instrument_id)
+
+
+async def dispatch_drop(instrument_id: UUID4) -> None:
+    if matching_pool is not None:
+        await matching_pool.drop(instrument_id)
+    else:
+        await drop_order_book(instrument_id)
+
+
+async def start_matching(db_session: AsyncSession) -> None:
+    if matching_pool is None:
+        await restore_order_books(db_session)
+    else:
+        # Инструменты распределяются между процессами; каждый процесс единолично владеет своими стаканами
+        await matching_pool.start(instrument_ids=instrument_registry.ids())
+
+    # Журнал балансов загружается после восстановления стаканов, когда все расчёты уже в базе
+    await balance_ledger.start(db_session, instrument_registry.get(DEFAULT_TICKER).id)
+
+
+async def stop_matching() -> None:
+    if matching_pool is not None:
+        await matching_pool.stop()
+    await matching_scheduler.stop()
+    await balance_ledger.stop()
+    if journal_store is not None:
+        journal_store.close()
@@ -0,0 +1,143 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import Boolean, DECIMAL, case, column, literal, update, values
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.balance.models import Balance
+from src.order.engine import BookOrder, Fill
+from src.order.enums import Direction, OrderEventType, OrderStatus
+from src.order.models import Order, OrderEvent
+from src.transaction.models import Trade
+
+
+class Settlement:
+    def __init__(self, quote_instrument_id: uuid.UUID):
+        self.quote_instrument_id = quote_instrument_id
+        self.balance_deltas: Dict[Tuple[uuid.UUID, uuid.UUID], List[Decimal]] = defaultdict(
+            lambda: [Decimal(0), Decimal(0)]
+        )
+        self.filled: Dict[uuid.UUID, Decimal] = defaultdict(Decimal)
+        self.canceled: Set[uuid.UUID] = set()
+        self.trades: List[dict] = []
+        self.events: List[dict] = []
+        self.updated_at = datetime.utcnow()
+
+    def __bool__(self) -> bool:
+        return bool(self.balance_deltas or self.filled or self.canceled or self.trades or self.events)
+
+    def add_fills(self, fills: Iterable[Fill]) -> None:
+        for fill in fills:
+            volume = fill.quantity * fill.price
+
+            # Покупатель платит по цене сделки и снимает блокировку по цене своей заявки
+            self._add_balance(fill.buy_user_id, self.quote_instrument_id, -volume, -fill.buy_unlock)
+            self._add_balance(fill.buy_user_id, fill.instrument_id, fill.quantity, 0)
+            self._add_balance(fill.sell_user_id, fill.instrument_id, -fill.quantity, -fill.sell_unlock)
+            self._add_balance(fill.sell_user_id, self.quote_instrument_id, volume, 0)
+
+            self.filled[fill.buy_order_id] += fill.quantity
+            self.filled[fill.sell_order_id] += fill.quantity
+            self.trades.append({
+                "id": uuid.uuid4(),
+                "instrument_id": fill.instrument_id,
+                "buy_order_id": fill.buy_order_id,
+                "sell_order_id": fill.sell_order_id,
+                "price": fill.price,
+                "quantity": fill.quantity,
+                "aggressor": fill.aggressor,
+                "executed_at": fill.executed_at,
+            })
+
+    def add_release(self, order: BookOrder, unlock: Decimal) -> None:
+        remaining_qty = order.remaining
+        if unlock:
+            self._add_balance(order.user_id, self.quote_instrument_id if order.direction == Direction.buy else
+                              order.instrument_id, 0, -unlock)
+
+        self.canceled.add(order.id)
+        self.events.append({
+            "order_id": order.id,
+            "event": OrderEventType.canceled,
+            "quantity": remaining_qty,
+            "price": order.price,
+            "created_at": self.updated_at,
+        })
+
+    async def apply(self, db_session: AsyncSession) -> None:
+        await self._apply_balances(db_session)
+        await self._apply_orders(db_session)
+
+        if self.trades:
+            await db_session.execute(insert(Trade).values(self.trades))
+        if self.events:
+            await db_session.execute(insert(OrderEvent).values(self.events))
+
+    def _add_balance(self, user_id: uuid.UUID, instrument_id: uuid.UUID, amount, locked_amount) -> None:
+        delta = self.balance_deltas[(user_id, instrument_id)]
+        delta[0] += amount
+        delta[1] += locked_amount
+
+    async def _apply_balances(self, db_session: AsyncSession) -> None:
+        await apply_balance_deltas(db_session, self.balance_deltas)
+
+    async def _apply_orders(self, db_session: AsyncSession) -> None:
+        order_ids = self.filled.keys() | self.canceled
+        if not order_ids:
+            return
+
+        changes = values(
+            column("id", UUID(as_uuid=True)),
+            column("filled", DECIMAL(20, 8)),
+            column("canceled", Boolean()),
+            name="changes",
+        ).data([
+            (order_id, self.filled.get(order_id, Decimal(0)), order_id in self.canceled)
+            for order_id in order_ids
+        ])
+
+        filled_quantity = Order.filled_quantity + changes.c.filled
+        await db_session.execute(
+            update(Order)
+            .where(Order.id == changes.c.id)
+            .values(
+                filled_quantity=filled_quantity,
+                status=case(
+                    (changes.c.canceled, literal(OrderStatus.canceled, Order.status.type)),
+                    (filled_quantity >= Order.quantity, literal(OrderStatus.executed, Order.status.type)),
+                    else_=literal(OrderStatus.partially_filled, Order.status.type),
+                ),
+                updated_at=self.updated_at,
+            ),
+            execution_options={"synchronize_session": False},
+        )
+
+
+async def apply_balance_deltas(db_session: AsyncSession,
+                               deltas: Dict[Tuple[uuid.UUID, uuid.UUID], List[Decimal]]) -> None:
+    # Строки сортируются, чтобы параллельные транзакции блокировали балансы в одном порядке.
+    # Приращения коммутативны: блокировки из журнала балансов и расчёты сделок могут приходить в любом порядке
+    rows = [
+        {"id": uuid.uuid4(), "user_id": user_id, "instrument_id": instrument_id, "amount": amount,
+         "locked_amount": locked_amount}
+        for (user_id, instrument_id), (amount, locked_amount) in sorted(deltas.items())
+        if amount or locked_amount
+    ]
+    if not rows:
+        return
+
+    statement = insert(Balance).values(rows)
+    await db_session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[Balance.user_id, Balance.instrument_id],
+            set_={
+                "amount": Balance.amount + statement.excluded.amount,
+                "locked_amount": Balance.locked_amount + statement.excluded.locked_amount,
+            },
+        ),
+        execution_options={"synchronize_session": False},
+    )
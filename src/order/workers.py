@@ -0,0 +1,245 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from src import config
+from src.balance.ledger import balance_ledger
+from src.core.metrics import metrics
+from src.instrument.registry import instrument_registry
+from src.order.engine import Command, CommandResult
+from src.order.market_data import market_data
+
+log = logging.getLogger(__name__)
+
+WORKER_JOIN_TIMEOUT = 10
+WORKER_POLL_INTERVAL = 0.5
+
+
+class MatchingWorkerError(Exception):
+    pass
+
+
+class MatchingPool:
+    def __init__(self, size: int):
+        self.size = size
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[multiprocessing.Process] = []
+        self._inboxes: List[multiprocessing.Queue] = []
+        self._readers: List[threading.Thread] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._owners: Dict[uuid.UUID, int] = {}
+        # Запрос -> (номер воркера, future): при падении воркера его запросы завершаются ошибкой
+        self._futures: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._request_ids = itertools.count()
+        self._ready_workers: Set[int] = set()
+        self._down: Set[int] = set()
+        self._ready: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def owner(self, instrument_id: uuid.UUID) -> int:
+        index = self._owners.get(instrument_id)
+        return index if index is not None else instrument_id.int % self.size
+
+    async def start(self, instrument_ids: Sequence[uuid.UUID]) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        self._ready_workers, self._down = set(), set()
+        self._ready = asyncio.Event()
+        self._owners = {instrument_id: i % self.size for i, instrument_id in enumerate(instrument_ids)}
+
+        self._inboxes = [None] * self.size
+        self._processes = [None] * self.size
+        self._readers = [None] * self.size
+        for index in range(self.size):
+            self._spawn(index)
+
+        # Ждём, пока воркеры восстановят стаканы и рассчитают незавершённые циклы
+        try:
+            await asyncio.wait_for(self._ready.wait(), config.MATCHING_WORKER_START_TIMEOUT)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise MatchingWorkerError(
+                f"Matching workers did not start in {config.MATCHING_WORKER_START_TIMEOUT} seconds"
+            )
+        if self._down:
+            await self.stop()
+            raise MatchingWorkerError("Matching worker exited during startup")
+
+    async def submit(self, command: Command) -> CommandResult:
+        return await self._request(command.instrument_id, "submit", command)
+
+    async def drop(self, instrument_id: uuid.UUID) -> None:
+        await self._request(instrument_id, "drop", instrument_id)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            await self._loop.run_in_executor(None, process.join, WORKER_JOIN_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+
+        # Читатель завершается сам, когда его воркер завершился и очередь вычитана
+        for reader in self._readers:
+            await self._loop.run_in_executor(None, reader.join)
+
+        for _, future in self._futures.values():
+            if not future.done():
+                future.set_exception(MatchingWorkerError("Matching pool stopped"))
+
+        self._futures.clear()
+        self._inboxes.clear()
+        self._processes.clear()
+        self._readers.clear()
+
+    async def _request(self, instrument_id: uuid.UUID, message_type: str, payload: Any) -> Any:
+        index = self.owner(instrument_id)
+        if index in self._down:
+            raise MatchingWorkerError(f"Matching worker {index} is down")
+
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        self._futures[request_id] = (index, future)
+
+        self._inboxes[index].put((message_type, request_id, payload))
+
+        return await future
+
+    def _spawn(self, index: int) -> None:
+        # У каждого воркера своя очередь ответов: процесс, упавший посреди записи, оставляет занятой
+        # блокировку очереди, и общая очередь остановила бы ответы всех воркеров
+        inbox, outbox = self._context.Queue(), self._context.Queue()
+        # Список собирается при каждом запуске: перезапущенный воркер должен восстановить и инструменты,
+        # добавленные после старта пула
+        partition = [
+            instrument_id for instrument_id in instrument_registry.ids() if self.owner(instrument_id) == index
+        ]
+        process = self._context.Process(
+            target=run_worker,
+            args=(partition, inbox, outbox),
+            name=f"matching-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        reader = threading.Thread(target=self._read_results, args=(index, process, outbox),
+                                  name=f"matching-results-{index}", daemon=True)
+        reader.start()
+        self._inboxes[index] = inbox
+        self._processes[index] = process
+        self._readers[index] = reader
+
+    def _worker_exited(self, index: int, process: multiprocessing.Process) -> None:
+        if self._stopping or self._processes[index] is not process:
+            return
+        log.error("Matching worker %d exited with code %s", index, process.exitcode)
+
+        # Команды, отправленные воркеру, могли быть исполнены и рассчитаны до падения — исход неизвестен
+        for request_id, (owner, future) in list(self._futures.items()):
+            if owner == index:
+                del self._futures[request_id]
+                if not future.done():
+                    future.set_exception(MatchingWorkerError(f"Matching worker {index} exited"))
+
+        # Успевший запуститься воркер перезапускается и восстанавливает стаканы из журнала и базы;
+        # упавший при запуске не перезапускается, и заявки его инструментов отклоняются
+        if index in self._ready_workers:
+            self._ready_workers.discard(index)
+            self._spawn(index)
+        else:
+            self._down.add(index)
+            self._ready.set()
+
+    def _read_results(self, index: int, process: multiprocessing.Process, outbox: multiprocessing.Queue) -> None:
+        while True:
+            try:
+                message = outbox.get(timeout=WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                # Всё, что воркер успел записать до выхода, уже вычитано — его ответы разобраны раньше,
+                # чем оставшиеся запросы завершатся ошибкой
+                if not process.is_alive():
+                    process.join()
+                    self._loop.call_soon_threadsafe(self._worker_exited, index, process)
+                    break
+                continue
+
+            message_type, *payload = message
+            if message_type == "market_data":
+                self._loop.call_soon_threadsafe(market_data.publish, *payload)
+            elif message_type == "metric":
+                self._loop.call_soon_threadsafe(metrics.apply, *payload)
+            elif message_type == "balances":
+                self._loop.call_soon_threadsafe(balance_ledger.apply_deltas, *payload)
+            elif message_type == "ready":
+                self._loop.call_soon_threadsafe(self._worker_ready, index)
+            else:
+                self._loop.call_soon_threadsafe(self._resolve, *payload)
+
+    def _worker_ready(self, index: int) -> None:
+        self._ready_workers.add(index)
+        if len(self._ready_workers) == self.size:
+            self._ready.set()
+
+    def _resolve(self, request_id: int, ok: bool, payload: Any) -> None:
+        # Балансы уже обновлены сообщением "balances", которое воркер отправил раньше ответа
+        _, future = self._futures.pop(request_id, (None, None))
+        if future is None or future.done():
+            return
+
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(MatchingWorkerError(payload))
+
+
+def run_worker(instrument_ids: List[uuid.UUID], inbox: multiprocessing.Queue, outbox: multiprocessing.Queue) -> None:
+    asyncio.run(_serve(instrument_ids, inbox, outbox))
+
+
+async def _serve(instrument_ids: List[uuid.UUID], inbox: multiprocessing.Queue, outbox: multiprocessing.Queue) -> None:
+    # Импорт внутри процесса: у каждого воркера свои стаканы, планировщик и пул соединений
+    from src.dependencies import session_factory
+    from src.order.service import drop_order_book, restore_order_books, stop_matching, matching_scheduler
+
+    market_data.forward = lambda update: outbox.put(("market_data", update))
+    # Метрики воркера (циклы матчинга, запросы к базе) выдаёт /metrics API-процесса
+    metrics.forward = lambda name, values, amount: outbox.put(("metric", name, values, amount))
+    balance_ledger.forward = lambda deltas: outbox.put(("balances", deltas))
+
+    # Справочник перечитывается по pg_notify, как в API-процессе, иначе воркер не знает инструментов,
+    # добавленных после его запуска; подписка до загрузки, чтобы не пропустить изменение между ними
+    await instrument_registry.listen()
+    async with session_factory() as db_session:
+        await instrument_registry.load(db_session)
+        await restore_order_books(db_session, instrument_ids=instrument_ids)
+    outbox.put(("ready",))
+
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    handlers = {"submit": matching_scheduler.submit, "drop": drop_order_book}
+
+    async def handle(request_id: int, message_type: str, payload: Any) -> None:
+        try:
+            outbox.put(("result", request_id, True, await handlers[message_type](payload)))
+        except Exception as e:
+            outbox.put(("result", request_id, False, f"{type(e).__name__}: {e}"))
+
+    while True:
+        message = await loop.run_in_executor(None, inbox.get)
+        if message is None:
+            break
+
+        message_type, request_id, payload = message
+        task = asyncio.create_task(handle(request_id, message_type, payload))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await stop_matching()
+    await instrument_registry.stop()
@@ -1 +1 @@
-from .models import Transaction
\ No newline at end of file
+from .models import Trade
\ No newline at end of file
@@ -0,0 +1,198 @@
+import bisect
+import json
+import os
+import struct
+import uuid
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src import config
+from src.order.enums import Direction
+
+MAGIC = b"TRD1"
+FOOTER = struct.Struct(">QI")  # смещение и длина оглавления
+COLUMN_HEADER = struct.Struct(">I")
+EPOCH = datetime(1970, 1, 1)
+NIL_ID = bytes(16)
+AGGRESSORS = {Direction.buy: b"B", Direction.sell: b"S"}
+SUFFIX = ".trd"
+
+Key = Tuple[datetime, uuid.UUID]
+
+
+class ArchivedTrade(NamedTuple):
+    executed_at: datetime
+    id: uuid.UUID
+    buy_order_id: Optional[uuid.UUID]
+    sell_order_id: Optional[uuid.UUID]
+    aggressor: Direction
+    price: Decimal
+    quantity: Decimal
+
+
+def _micros(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+class SegmentWriter:
+    # Сегмент — выгрузка одной секции: на инструмент блок колонок, каждая колонка сжата отдельно.
+    # Строки блока идут от новых к старым по (executed_at, id), как в индексе истории
+    def __init__(self, path: str, lower: datetime, upper: datetime):
+        self.path = path
+        self.lower = lower
+        self.upper = upper
+        self.rows = 0
+        self.blocks: Dict[str, List[int]] = {}
+        self._file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> "SegmentWriter":
+        self._file = open(self.path + ".tmp", "wb")
+        self._file.write(MAGIC)
+        return self
+
+    def write_block(self, instrument_id: uuid.UUID, rows: Sequence[ArchivedTrade]) -> None:
+        offset = self._file.tell()
+
+        # Отметки времени хранятся разностями соседних строк — так они сжимаются в разы лучше
+        timestamps = [_micros(row.executed_at) for row in rows]
+        deltas = [timestamps[0]] + [current - previous for previous, current in zip(timestamps, timestamps[1:])]
+        columns = (
+            struct.pack(f">{len(deltas)}q", *deltas),
+            b"".join(row.id.bytes for row in rows),
+            b"".join(row.buy_order_id.bytes if row.buy_order_id else NIL_ID for row in rows),
+            b"".join(row.sell_order_id.bytes if row.sell_order_id else NIL_ID for row in rows),
+            b"".join(AGGRESSORS[row.aggressor] for row in rows),
+            "\n".join(str(row.price) for row in rows).encode(),
+            "\n".join(str(row.quantity) for row in rows).encode(),
+        )
+        for column in columns:
+            compressed = zlib.compress(column, 6)
+            self._file.write(COLUMN_HEADER.pack(len(compressed)) + compressed)
+
+        self.blocks[str(instrument_id)] = [offset, self._file.tell() - offset, len(rows)]
+        self.rows += len(rows)
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        try:
+            if exc_type is None:
+                footer = zlib.compress(json.dumps({
+                    "lower": self.lower.isoformat(), "upper": self.upper.isoformat(), "rows": self.rows,
+                    "blocks": self.blocks,
+                }).encode())
+                offset = self._file.tell()
+                self._file.write(footer + FOOTER.pack(offset, len(footer)) + MAGIC)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+
+        if exc_type is None:
+            os.replace(self.path + ".tmp", self.path)
+        else:
+            os.remove(self.path + ".tmp")
+
+
+class Segment:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            file.seek(-FOOTER.size - len(MAGIC), os.SEEK_END)
+            offset, length = FOOTER.unpack(file.read(FOOTER.size))
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a trades archive segment")
+            file.seek(offset)
+            footer = json.loads(zlib.decompress(file.read(length)))
+
+        self.lower = datetime.fromisoformat(footer["lower"])
+        self.upper = datetime.fromisoformat(footer["upper"])
+        self.rows = footer["rows"]
+        self.blocks: Dict[str, List[int]] = footer["blocks"]
+
+    def read(self, instrument_id: uuid.UUID) -> List[ArchivedTrade]:
+        block = self.blocks.get(str(instrument_id))
+        return _read_block(self.path, *block) if block is not None else []
+
+
+@lru_cache(maxsize=64)
+def _read_block(path: str, offset: int, length: int, rows: int) -> List[ArchivedTrade]:
+    # Разжатые блоки кэшируются: листание истории читает один и тот же блок страница за страницей
+    with open(path, "rb") as file:
+        file.seek(offset)
+        data = file.read(length)
+
+    columns, position = [], 0
+    while position < len(data):
+        (size,) = COLUMN_HEADER.unpack_from(data, position)
+        position += COLUMN_HEADER.size
+        columns.append(zlib.decompress(data[position:position + size]))
+        position += size
+
+    deltas, ids, buy_order_ids, sell_order_ids, aggressors, prices, quantities = columns
+    micros, timestamps = 0, []
+    for delta in struct.unpack(f">{rows}q", deltas):
+        micros += delta
+        timestamps.append(EPOCH + timedelta(microseconds=micros))
+
+    return [
+        ArchivedTrade(
+            executed_at=timestamps[i],
+            id=uuid.UUID(bytes=ids[i * 16:i * 16 + 16]),
+            buy_order_id=_order_id(buy_order_ids, i),
+            sell_order_id=_order_id(sell_order_ids, i),
+            aggressor=Direction.buy if aggressors[i:i + 1] == b"B" else Direction.sell,
+            price=Decimal(price),
+            quantity=Decimal(quantity),
+        )
+        for i, (price, quantity) in enumerate(zip(prices.decode().split("\n"), quantities.decode().split("\n")))
+    ]
+
+
+def _order_id(column: bytes, i: int) -> Optional[uuid.UUID]:
+    value = column[i * 16:i * 16 + 16]
+    return uuid.UUID(bytes=value) if value != NIL_ID else None
+
+
+class TransactionArchive:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.segments: List[Segment] = []
+
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(SUFFIX):
+                self.segments.append(Segment(os.path.join(directory, name)))
+        self.segments.sort(key=lambda segment: segment.lower, reverse=True)
+
+    def writer(self, name: str, lower: datetime, upper: datetime) -> SegmentWriter:
+        return SegmentWriter(os.path.join(self.directory, name + SUFFIX), lower, upper)
+
+    def add(self, path: str) -> None:
+        # Повторная выгрузка той же секции заменяет сегмент
+        segment = Segment(path)
+        _read_block.cache_clear()
+        self.segments = [existing for existing in self.segments if existing.path != path] + [segment]
+        self.segments.sort(key=lambda segment: segment.lower, reverse=True)
+
+    def page(self, instrument_id: uuid.UUID, before: Optional[Key], limit: int) -> List[ArchivedTrade]:
+        # Сегменты от новых к старым; в каждом блоке граница курсора ищется бинарным поиском
+        result: List[ArchivedTrade] = []
+        for segment in self.segments:
+            if len(result) >= limit:
+                break
+            if before is not None and segment.lower > before[0]:
+                continue
+
+            rows = segment.read(instrument_id)
+            start = 0
+            if before is not None:
+                start = bisect.bisect_left(rows, True, key=lambda row: (row.executed_at, row.id) < before)
+            result.extend(rows[start:start + limit - len(result)])
+        return result
+
+
+transaction_archive = TransactionArchive(
+    config.TRANSACTIONS_ARCHIVE_DIR
+) if config.TRANSACTIONS_ARCHIVE_DIR else None
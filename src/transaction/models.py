@@ -1,26 +1,44 @@
 import uuid
 
-from sqlalchemy import ForeignKey, DECIMAL, DateTime, func
+from sqlalchemy import ForeignKey, DECIMAL, DateTime, Enum, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core.database import Base
+from src.order.enums import Direction
 
 
-class Transaction(Base):
-    __tablename__ = "transactions"
+class Trade(Base):
+    __tablename__ = "trades"
 
+    # Одна строка на сделку: обе стороны в ней же, отмены сюда не пишутся
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    order_id: Mapped[uuid.UUID | None] = mapped_column(
+    instrument_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("instruments.id", ondelete="RESTRICT"),
+        nullable=False
+    )
+    buy_order_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("orders.id", ondelete="SET NULL"),
         nullable=True
     )
-    instrument_id: Mapped[uuid.UUID] = mapped_column(
+    sell_order_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
-        ForeignKey("instruments.id", ondelete="RESTRICT"),
-        nullable=False
+        ForeignKey("orders.id", ondelete="SET NULL"),
+        nullable=True
     )
     price: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
     quantity: Mapped[float] = mapped_column(DECIMAL(20, 8), nullable=False)
-    executed_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.current_timestamp())
\ No newline at end of file
+    aggressor: Mapped[Direction] = mapped_column(Enum(Direction), nullable=False)
+    # Таблица секционирована по месяцам executed_at, поэтому он входит в первичный ключ
+    executed_at: Mapped[DateTime] = mapped_column(DateTime, primary_key=True, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index(
+            "ix_trades_instrument_id_executed_at",
+            instrument_id, executed_at.desc(), id.desc(),
+            postgresql_include=["price", "quantity"],
+        ),
+        {"postgresql_partition_by": "RANGE (executed_at)"},
+    )
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import config
+from src.dependencies import session_factory
+from src.order.enums import Direction
+from src.transaction.archive import ArchivedTrade, TransactionArchive, transaction_archive
+
+log = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^trades_y(\d{4})m(\d{2})$")
+EXPORT_BATCH_SIZE = 5000
+
+
+def month_start(timestamp: datetime) -> datetime:
+    return datetime(timestamp.year, timestamp.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"trades_y{month.year:04d}m{month.month:02d}"
+
+
+class TransactionPartitions:
+    def __init__(self, archive: Optional[TransactionArchive], ahead: int = 3, hot_months: int = 6,
+                 interval: float = 3600.0):
+        self.archive = archive
+        self.ahead = ahead
+        self.hot_months = hot_months
+        self.interval = interval
+        self._maintainer: Optional[asyncio.Task] = None
+
+    async def start(self, db_session: AsyncSession) -> None:
+        # Секции на ближайшие месяцы должны существовать до первой записи сделки
+        await self.create_partitions(db_session)
+        await db_session.commit()
+        self._maintainer = asyncio.create_task(self._maintain_periodically())
+
+    async def stop(self) -> None:
+        if self._maintainer is not None:
+            self._maintainer.cancel()
+            await asyncio.gather(self._maintainer, return_exceptions=True)
+            self._maintainer = None
+
+    async def partitions(self, db_session: AsyncSession) -> List[datetime]:
+        result = await db_session.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'trades'::regclass"
+        ))
+        months = []
+        for (name,) in result:
+            match = PARTITION_NAME.match(name)
+            if match:
+                months.append(datetime(int(match[1]), int(match[2]), 1))
+        return sorted(months)
+
+    async def create_partitions(self, db_session: AsyncSession) -> None:
+        existing = set(await self.partitions(db_session))
+        current = month_start(datetime.utcnow())
+        for offset in range(self.ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                await db_session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF trades "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+                log.info("Created trades partition %s", partition_name(month))
+
+    async def archive_cold(self) -> None:
+        if self.archive is None:
+            return
+
+        cutoff = add_months(month_start(datetime.utcnow()), -self.hot_months)
+        async with session_factory() as db_session:
+            months = [month for month in await self.partitions(db_session) if add_months(month, 1) <= cutoff]
+        for month in months:
+            await self.archive_partition(month)
+
+    async def archive_partition(self, month: datetime) -> None:
+        name = partition_name(month)
+        async with session_factory() as db_session:
+            rows = await db_session.stream(text(
+                f"SELECT instrument_id, executed_at, id, buy_order_id, sell_order_id, aggressor, price, quantity "
+                f"FROM {name} "
+                f"ORDER BY instrument_id, executed_at DESC, id DESC"
+            ).execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+            # Строки идут по инструментам, поэтому в памяти держится только блок текущего инструмента
+            with self.archive.writer(name, month, add_months(month, 1)) as writer:
+                instrument_id, block = None, []
+                async for row in rows:
+                    if row.instrument_id != instrument_id and block:
+                        await asyncio.to_thread(writer.write_block, instrument_id, block)
+                        block = []
+                    instrument_id = row.instrument_id
+                    block.append(ArchivedTrade(row.executed_at, row.id, row.buy_order_id, row.sell_order_id,
+                                               Direction[row.aggressor], row.price, row.quantity))
+                if block:
+                    await asyncio.to_thread(writer.write_block, instrument_id, block)
+
+            # Сегмент подключается до удаления секции: история листается по курсору, так что
+            # строки, которые пока есть и в секции, и в сегменте, не отдаются дважды
+            self.archive.add(writer.path)
+            await db_session.execute(text(f"DROP TABLE {name}"))
+            await db_session.commit()
+        log.info("Archived trades partition %s: %d rows", name, writer.rows)
+
+    async def maintain(self) -> None:
+        async with session_factory() as db_session:
+            await self.create_partitions(db_session)
+            await db_session.commit()
+        await self.archive_cold()
+
+    async def _maintain_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.maintain()
+            except Exception as e:
+                log.warning("Failed to maintain trades partitions: %s", e)
+
+
+transaction_partitions = TransactionPartitions(
+    transaction_archive, config.TRANSACTIONS_PARTITIONS_AHEAD, config.TRANSACTIONS_HOT_MONTHS,
+    config.TRANSACTIONS_MAINTENANCE_INTERVAL,
+)
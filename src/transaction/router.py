@@ -1,16 +1,18 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.enums import ApiTags
-from src.dependencies import get_session
+from src.core.metrics import TimedRoute
+from src.dependencies import get_read_session
 from src.transaction import service
 from src.transaction.schemas import Transaction
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/public/transactions/{ticker}", tags=[ApiTags.PUBLIC], response_model=List[Transaction])
-async def get_transaction_history(ticker: str, limit: int = 0, db_session: AsyncSession = Depends(get_session)):
-    return await service.get_transaction_history(ticker=ticker, limit=limit, db_session=db_session)
\ No newline at end of file
+async def get_transaction_history(ticker: str, limit: int = 0, cursor: Optional[str] = None,
+                                  db_session: AsyncSession = Depends(get_read_session)):
+    return await service.get_transaction_history(ticker=ticker, limit=limit, cursor=cursor, db_session=db_session)
\ No newline at end of file
@@ -1,11 +1,65 @@
-from typing import List
+import asyncio
+from typing import Optional, Union
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import Response, StreamingResponse
 
-from src.dependencies import get_session
+from src import config
+from src.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_page, stream_json_array
+from src.core.serialization import dump_json
+from src.dependencies import get_read_session, session_factory_for
+from src.instrument.registry import instrument_registry
+from src.transaction.archive import transaction_archive
+from src.transaction.models import Trade
 from src.transaction.schemas import Transaction
 
 
-async def get_transaction_history(ticker: str, limit: int, db_session: AsyncSession = Depends(get_session)) -> List[Transaction]:
-    pass
\ No newline at end of file
+async def get_transaction_history(ticker: str, limit: int, cursor: Optional[str] = None,
+                                  db_session: AsyncSession = Depends(get_read_session)
+                                  ) -> Union[Response, StreamingResponse]:
+    instrument = instrument_registry.get(ticker)
+    if instrument is None:
+        raise HTTPException(status_code=404, detail="Ticker not found")
+
+    # Страница читается по индексу (instrument_id, executed_at DESC, id DESC)
+    limit = min(limit if limit > 0 else config.TRANSACTIONS_PAGE_SIZE, config.TRANSACTIONS_MAX_PAGE_SIZE)
+    query, headers = await keyset_page(
+        db_session,
+        select(Trade.quantity, Trade.price, Trade.executed_at, Trade.id)
+        .where(Trade.instrument_id == instrument.id)
+        .order_by(Trade.executed_at.desc(), Trade.id.desc()),
+        Trade.executed_at, Trade.id, limit, cursor,
+    )
+
+    if NEXT_CURSOR_HEADER in headers or transaction_archive is None:
+        return stream_json_array(query, lambda row: render_transaction(row, ticker), headers,
+                                 session_factory_for(db_session))
+
+    # Секции в базе закончились на этой странице: остаток добирается из выгруженных сегментов,
+    # которые всегда старше оставшихся секций
+    rows = (await db_session.execute(query)).all()
+    before = (rows[-1].executed_at, rows[-1].id) if rows else decode_cursor(cursor) if cursor else None
+    missing = limit - len(rows)
+    archived = await asyncio.to_thread(transaction_archive.page, instrument.id, before, missing + 1)
+
+    rows += archived[:missing]
+    if len(archived) > missing:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].executed_at, rows[-1].id)
+    content = b"[" + b",".join(render_transaction(row, ticker) for row in rows) + b"]"
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def render_transaction(row: Row, ticker: str) -> bytes:
+    transaction = {
+        "ticker": ticker,
+        "amount": int(row.quantity),
+        "price": int(row.price),
+        "timestamp": row.executed_at,
+    }
+    if not config.FAST_SERIALIZATION:
+        return Transaction.model_validate(transaction).model_dump_json().encode()
+    # JSON собирается напрямую, без модели Transaction на каждую строку; формат совпадает со схемой Transaction
+    return dump_json(transaction)
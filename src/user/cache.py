@@ -0,0 +1,69 @@
+import hmac
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src import config
+from src.core.metrics import metrics
+from src.user.models import User as UserDAL
+
+
+class AuthCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key_id -> (проверенная подпись, пользователь, момент истечения)
+        self._entries: OrderedDict[str, Tuple[str, UserDAL, float]] = OrderedDict()
+
+    def get(self, key_id: str, signature: str) -> Optional[UserDAL]:
+        entry = self._entries.get(key_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        verified_signature, user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key_id]
+            self.misses += 1
+            return None
+
+        if not hmac.compare_digest(signature, verified_signature):
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key_id)
+        self.hits += 1
+        return user
+
+    def put(self, key_id: str, signature: str, user: UserDAL) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._entries[key_id] = (signature, user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key_id: str) -> None:
+        self._entries.pop(key_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+auth_cache = AuthCache(config.AUTH_CACHE_SIZE, config.AUTH_CACHE_TTL)
+
+metrics.gauge("auth_cache_entries", "Verified API keys held in the authentication cache.",
+              function=lambda: {(): auth_cache.stats()["size"]})
+metrics.gauge("auth_cache_lookups", "Authentication cache lookups since start.", labels=("result",),
+              function=lambda: {("hit",): auth_cache.hits, ("miss",): auth_cache.misses})
@@ -4,11 +4,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
 from src.core.enums import ApiTags
+from src.core.metrics import TimedRoute
 from src.dependencies import get_session
 from src.user import service
 from src.user.schemas import NewUser, User
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.post("/public/register", tags=[ApiTags.PUBLIC], response_model=User)
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 from starlette.status import HTTP_409_CONFLICT, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
 
+from src.user.cache import auth_cache
 from src.user.enums import UserRole
 from src.user.models import User as UserDAL
 from src.user.schemas import NewUser
@@ -53,5 +54,6 @@ async def delete_user(*, user_id: UUID4, request: Request, db_session: AsyncSess
 
     await db_session.delete(existing_user)
     await db_session.commit()
+    auth_cache.invalidate(existing_user.api_key)
 
     return UserDTO(id=user_id, name=existing_user.username, role=existing_user.role, api_key=existing_user.api_key)
\ No newline at end of file
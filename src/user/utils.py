@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.status import HTTP_401_UNAUTHORIZED
 
 from src import config
+from src.user.cache import auth_cache
 from src.user.models import User as UserDAL
 
 TOKEN_PREFIX = "TOKEN"
@@ -40,10 +41,19 @@ async def get_user(api_key: str, db_session: AsyncSession) -> UserDAL:
     except ValueError:
         raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid API key.")
 
+    # Повторные запросы с тем же ключом не пересчитывают HMAC и не ходят в базу
+    user = auth_cache.get(key_id, signature)
+    if user is not None:
+        return user
+
     secret = get_secret_key()
     expected_sig = hmac.new(str(secret).encode(), key_id.encode(), hashlib.sha256).hexdigest()
 
     if not hmac.compare_digest(signature, expected_sig):
         raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid API key.")
 
-    return (await db_session.execute(select(UserDAL).filter_by(api_key=key_id))).scalar_one_or_none()
\ No newline at end of file
+    user = (await db_session.execute(select(UserDAL).filter_by(api_key=key_id))).scalar_one_or_none()
+    if user is not None:
+        auth_cache.put(key_id, signature, user)
+
+    return user
\ No newline at end of file
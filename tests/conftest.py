@@ -0,0 +1,8 @@
+import os
+
+# Пакеты приложения читают настройки при импорте. Тестам без базы хватает заглушек;
+# значения из окружения и .env остаются в силе
+if not os.path.exists(".env"):
+    os.environ.setdefault("DATABASE_HOSTNAME", "localhost")
+    os.environ.setdefault("DATABASE_CREDENTIALS", "postgres:postgres")
+    os.environ.setdefault("SECRET_KEY", "test")
@@ -0,0 +1,100 @@
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.order.enums import Direction
+from src.transaction.archive import ArchivedTrade, Segment, TransactionArchive
+
+INSTRUMENT_ID = uuid.uuid4()
+OTHER_ID = uuid.uuid4()
+JANUARY = datetime(2026, 1, 1)
+FEBRUARY = datetime(2026, 2, 1)
+MARCH = datetime(2026, 3, 1)
+
+
+def trades(since: datetime, count: int) -> list:
+    # От новых к старым по (executed_at, id), как в индексе истории; две сделки делят отметку времени
+    rows = [
+        ArchivedTrade(executed_at=since + timedelta(hours=i // 2), id=uuid.uuid4(), buy_order_id=uuid.uuid4(),
+                      sell_order_id=None if i % 3 == 0 else uuid.uuid4(),
+                      aggressor=Direction.buy if i % 2 else Direction.sell, price=Decimal(100 + i),
+                      quantity=Decimal(i + 1))
+        for i in range(count)
+    ]
+    return sorted(rows, key=lambda row: (row.executed_at, row.id), reverse=True)
+
+
+@pytest.fixture
+def archived(tmp_path):
+    archive = TransactionArchive(str(tmp_path))
+    segments = {}
+    for name, lower, upper in (("trades_2026_01", JANUARY, FEBRUARY), ("trades_2026_02", FEBRUARY, MARCH)):
+        rows = segments[name] = trades(lower, 7)
+        with archive.writer(name, lower, upper) as writer:
+            writer.write_block(INSTRUMENT_ID, rows)
+            writer.write_block(OTHER_ID, trades(lower, 2))
+        archive.add(writer.path)
+    return archive, segments["trades_2026_02"] + segments["trades_2026_01"]
+
+
+def test_segment_round_trip(archived):
+    archive, expected = archived
+    segment = Segment(archive.segments[0].path)
+
+    assert (segment.lower, segment.upper, segment.rows) == (FEBRUARY, MARCH, 9)
+    assert segment.read(INSTRUMENT_ID) == expected[:7]
+    assert segment.read(uuid.uuid4()) == []
+
+
+def test_pages_follow_cursor_across_segments(archived):
+    archive, expected = archived
+    pages, before = [], None
+    while True:
+        page = archive.page(INSTRUMENT_ID, before, 4)
+        if not page:
+            break
+        pages.append(page)
+        before = (page[-1].executed_at, page[-1].id)
+
+    assert [len(page) for page in pages] == [4, 4, 4, 2]
+    assert [row for page in pages for row in page] == expected
+
+
+def test_cursor_between_rows_with_same_timestamp(archived):
+    archive, expected = archived
+    first, second = expected[1], expected[2]
+    assert first.executed_at == second.executed_at
+
+    assert archive.page(INSTRUMENT_ID, (first.executed_at, first.id), 1) == [second]
+
+
+def test_reopened_archive_finds_segments(archived):
+    archive, expected = archived
+    reopened = TransactionArchive(archive.directory)
+
+    assert [segment.lower for segment in reopened.segments] == [FEBRUARY, JANUARY]
+    assert reopened.page(INSTRUMENT_ID, None, 100) == expected
+
+
+def test_rewritten_segment_replaces_previous(archived):
+    archive, expected = archived
+    rows = trades(JANUARY, 1)
+    with archive.writer("trades_2026_01", JANUARY, FEBRUARY) as writer:
+        writer.write_block(INSTRUMENT_ID, rows)
+    archive.add(writer.path)
+
+    assert len(archive.segments) == 2
+    assert archive.page(INSTRUMENT_ID, None, 100) == expected[:7] + rows
+
+
+def test_failed_export_leaves_no_segment(tmp_path):
+    archive = TransactionArchive(str(tmp_path))
+
+    with pytest.raises(RuntimeError):
+        with archive.writer("trades_2026_01", JANUARY, FEBRUARY) as writer:
+            writer.write_block(INSTRUMENT_ID, trades(JANUARY, 1))
+            raise RuntimeError("export failed")
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,61 @@
+import pytest
+
+from src.user import cache as cache_module
+from src.user.cache import AuthCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_hit_requires_matching_signature(clock):
+    cache = AuthCache(max_size=10, ttl=60)
+    user = object()
+    cache.put("key", "signature", user)
+
+    assert cache.get("key", "signature") is user
+    assert cache.get("key", "forged") is None
+    assert cache.get("other", "signature") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = AuthCache(max_size=10, ttl=60)
+    user = object()
+    cache.put("key", "signature", user)
+
+    clock[0] += 59
+    assert cache.get("key", "signature") is user
+
+    # Срок отсчитывается от записи, а не от последнего обращения
+    clock[0] += 1
+    assert cache.get("key", "signature") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = AuthCache(max_size=2, ttl=60)
+    first, second, third = object(), object(), object()
+    cache.put("first", "s1", first)
+    cache.put("second", "s2", second)
+    assert cache.get("first", "s1") is first
+
+    cache.put("third", "s3", third)
+
+    assert cache.get("second", "s2") is None
+    assert cache.get("first", "s1") is first
+    assert cache.get("third", "s3") is third
+
+
+def test_invalidate_and_disabled_cache(clock):
+    cache = AuthCache(max_size=10, ttl=60)
+    cache.put("key", "signature", object())
+    cache.invalidate("key")
+    assert cache.get("key", "signature") is None
+
+    disabled = AuthCache(max_size=0, ttl=60)
+    disabled.put("key", "signature", object())
+    assert disabled.get("key", "signature") is None
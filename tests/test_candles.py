@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from src.candle.builder import CandleBuilder, bar_start
+from src.candle.enums import CandleInterval
+from src.core.pagination import decode_time_cursor, encode_time_cursor
+from src.order.engine import Fill
+from src.order.enums import Direction
+from src.order.market_data import BookUpdate, MarketData
+
+INSTRUMENT_ID = uuid.uuid4()
+MINUTE = datetime(2026, 3, 1, 12, 0)
+
+
+def update(*trades) -> BookUpdate:
+    return BookUpdate(instrument_id=INSTRUMENT_ID, version=0, levels=[], fills=[
+        Fill(instrument_id=INSTRUMENT_ID, buy_order_id=uuid.uuid4(), sell_order_id=uuid.uuid4(),
+             buy_user_id=uuid.uuid4(), sell_user_id=uuid.uuid4(), buy_unlock=Decimal(0), sell_unlock=Decimal(0),
+             price=Decimal(price), quantity=Decimal(quantity), aggressor=Direction.buy, executed_at=executed_at)
+        for executed_at, price, quantity in trades
+    ])
+
+
+def builder(max_bars: int = 10) -> CandleBuilder:
+    builder = CandleBuilder(MarketData(), max_bars=max_bars)
+    builder.started_at = MINUTE
+    return builder
+
+
+def test_bar_start_aligns_to_interval():
+    timestamp = datetime(2026, 3, 1, 12, 7, 42, 500)
+
+    assert bar_start(timestamp, CandleInterval.second) == datetime(2026, 3, 1, 12, 7, 42)
+    assert bar_start(timestamp, CandleInterval.five_minutes) == datetime(2026, 3, 1, 12, 5)
+    assert bar_start(timestamp, CandleInterval.day) == datetime(2026, 3, 1)
+
+
+def test_fills_accumulate_into_bar_and_roll_over():
+    candles = builder()
+
+    candles.on_update(update((MINUTE + timedelta(seconds=5), 100, 1), (MINUTE + timedelta(seconds=20), 110, 2),
+                             (MINUTE + timedelta(seconds=40), 90, 1)))
+    candles.on_update(update((MINUTE + timedelta(seconds=61), 95, 3)))
+
+    first, second = candles.bars(INSTRUMENT_ID, CandleInterval.minute)
+    assert (first.started_at, first.open, first.high, first.low, first.close) == (MINUTE, 100, 110, 90, 90)
+    assert (first.volume, first.turnover, first.trades) == (4, 410, 3)
+    assert (second.started_at, second.open, second.close, second.trades) == (MINUTE + timedelta(minutes=1), 95, 95, 1)
+
+    # Все интервалы строятся из тех же сделок
+    hour, = candles.bars(INSTRUMENT_ID, CandleInterval.hour)
+    assert (hour.open, hour.high, hour.low, hour.close, hour.volume) == (100, 110, 90, 95, 7)
+    assert (INSTRUMENT_ID, CandleInterval.minute, MINUTE) in candles._dirty
+
+
+def test_late_fill_updates_its_bar_while_in_memory():
+    candles = builder()
+    candles.on_update(update((MINUTE, 100, 1), (MINUTE + timedelta(minutes=1), 100, 1)))
+
+    candles.on_update(update((MINUTE + timedelta(seconds=30), 120, 1)))
+
+    first, second = candles.bars(INSTRUMENT_ID, CandleInterval.minute)
+    assert (first.high, first.close, first.trades) == (120, 120, 2)
+    assert second.trades == 1
+
+
+def test_evicted_bars_move_coverage_forward():
+    candles = builder(max_bars=2)
+    assert candles.covered_since(INSTRUMENT_ID, CandleInterval.minute) == MINUTE
+
+    candles.on_update(update(*[(MINUTE + timedelta(minutes=minute), 100, 1) for minute in range(3)]))
+
+    bars = candles.bars(INSTRUMENT_ID, CandleInterval.minute)
+    assert [bar.started_at for bar in bars] == [MINUTE + timedelta(minutes=1), MINUTE + timedelta(minutes=2)]
+    # Бары раньше covered_since читаются из таблицы
+    assert candles.covered_since(INSTRUMENT_ID, CandleInterval.minute) == MINUTE + timedelta(minutes=1)
+
+    # Сделка в вытесненный бар в памяти уже не учитывается
+    candles.on_update(update((MINUTE + timedelta(seconds=10), 500, 1)))
+    assert all(bar.high == 100 for bar in candles.bars(INSTRUMENT_ID, CandleInterval.minute))
+
+
+def test_bars_filter_by_range():
+    candles = builder()
+    candles.on_update(update(*[(MINUTE + timedelta(minutes=minute), 100 + minute, 1) for minute in range(4)]))
+
+    bars = candles.bars(INSTRUMENT_ID, CandleInterval.minute, MINUTE + timedelta(minutes=1),
+                        MINUTE + timedelta(minutes=2))
+
+    assert [bar.open for bar in bars] == [101, 102]
+
+
+def test_time_cursor_round_trip():
+    assert decode_time_cursor(encode_time_cursor(MINUTE)) == MINUTE
+
+    with pytest.raises(HTTPException) as error:
+        decode_time_cursor("bm90IGEgZGF0ZQ==")
+    assert error.value.status_code == 400
@@ -0,0 +1,113 @@
+import uuid
+from decimal import Decimal
+
+from src.order.engine import BookOrder, MatchingEngine, OrderBook, PlaceOrder
+from src.order.enums import Direction, OrderType
+
+INSTRUMENT_ID = uuid.uuid4()
+
+
+def order(direction: Direction, quantity: int, price: int | None = None) -> BookOrder:
+    return BookOrder(id=uuid.uuid4(), user_id=uuid.uuid4(), instrument_id=INSTRUMENT_ID, direction=direction,
+                     price=Decimal(price) if price is not None else None, quantity=Decimal(quantity))
+
+
+def test_match_follows_price_then_time_priority():
+    book = OrderBook(INSTRUMENT_ID)
+    first_cheap = order(Direction.sell, 1, 100)
+    early_expensive = order(Direction.sell, 1, 101)
+    second_cheap = order(Direction.sell, 1, 100)
+    for resting in (early_expensive, first_cheap, second_cheap):
+        book.submit(resting)
+
+    fills = book.submit(order(Direction.buy, 3, 101))
+
+    assert [fill.sell_order_id for fill in fills] == [first_cheap.id, second_cheap.id, early_expensive.id]
+    assert [fill.price for fill in fills] == [100, 100, 101]
+    assert not book.orders
+
+
+def test_match_stops_at_limit_price_and_rests_the_remainder():
+    book = OrderBook(INSTRUMENT_ID)
+    book.submit(order(Direction.sell, 2, 100))
+    book.submit(order(Direction.sell, 2, 105))
+    taker = order(Direction.buy, 5, 100)
+
+    fills = book.submit(taker)
+
+    assert [(fill.price, fill.quantity) for fill in fills] == [(100, 2)]
+    assert taker.remaining == 3
+    assert book.bids.best().price == 100 and book.bids.best().quantity == 3
+    assert book.asks.best().price == 105
+
+
+def test_partial_fill_keeps_maker_at_head_of_level():
+    book = OrderBook(INSTRUMENT_ID)
+    maker = order(Direction.buy, 5, 100)
+    behind = order(Direction.buy, 5, 100)
+    book.submit(maker)
+    book.submit(behind)
+
+    fills = book.submit(order(Direction.sell, 2, 100))
+
+    assert [(fill.buy_order_id, fill.quantity) for fill in fills] == [(maker.id, 2)]
+    level = book.bids.best()
+    assert level.head() is maker and maker.remaining == 3
+    assert level.quantity == 8
+
+
+def test_market_buy_sweeps_levels_within_budget():
+    engine = MatchingEngine()
+    for price in (100, 110, 120):
+        engine.submit(order(Direction.sell, 2, price))
+    taker = order(Direction.buy, 10)
+
+    # 2 по 100 и 2 по 110 стоят 420, на 120 остаётся 30 — меньше одной единицы
+    result = engine.execute(PlaceOrder(order=taker, order_type=OrderType.market, budget=Decimal(450)))
+
+    assert [(fill.price, fill.quantity) for fill in result.fills] == [(100, 2), (110, 2)]
+    assert all(fill.buy_unlock == 0 for fill in result.fills)
+    assert result.released is taker and taker.remaining == 6
+    assert engine.book(INSTRUMENT_ID).asks.best().price == 120
+    assert taker.id not in engine.book(INSTRUMENT_ID).orders
+
+
+def test_market_sell_budget_limits_quantity():
+    engine = MatchingEngine()
+    engine.submit(order(Direction.buy, 5, 100))
+    taker = order(Direction.sell, 5)
+
+    result = engine.execute(PlaceOrder(order=taker, order_type=OrderType.market, budget=Decimal(3)))
+
+    assert [fill.quantity for fill in result.fills] == [3]
+    assert result.released is taker and taker.remaining == 2
+
+
+def test_load_uncrosses_book_in_creation_order():
+    engine = MatchingEngine()
+    bid = order(Direction.buy, 3, 105)
+    ask = order(Direction.sell, 2, 100)
+    resting_ask = order(Direction.sell, 1, 110)
+
+    fills = engine.load([bid, ask, resting_ask])
+
+    # Более ранняя заявка — мейкер: сделка по её цене
+    assert [(fill.price, fill.quantity, fill.aggressor) for fill in fills] == [(105, 2, Direction.sell)]
+    book = engine.book(INSTRUMENT_ID)
+    assert book.bids.best().price == 105 and book.bids.best().quantity == 1
+    assert book.asks.best().price == 110
+    assert book.bids.best().price < book.asks.best().price
+
+
+def test_load_replaces_only_the_given_instrument():
+    engine = MatchingEngine()
+    other = BookOrder(id=uuid.uuid4(), user_id=uuid.uuid4(), instrument_id=uuid.uuid4(), direction=Direction.buy,
+                      price=Decimal(1), quantity=Decimal(1))
+    engine.submit(other)
+    engine.submit(order(Direction.buy, 1, 100))
+
+    engine.load([order(Direction.sell, 1, 200)], INSTRUMENT_ID)
+
+    assert other.id in engine.book(other.instrument_id).orders
+    book = engine.book(INSTRUMENT_ID)
+    assert not book.bids and book.asks.best().price == 200
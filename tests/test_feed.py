@@ -0,0 +1,77 @@
+import json
+import uuid
+
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from src.order.feed import MarketDataFeed, Subscriber
+from src.order.market_data import MarketData
+
+FIRST_ID = uuid.uuid4()
+SECOND_ID = uuid.uuid4()
+
+
+def subscriber(max_pending: int = 2) -> Subscriber:
+    subscriber = Subscriber(websocket=None, max_pending=max_pending)
+    subscriber.instruments |= {FIRST_ID, SECOND_ID}
+    return subscriber
+
+
+def test_push_queues_messages_and_wakes_writer():
+    feed = subscriber()
+
+    feed.push(FIRST_ID, "a")
+    feed.push(SECOND_ID, "b")
+
+    assert list(feed.pending) == ["a", "b"]
+    assert feed.wakeup.is_set()
+    assert not feed.resync
+
+
+def test_overflow_drops_pending_and_requests_snapshots():
+    feed = subscriber(max_pending=2)
+    feed.push(FIRST_ID, "a")
+    feed.push(SECOND_ID, "b")
+
+    feed.push(FIRST_ID, "c")
+
+    # Медленный клиент получит свежие снимки всех своих инструментов вместо накопленных дельт
+    assert not feed.pending
+    assert feed.resync == {FIRST_ID, SECOND_ID}
+
+
+def test_deltas_are_skipped_until_resync_is_sent():
+    feed = subscriber()
+    feed.request_snapshot(FIRST_ID)
+
+    feed.push(FIRST_ID, "stale")
+    feed.push(SECOND_ID, "fresh")
+
+    assert list(feed.pending) == ["fresh"]
+
+    # Писатель отправил снимок — дельты инструмента снова идут в очередь
+    feed.resync.clear()
+    feed.push(FIRST_ID, "next")
+    assert list(feed.pending) == ["fresh", "next"]
+
+
+def test_malformed_message_keeps_connection_open():
+    feed = MarketDataFeed(MarketData())
+    app = FastAPI()
+
+    async def resolve_ticker(ticker):
+        return None
+
+    @app.websocket("/feed")
+    async def serve(websocket: WebSocket):
+        await feed.serve(websocket, resolve_ticker)
+
+    with TestClient(app).websocket_connect("/feed") as websocket:
+        for message in ("{", "[]"):
+            websocket.send_text(message)
+            assert json.loads(websocket.receive_text())["type"] == "error"
+
+        websocket.send_json({"op": "subscribe", "ticker": "NOPE"})
+        assert json.loads(websocket.receive_text()) == {
+            "type": "error", "ticker": "NOPE", "detail": "Ticker not found or delisted"
+        }
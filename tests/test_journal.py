@@ -0,0 +1,104 @@
+import os
+import uuid
+from decimal import Decimal
+
+from src.order.engine import BookOrder, CancelOrder, OrderBook, PlaceOrder
+from src.order.enums import Direction
+from src.order.journal import Journal, JournalStore
+
+INSTRUMENT_ID = uuid.uuid4()
+
+
+def place(price: int) -> PlaceOrder:
+    return PlaceOrder(order=BookOrder(id=uuid.uuid4(), user_id=uuid.uuid4(), instrument_id=INSTRUMENT_ID,
+                                      direction=Direction.buy, price=Decimal(price), quantity=Decimal(1)))
+
+
+def test_append_and_read_round_trip(tmp_path):
+    journal = Journal(str(tmp_path / "book.journal"), group_commit_size=2)
+    journal.open()
+    commands = [place(100), place(101), CancelOrder(instrument_id=INSTRUMENT_ID, order_id=uuid.uuid4())]
+
+    assert journal.append(commands) == 3
+    journal.close()
+
+    assert list(Journal(journal.path).read()) == list(enumerate(commands, start=1))
+    assert [sequence for sequence, _ in Journal(journal.path).read(after=2)] == [3]
+
+
+def test_open_truncates_torn_tail(tmp_path):
+    path = str(tmp_path / "book.journal")
+    journal = Journal(path)
+    journal.open()
+    journal.append([place(100), place(101)])
+    journal.close()
+    intact = os.path.getsize(path)
+
+    # Сбой посреди записи: заголовок есть, данные не дописаны
+    journal = Journal(path)
+    journal.open()
+    journal.append([place(102)])
+    journal.close()
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) - 3)
+
+    reopened = Journal(path)
+    reopened.open()
+    assert (reopened.sequence, reopened.records) == (2, 2)
+    assert os.path.getsize(path) == intact
+    assert reopened.append([place(103)]) == 3
+    reopened.close()
+    assert [sequence for sequence, _ in Journal(path).read()] == [1, 2, 3]
+
+
+def test_read_stops_at_corrupted_record(tmp_path):
+    path = str(tmp_path / "book.journal")
+    journal = Journal(path)
+    journal.open()
+    journal.append([place(100), place(101)])
+    journal.close()
+
+    with open(path, "r+b") as file:
+        file.seek(-1, os.SEEK_END)
+        last = file.read(1)
+        file.seek(-1, os.SEEK_END)
+        file.write(bytes([last[0] ^ 0xFF]))
+
+    assert [sequence for sequence, _ in Journal(path).read()] == [1]
+
+
+def test_snapshot_truncates_journal_and_keeps_sequence(tmp_path):
+    store = JournalStore(str(tmp_path), snapshot_interval=2)
+    journal = store.journal(INSTRUMENT_ID)
+    commands = [place(100), place(101)]
+    sequence = journal.append(commands)
+    assert store.needs_snapshot(INSTRUMENT_ID)
+
+    book = OrderBook(INSTRUMENT_ID)
+    for command in commands:
+        book.submit(command.order)
+    store.write_snapshot(INSTRUMENT_ID, sequence, JournalStore.dump(book))
+
+    assert not store.needs_snapshot(INSTRUMENT_ID)
+    assert list(journal.read()) == []
+    snapshot = store.load_snapshot(INSTRUMENT_ID)
+    assert snapshot.sequence == 2
+    assert [(order.id, order.price) for order in snapshot.orders] == [(command.order.id, command.order.price)
+                                                                     for command in reversed(commands)]
+
+    # Нумерация продолжается после снимка, восстановление читает журнал с его номера
+    later = place(102)
+    assert journal.append([later]) == 3
+    assert list(journal.read(after=snapshot.sequence)) == [(3, later)]
+    store.close()
+
+
+def test_corrupted_snapshot_is_ignored(tmp_path):
+    store = JournalStore(str(tmp_path))
+    store.write_snapshot(INSTRUMENT_ID, 5, JournalStore.dump(OrderBook(INSTRUMENT_ID)))
+    path = os.path.join(str(tmp_path), f"{INSTRUMENT_ID}.snapshot")
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) - 1)
+
+    assert store.load_snapshot(INSTRUMENT_ID) is None
+    store.close()
@@ -0,0 +1,159 @@
+import asyncio
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from src.balance import ledger as ledger_module
+from src.balance.ledger import BalanceLedger, LedgerEntry
+from src.order.engine import Fill
+from src.order.enums import Direction
+from src.order.settlement import Settlement
+
+QUOTE_ID = uuid.uuid4()
+ASSET_ID = uuid.uuid4()
+BUYER = uuid.uuid4()
+SELLER = uuid.uuid4()
+KEYS = {
+    "buyer_quote": (BUYER, QUOTE_ID),
+    "buyer_asset": (BUYER, ASSET_ID),
+    "seller_quote": (SELLER, QUOTE_ID),
+    "seller_asset": (SELLER, ASSET_ID),
+}
+
+
+class Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    # Ответы на запросы load() по порядку: балансы, затем блокировки открытых заявок
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.commits = 0
+
+    async def execute(self, query):
+        return Rows(self.responses.pop(0))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def loaded_ledger(**balances) -> BalanceLedger:
+    ledger = BalanceLedger()
+    ledger.quote_instrument_id = QUOTE_ID
+    for key, (amount, locked) in balances.items():
+        ledger.entries[KEYS[key]] = LedgerEntry(Decimal(amount), Decimal(locked))
+    return ledger
+
+
+def fill(price: int, quantity: int, buy_unlock: int, sell_unlock: int) -> Fill:
+    return Fill(instrument_id=ASSET_ID, buy_order_id=uuid.uuid4(), sell_order_id=uuid.uuid4(), buy_user_id=BUYER,
+                sell_user_id=SELLER, buy_unlock=Decimal(buy_unlock), sell_unlock=Decimal(sell_unlock),
+                price=Decimal(price), quantity=Decimal(quantity), aggressor=Direction.buy,
+                executed_at=datetime.utcnow())
+
+
+def test_reserve_locks_available_amount_once():
+    ledger = loaded_ledger(buyer_quote=(1000, 0))
+
+    assert ledger.reserve(BUYER, QUOTE_ID, Decimal(600), Decimal(600))
+    assert not ledger.reserve(BUYER, QUOTE_ID, Decimal(600), Decimal(600))
+
+    entry = ledger.entries[KEYS["buyer_quote"]]
+    assert (entry.amount, entry.locked, entry.available) == (1000, 600, 400)
+    assert dict(ledger._pending) == {KEYS["buyer_quote"]: [0, 600]}
+
+
+def test_reserve_rejects_empty_balance():
+    ledger = loaded_ledger()
+
+    assert not ledger.reserve(BUYER, QUOTE_ID, Decimal(0), Decimal(0))
+
+
+def test_adjust_persists_only_when_asked():
+    ledger = loaded_ledger(seller_asset=(10, 0))
+
+    ledger.adjust(SELLER, ASSET_ID, Decimal(5), Decimal(0))
+    ledger.adjust(SELLER, ASSET_ID, Decimal(0), Decimal(3), persist=True)
+
+    assert ledger.available(SELLER, ASSET_ID) == 12
+    assert dict(ledger._pending) == {KEYS["seller_asset"]: [0, 3]}
+
+
+def test_apply_settlement_moves_balances_and_unlocks():
+    ledger = loaded_ledger(buyer_quote=(1000, 500), seller_asset=(10, 5))
+    settlement = Settlement(QUOTE_ID)
+    # Покупка 5 по заявке с ценой 100 исполнилась по 90
+    settlement.add_fills([fill(price=90, quantity=5, buy_unlock=500, sell_unlock=5)])
+
+    ledger.apply_settlement(settlement)
+
+    assert ledger.entries[KEYS["buyer_quote"]] == LedgerEntry(Decimal(550), Decimal(0))
+    assert ledger.entries[KEYS["buyer_asset"]] == LedgerEntry(Decimal(5), Decimal(0))
+    assert ledger.entries[KEYS["seller_asset"]] == LedgerEntry(Decimal(5), Decimal(0))
+    assert ledger.entries[KEYS["seller_quote"]] == LedgerEntry(Decimal(450), Decimal(0))
+    # Расчёты уже в базе вместе со сделками
+    assert not ledger._pending
+
+
+def test_apply_settlement_is_ignored_until_loaded():
+    ledger = BalanceLedger()
+    settlement = Settlement(QUOTE_ID)
+    settlement.add_fills([fill(price=90, quantity=5, buy_unlock=500, sell_unlock=5)])
+
+    ledger.apply_settlement(settlement)
+
+    assert not ledger.entries
+
+
+def test_apply_settlement_is_forwarded_from_worker():
+    ledger = loaded_ledger(buyer_quote=(1000, 500))
+    forwarded = []
+    ledger.forward = forwarded.append
+    settlement = Settlement(QUOTE_ID)
+    settlement.add_fills([fill(price=90, quantity=5, buy_unlock=500, sell_unlock=5)])
+
+    ledger.apply_settlement(settlement)
+    ledger.apply_settlement(Settlement(QUOTE_ID))
+
+    assert forwarded == [dict(settlement.balance_deltas)]
+    assert ledger.entries[KEYS["buyer_quote"]] == LedgerEntry(Decimal(1000), Decimal(500))
+
+    receiver = loaded_ledger(buyer_quote=(1000, 500))
+    receiver.apply_deltas(forwarded[0])
+    assert receiver.entries[KEYS["buyer_quote"]] == LedgerEntry(Decimal(550), Decimal(0))
+
+
+def test_load_reconciles_locks_with_open_orders(monkeypatch):
+    corrections = []
+
+    async def apply_balance_deltas(db_session, deltas):
+        corrections.append(deltas)
+
+    monkeypatch.setattr(ledger_module, "apply_balance_deltas", apply_balance_deltas)
+    session = FakeSession(
+        [
+            (BUYER, QUOTE_ID, Decimal(1000), Decimal(100)),
+            (SELLER, ASSET_ID, Decimal(10), Decimal(4)),
+        ],
+        [
+            # Покупка 3 по 100 блокирует котируемый инструмент, продажа 4 — сам актив
+            (BUYER, ASSET_ID, Direction.buy, Decimal(300)),
+            (SELLER, ASSET_ID, Direction.sell, Decimal(4)),
+        ],
+    )
+    ledger = BalanceLedger()
+    ledger.adjust(BUYER, QUOTE_ID, Decimal(0), Decimal(1), persist=True)
+
+    asyncio.run(ledger.load(session, QUOTE_ID))
+
+    assert ledger.loaded
+    assert ledger.entries[KEYS["buyer_quote"]] == LedgerEntry(Decimal(1000), Decimal(300))
+    assert ledger.entries[KEYS["seller_asset"]] == LedgerEntry(Decimal(10), Decimal(4))
+    assert corrections == [{KEYS["buyer_quote"]: [0, 200]}]
+    assert session.commits == 1
+    assert not ledger._pending
@@ -0,0 +1,89 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from src.balance.ledger import BalanceLedger, LedgerEntry
+from src.instrument.models import Instrument
+from src.instrument.registry import InstrumentRegistry
+from src.order import service
+from src.order.enums import Direction, OrderType
+from src.order.schemas import LimitOrderBody, MarketOrderBody
+
+USER_ID = uuid.uuid4()
+QUOTE = Instrument(id=uuid.uuid4(), ticker=service.DEFAULT_TICKER, name="Ruble", delisted=False)
+ASSET = Instrument(id=uuid.uuid4(), ticker="MEME", name="Meme", delisted=False)
+DELISTED = Instrument(id=uuid.uuid4(), ticker="GONE", name="Gone", delisted=True)
+
+
+@pytest.fixture
+def ledger(monkeypatch) -> BalanceLedger:
+    registry = InstrumentRegistry()
+    registry.replace([QUOTE, ASSET, DELISTED])
+    ledger = BalanceLedger()
+    ledger.quote_instrument_id = QUOTE.id
+    ledger.entries[(USER_ID, QUOTE.id)] = LedgerEntry(Decimal(1000), Decimal(0))
+    ledger.entries[(USER_ID, ASSET.id)] = LedgerEntry(Decimal(5), Decimal(0))
+    monkeypatch.setattr(service, "instrument_registry", registry)
+    monkeypatch.setattr(service, "balance_ledger", ledger)
+    return ledger
+
+
+def limit(direction: Direction, qty: int, price: int, ticker: str = ASSET.ticker) -> LimitOrderBody:
+    return LimitOrderBody(user_id=USER_ID, direction=direction, ticker=ticker, qty=qty, price=price)
+
+
+def market(direction: Direction, qty: int) -> MarketOrderBody:
+    return MarketOrderBody(user_id=USER_ID, direction=direction, ticker=ASSET.ticker, qty=qty)
+
+
+def test_limit_buy_locks_quote_at_order_price(ledger):
+    order, reserve_instrument_id, locked = service.accept_order(limit(Direction.buy, 3, 250))
+
+    assert (order.order_type, order.instrument_id, order.price, order.quantity) == (OrderType.limit, ASSET.id, 250, 3)
+    assert (reserve_instrument_id, locked) == (QUOTE.id, 750)
+    assert ledger.entries[(USER_ID, QUOTE.id)].locked == 750
+
+
+def test_limit_sell_locks_asset_quantity(ledger):
+    _, reserve_instrument_id, locked = service.accept_order(limit(Direction.sell, 5, 10))
+
+    assert (reserve_instrument_id, locked) == (ASSET.id, 5)
+    assert ledger.available(USER_ID, ASSET.id) == 0
+
+
+@pytest.mark.parametrize("body, detail", [
+    (limit(Direction.buy, 5, 201), "Insufficient funds"),
+    (limit(Direction.sell, 6, 10), "Insufficient stock"),
+    (market(Direction.sell, 6), "Insufficient stock"),
+])
+def test_insufficient_balance_is_rejected_without_locking(ledger, body, detail):
+    with pytest.raises(HTTPException) as error:
+        service.accept_order(body)
+
+    assert (error.value.status_code, error.value.detail) == (400, detail)
+    assert all(entry.locked == 0 for entry in ledger.entries.values())
+
+
+def test_market_order_locks_nothing(ledger):
+    order, reserve_instrument_id, locked = service.accept_order(market(Direction.buy, 100))
+
+    assert (order.order_type, order.price, reserve_instrument_id, locked) == (OrderType.market, 0, QUOTE.id, 0)
+    assert ledger.entries[(USER_ID, QUOTE.id)].locked == 0
+
+
+def test_second_order_sees_locks_of_the_first(ledger):
+    service.accept_order(limit(Direction.buy, 3, 300))
+
+    with pytest.raises(HTTPException):
+        service.accept_order(limit(Direction.buy, 1, 101))
+    assert ledger.available(USER_ID, QUOTE.id) == 100
+
+
+@pytest.mark.parametrize("ticker", ["NOPE", DELISTED.ticker])
+def test_unknown_or_delisted_ticker_is_rejected(ledger, ticker):
+    with pytest.raises(HTTPException) as error:
+        service.accept_order(limit(Direction.buy, 1, 1, ticker=ticker))
+
+    assert error.value.status_code == 404
@@ -0,0 +1,90 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from src.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_page
+from src.order.models import Order
+
+
+class Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, boundary):
+        self.boundary = boundary
+        self.queries = []
+
+    async def execute(self, query):
+        self.queries.append(query)
+        return Rows(self.boundary)
+
+
+def compiled(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def page(boundary, cursor=None, limit=2):
+    session = FakeSession(boundary)
+    query, headers = asyncio.run(keyset_page(
+        session, select(Order.id).order_by(Order.created_at.desc(), Order.id.desc()), Order.created_at, Order.id,
+        limit, cursor,
+    ))
+    return session, query, headers
+
+
+def test_cursor_round_trip():
+    timestamp, row_id = datetime(2026, 1, 2, 3, 4, 5, 6), uuid.uuid4()
+
+    assert decode_cursor(encode_cursor(timestamp, row_id)) == (timestamp, row_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!", "bm90IGEgY3Vyc29y", encode_cursor(datetime.utcnow(), uuid.uuid4())[:-4],
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+def test_page_with_more_rows_is_bounded_and_returns_cursor():
+    last = (datetime(2026, 1, 2), uuid.uuid4())
+    _, query, headers = page([last, (datetime(2026, 1, 1), uuid.uuid4())])
+
+    # Граница страницы — найденная строка, а не LIMIT, и с неё начинается следующая страница
+    assert headers == {NEXT_CURSOR_HEADER: encode_cursor(*last)}
+    assert "(orders.created_at, orders.id) >=" in compiled(query)
+    assert "LIMIT" not in compiled(query)
+
+
+def test_last_page_has_no_cursor():
+    _, query, headers = page([(datetime(2026, 1, 2), uuid.uuid4())])
+
+    assert headers == {}
+    assert "(orders.created_at, orders.id) >=" in compiled(query)
+
+
+def test_short_page_is_limited():
+    session, query, headers = page([])
+
+    assert headers == {}
+    assert "LIMIT" in compiled(query)
+    assert "OFFSET" in compiled(session.queries[0])
+
+
+def test_cursor_continues_after_previous_page():
+    cursor = encode_cursor(datetime(2026, 1, 2), uuid.uuid4())
+    session, _, _ = page([], cursor=cursor)
+
+    assert "(orders.created_at, orders.id) <" in compiled(session.queries[0])
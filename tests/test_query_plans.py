@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+import pytest
+
+try:
+    from sqlalchemy import text
+
+    from benchmarks.query_plans import explain, plan_checks, plan_nodes
+    from src.core.database import db_engine
+    from src.dependencies import session_factory
+except Exception as e:  # без настроек базы (DATABASE_HOSTNAME и т. д.) приложение не импортируется
+    pytest.skip(f"Application is not configured: {e}", allow_module_level=True)
+
+CONNECT_TIMEOUT = 5
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def run(coroutine):
+    # Каждый тест работает в своём цикле событий, а соединения пула привязаны к циклу, в котором открыты
+    async def run_and_dispose():
+        try:
+            return await coroutine
+        finally:
+            await db_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+async def ping() -> None:
+    async with session_factory() as db_session:
+        await asyncio.wait_for(db_session.execute(text("SELECT 1")), CONNECT_TIMEOUT)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def postgres() -> None:
+    try:
+        run(ping())
+    except Exception as e:
+        pytest.skip(f"Postgres is not available: {e}")
+
+
+@pytest.mark.parametrize("name, query, index", plan_checks(), ids=[name for name, _, _ in plan_checks()])
+def test_open_order_queries_use_index(name, query, index):
+    plan = run(explain(query))
+
+    scans = {node["Index Name"] for node in plan_nodes(plan) if node["Node Type"] in INDEX_SCANS}
+    assert index in scans, f"{name} is planned without {index}: {json.dumps(plan)}"
@@ -0,0 +1,69 @@
+import random
+from decimal import Decimal
+
+from src.candle.statistics import SlidingWindow
+
+
+def trade(window: SlidingWindow, at: int, price: int, quantity: int = 1) -> None:
+    window.add(at, Decimal(quantity), Decimal(price * quantity), Decimal(price), Decimal(price))
+
+
+def test_empty_window():
+    window = SlidingWindow(window=10, bucket=2)
+
+    assert (window.volume, window.high, window.low, window.vwap) == (0, None, None, None)
+
+
+def test_trades_share_bucket_and_aggregate():
+    window = SlidingWindow(window=10, bucket=2)
+    trade(window, 0, 100, 1)
+    trade(window, 1, 120, 3)
+    trade(window, 2, 90, 1)
+
+    assert len(window.buckets) == 2
+    assert (window.volume, window.high, window.low) == (5, 120, 90)
+    assert window.vwap == Decimal(550) / 5
+
+
+def test_expired_buckets_leave_window_with_their_extremes():
+    window = SlidingWindow(window=10, bucket=2)
+    trade(window, 0, 200)
+    trade(window, 2, 50)
+    trade(window, 4, 100)
+
+    window.expire(10)
+    assert (window.volume, window.high, window.low) == (2, 100, 50)
+
+    window.expire(12)
+    assert (window.volume, window.high, window.low) == (1, 100, 100)
+
+    window.expire(14)
+    assert (window.volume, window.high, window.low, window.vwap) == (0, None, None, None)
+
+
+def test_late_trade_goes_to_last_bucket():
+    window = SlidingWindow(window=10, bucket=2)
+    trade(window, 4, 100)
+
+    trade(window, 1, 300)
+
+    assert len(window.buckets) == 1
+    assert window.buckets[0].started == 4 and window.high == 300
+
+
+def test_matches_full_recalculation():
+    generator = random.Random(7)
+    window = SlidingWindow(window=60, bucket=5)
+    trades = []
+    at = 0
+    for _ in range(500):
+        at += generator.randint(0, 4)
+        price, quantity = generator.randint(1, 1000), generator.randint(1, 10)
+        trade(window, at, price, quantity)
+        trades.append((at - at % 5, price, quantity))
+
+        # Монотонные очереди дают те же экстремумы, что и пересчёт по всем сделкам окна
+        alive = [(price, quantity) for started, price, quantity in trades if started > at - 60]
+        assert window.high == max(price for price, _ in alive)
+        assert window.low == min(price for price, _ in alive)
+        assert window.volume == sum(quantity for _, quantity in alive)